@@ -1,5 +1,7 @@
 import os
+import asyncio
 import jwt
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from fastapi import HTTPException, Security
@@ -16,6 +18,13 @@ ACCESS_TOKEN_EXPIRE_HOURS = 24 * 30  # 30 days
 
 security = HTTPBearer()
 
+# bcrypt worker pool - hashing takes 200-300 ms of CPU, so it must not run on the event loop
+PASSWORD_HASH_POOL_SIZE = int(os.getenv("PASSWORD_HASH_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+_hash_pool = None
+_hash_in_flight = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -27,6 +36,64 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_hash_pool() -> ProcessPoolExecutor:
+    """Create the bcrypt process pool on first use"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_POOL_SIZE)
+    return _hash_pool
+
+
+async def _run_in_hash_pool(fn, *args):
+    """
+    Run a bcrypt call on the worker pool
+    
+    At most PASSWORD_HASH_POOL_SIZE calls run at once and PASSWORD_HASH_QUEUE_LIMIT
+    more may wait; beyond that the request is rejected with 503 instead of queueing
+    """
+    global _hash_in_flight
+    if _hash_in_flight >= PASSWORD_HASH_POOL_SIZE + PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    
+    _hash_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_pool(), fn, *args)
+    finally:
+        _hash_in_flight -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash without blocking the event loop"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def get_hash_pool_stats() -> dict:
+    """Current bcrypt pool load"""
+    return {
+        "pool_size": PASSWORD_HASH_POOL_SIZE,
+        "queue_limit": PASSWORD_HASH_QUEUE_LIMIT,
+        "in_flight": _hash_in_flight
+    }
+
+
+def shutdown_hash_pool():
+    """Stop the bcrypt worker processes"""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
 def create_access_token(data: dict) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -0,0 +1,264 @@
+"""
+Availability service - free inspection slots per inspector over a date range
+Busy time comes from three sources, loaded with one query each:
+- scheduled inspections (scheduled_start / scheduled_end)
+- time slots currently offered to a customer and not yet confirmed ("held")
+- optionally, the owners' Google Calendar events (cached for a few minutes)
+
+Each inspector's busy time is kept in an IntervalIndex - a list sorted by start,
+searched with bisect - so checking every offerable slot in a month is a handful
+of binary searches per slot rather than a scan.
+"""
+import os
+import asyncio
+import logging
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from cachetools import TTLCache
+from models import InspectionStatus
+from timezone_utils import CENTRAL_TZ, INSPECTION_DURATION, get_central_now, scheduled_window
+
+logger = logging.getLogger(__name__)
+
+# The slot times the owner offers (frontend offer-times TIME_SLOTS)
+AVAILABILITY_SLOT_TIMES = [t.strip() for t in os.getenv("AVAILABILITY_SLOT_TIMES", "8am,11am,2pm").split(",") if t.strip()]
+AVAILABILITY_MAX_DAYS = 62
+CALENDAR_CACHE_TTL_SECONDS = int(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "300"))
+
+# Slot states, most to least blocking - a slot reports the first that applies
+BOOKED = "booked"
+HELD = "held"
+CALENDAR = "calendar"
+FREE = "free"
+_PRECEDENCE = {BOOKED: 0, HELD: 1, CALENDAR: 2}
+
+_calendar_cache: TTLCache = TTLCache(maxsize=64, ttl=CALENDAR_CACHE_TTL_SECONDS)
+
+
+class IntervalIndex:
+    """Half-open [start, end) intervals sorted by start, with overlap queries via bisect"""
+
+    def __init__(self):
+        self._intervals: List[Tuple[datetime, datetime, str, Optional[str]]] = []
+        self._starts: List[datetime] = []
+        self._max_length = timedelta(0)
+
+    def add(self, start: datetime, end: datetime, kind: str, ref: Optional[str] = None):
+        if end <= start:
+            return
+        position = bisect_left(self._starts, start)
+        self._starts.insert(position, start)
+        self._intervals.insert(position, (start, end, kind, ref))
+        self._max_length = max(self._max_length, end - start)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime, str, Optional[str]]]:
+        """Intervals intersecting [start, end)"""
+        # Only intervals starting in (start - longest interval, end) can overlap
+        low = bisect_left(self._starts, start - self._max_length)
+        high = bisect_left(self._starts, end)
+        return [interval for interval in self._intervals[low:high] if interval[1] > start]
+
+    def __len__(self):
+        return len(self._intervals)
+
+
+def _utc(value: datetime) -> datetime:
+    """Aware UTC datetime (MongoDB returns naive UTC)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse_event_time(value: str, all_day: bool) -> Optional[datetime]:
+    """Google event start/end: RFC 3339 date-time, or a date for all-day events (Central midnight)"""
+    try:
+        if all_day:
+            return datetime.combine(date.fromisoformat(value), datetime.min.time(), tzinfo=CENTRAL_TZ)
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+
+
+def date_range(start_date: date, end_date: date) -> List[date]:
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def range_bounds(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """UTC bounds covering every Central Time day in the range"""
+    start = datetime.combine(start_date, datetime.min.time(), tzinfo=CENTRAL_TZ)
+    end = datetime.combine(end_date + timedelta(days=1), datetime.min.time(), tzinfo=CENTRAL_TZ)
+    return _utc(start), _utc(end)
+
+
+async def _load_scheduled(db, range_start: datetime, range_end: datetime) -> List[dict]:
+    return await db.inspections.find(
+        {
+            "status": InspectionStatus.scheduled.value,
+            "scheduled_start": {"$gte": range_start - INSPECTION_DURATION, "$lt": range_end}
+        },
+        {"_id": 0, "id": 1, "inspector_id": 1, "inspector_name": 1, "scheduled_start": 1, "scheduled_end": 1}
+    ).to_list(None)
+
+
+async def _load_offered(db, start_date: date, end_date: date) -> List[dict]:
+    return await db.inspections.find(
+        {
+            "status": InspectionStatus.awaiting_customer_selection.value,
+            "offered_time_slots.date": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}
+        },
+        {"_id": 0, "id": 1, "inspector_name": 1, "offered_time_slots": 1}
+    ).to_list(None)
+
+
+async def _load_calendar_events(db, range_start: datetime, range_end: datetime) -> Dict[str, List[dict]]:
+    """Google Calendar events per owner id, cached for CALENDAR_CACHE_TTL_SECONDS"""
+    from google_calendar_service import get_calendar_events
+
+    owners = await db.users.find(
+        {"role": "owner", "google_calendar_credentials": {"$exists": True}},
+        {"_id": 0, "id": 1, "google_calendar_credentials": 1}
+    ).to_list(None)
+
+    events_by_owner = {}
+    for owner in owners:
+        cache_key = (owner["id"], range_start, range_end)
+        events = _calendar_cache.get(cache_key)
+        if events is None:
+            try:
+                # The Google client is blocking - keep it off the event loop
+                result = await asyncio.to_thread(
+                    get_calendar_events,
+                    owner["google_calendar_credentials"],
+                    range_start.replace(tzinfo=None),
+                    range_end.replace(tzinfo=None)
+                )
+            except Exception as e:
+                logger.error(f"Could not load Google Calendar events for owner {owner['id']}: {e}")
+                continue
+            if result.get("credentials"):
+                await db.users.update_one(
+                    {"id": owner["id"]},
+                    {"$set": {"google_calendar_credentials": result["credentials"]}}
+                )
+            events = result.get("events", [])
+            _calendar_cache[cache_key] = events
+        events_by_owner[owner["id"]] = events
+    return events_by_owner
+
+
+def build_busy_index(
+    inspectors: Iterable[dict],
+    scheduled: Iterable[dict],
+    offered: Iterable[dict],
+    calendar_events: Optional[Dict[str, List[dict]]] = None
+) -> Dict[str, IntervalIndex]:
+    """IntervalIndex of busy time per inspector id"""
+    busy = {inspector["id"]: IntervalIndex() for inspector in inspectors}
+    id_by_name = {inspector["name"].strip().lower(): inspector["id"] for inspector in inspectors if inspector.get("name")}
+
+    def resolve(inspector_id: Optional[str], inspector_name: Optional[str]) -> Optional[str]:
+        if inspector_id in busy:
+            return inspector_id
+        return id_by_name.get((inspector_name or "").strip().lower())
+
+    for inspection in scheduled:
+        inspector_id = resolve(inspection.get("inspector_id"), inspection.get("inspector_name"))
+        if inspector_id and inspection.get("scheduled_start"):
+            start = _utc(inspection["scheduled_start"])
+            end = _utc(inspection["scheduled_end"]) if inspection.get("scheduled_end") else start + INSPECTION_DURATION
+            busy[inspector_id].add(start, end, BOOKED, inspection["id"])
+
+    for inspection in offered:
+        for slot in inspection.get("offered_time_slots") or []:
+            inspector_id = resolve(None, slot.get("inspector") or inspection.get("inspector_name"))
+            start, end = scheduled_window(slot.get("date"), slot.get("time"))
+            if inspector_id and start:
+                busy[inspector_id].add(_utc(start), _utc(end), HELD, inspection["id"])
+
+    for owner_id, events in (calendar_events or {}).items():
+        if owner_id not in busy:
+            continue
+        for event in events:
+            all_day = event.get("all_day", False)
+            start = _parse_event_time(event.get("start"), all_day)
+            end = _parse_event_time(event.get("end"), all_day)
+            if start and end:
+                busy[owner_id].add(_utc(start), _utc(end), CALENDAR, event.get("id"))
+
+    return busy
+
+
+def slot_grid(start_date: date, end_date: date, slot_times: List[str]) -> List[Tuple[str, str, datetime, datetime]]:
+    """(date, time, start UTC, end UTC) for every offerable slot in the range"""
+    grid = []
+    for day in date_range(start_date, end_date):
+        for slot_time in slot_times:
+            start, end = scheduled_window(day.isoformat(), slot_time)
+            if start:
+                grid.append((day.isoformat(), slot_time, _utc(start), _utc(end)))
+    return grid
+
+
+def inspector_availability(busy: IntervalIndex, grid, now: datetime) -> List[dict]:
+    """Per-day slot states for one inspector"""
+    days: Dict[str, List[dict]] = {}
+    for day, slot_time, start, end in grid:
+        if start <= now:
+            continue
+        overlaps = busy.overlapping(start, end)
+        slot = {"time": slot_time, "start": start.isoformat(), "status": FREE}
+        if overlaps:
+            blocking = min(overlaps, key=lambda interval: _PRECEDENCE[interval[2]])
+            slot["status"] = blocking[2]
+            if blocking[2] != CALENDAR:
+                slot["inspection_id"] = blocking[3]
+        days.setdefault(day, []).append(slot)
+    return [{"date": day, "slots": slots} for day, slots in days.items()]
+
+
+async def compute_availability(
+    db,
+    inspectors: List[dict],
+    start_date: date,
+    end_date: date,
+    include_calendar: bool = False,
+    exclude_inspection_id: Optional[str] = None,
+    slot_times: Optional[List[str]] = None
+) -> dict:
+    """
+    Slot availability for `inspectors` (staff directory entries) from start_date to end_date
+    inclusive, in Central Time. Past slots are omitted. exclude_inspection_id drops that
+    inspection's own booking and holds, so an owner re-offering times sees them as free.
+    """
+    slot_times = slot_times or AVAILABILITY_SLOT_TIMES
+    range_start, range_end = range_bounds(start_date, end_date)
+
+    loads = [_load_scheduled(db, range_start, range_end), _load_offered(db, start_date, end_date)]
+    if include_calendar:
+        loads.append(_load_calendar_events(db, range_start, range_end))
+    results = await asyncio.gather(*loads)
+    scheduled, offered = results[0], results[1]
+    calendar_events = results[2] if include_calendar else None
+    if exclude_inspection_id:
+        scheduled = [i for i in scheduled if i["id"] != exclude_inspection_id]
+        offered = [i for i in offered if i["id"] != exclude_inspection_id]
+
+    busy = build_busy_index(inspectors, scheduled, offered, calendar_events)
+    grid = slot_grid(start_date, end_date, slot_times)
+    now = _utc(get_central_now())
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "slot_times": slot_times,
+        "inspectors": [
+            {
+                "id": inspector["id"],
+                "name": inspector["name"],
+                "license_number": inspector.get("license_number"),
+                "days": inspector_availability(busy[inspector["id"]], grid, now)
+            }
+            for inspector in inspectors
+        ]
+    }
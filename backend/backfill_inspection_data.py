@@ -1,76 +1,128 @@
 """
-Backfill existing inspections with property details from their associated quotes
+Backfill existing inspections with data from their associated quotes
+- Property details (square_feet, year_built, ...) missing on the inspection
+- fee_amount, from quotes.quote_amount or manual_inspections.fee_amount, so
+  read paths never need to look at a second collection
+
+Resumable: progress is checkpointed in app_state after every batch, so re-running
+continues where the last run stopped. Pass --restart to start from the beginning.
 """
+import argparse
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from dotenv import load_dotenv
 
 load_dotenv()
 
-async def backfill_inspection_data():
+CHECKPOINT_ID = "backfill_inspection_data"
+BATCH_SIZE = 500
+
+PROPERTY_FIELDS = ["square_feet", "year_built", "foundation_type", "property_type", "num_buildings", "num_units"]
+
+
+async def backfill_inspection_data(restart: bool = False, batch_size: int = BATCH_SIZE):
     mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
     db_name = os.getenv("DB_NAME", "test_database")
-    
+
     client = AsyncIOMotorClient(mongo_url)
     db = client[db_name]
-    
-    # Get all inspections
-    inspections = await db.inspections.find({}).to_list(1000)
-    
-    print(f"\nFound {len(inspections)} inspections to check")
+
+    if restart:
+        await db.app_state.delete_one({"_id": CHECKPOINT_ID})
+
+    checkpoint = await db.app_state.find_one({"_id": CHECKPOINT_ID})
+    last_id = checkpoint.get("last_id") if checkpoint else None
+    if last_id is not None:
+        print(f"\n↪️  Resuming after inspection _id {last_id}")
+
+    processed = 0
     updated_count = 0
-    
-    for inspection in inspections:
-        quote_id = inspection.get("quote_id")
-        if not quote_id:
-            print(f"  Skipping inspection {inspection['id']} - no quote_id")
-            continue
-        
-        # Get the associated quote
-        quote = await db.quotes.find_one({"id": quote_id})
-        if not quote:
-            print(f"  Skipping inspection {inspection['id']} - quote not found")
-            continue
-        
-        # Check if inspection is missing property details
-        needs_update = False
-        update_fields = {}
-        
-        if not inspection.get("square_feet") and quote.get("square_feet"):
-            update_fields["square_feet"] = quote["square_feet"]
-            needs_update = True
-        
-        if not inspection.get("year_built") and quote.get("year_built"):
-            update_fields["year_built"] = quote["year_built"]
-            needs_update = True
-        
-        if not inspection.get("foundation_type") and quote.get("foundation_type"):
-            update_fields["foundation_type"] = quote["foundation_type"]
-            needs_update = True
-        
-        if not inspection.get("property_type") and quote.get("property_type"):
-            update_fields["property_type"] = quote["property_type"]
-            needs_update = True
-        
-        if not inspection.get("num_buildings") and quote.get("num_buildings"):
-            update_fields["num_buildings"] = quote["num_buildings"]
-            needs_update = True
-        
-        if not inspection.get("num_units") and quote.get("num_units"):
-            update_fields["num_units"] = quote["num_units"]
-            needs_update = True
-        
-        if needs_update:
-            await db.inspections.update_one(
-                {"id": inspection["id"]},
-                {"$set": update_fields}
-            )
-            updated_count += 1
-            print(f"  ✅ Updated inspection {inspection['id'][:8]}... with {list(update_fields.keys())}")
-    
-    print(f"\n✅ Backfill complete: Updated {updated_count} inspections")
+    fees_filled = 0
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        inspections = await db.inspections.find(
+            query,
+            {"_id": 1, "id": 1, "quote_id": 1, "fee_amount": 1, **{field: 1 for field in PROPERTY_FIELDS}}
+        ).sort("_id", 1).limit(batch_size).to_list(batch_size)
+
+        if not inspections:
+            break
+
+        # Look up every quote and manual entry in the batch with one query each
+        quote_ids = list({i["quote_id"] for i in inspections if i.get("quote_id") and i["quote_id"] != "manual-entry"})
+        manual_ids = list({i["id"] for i in inspections if i.get("quote_id") == "manual-entry"})
+
+        quotes_by_id = {}
+        if quote_ids:
+            quotes = await db.quotes.find(
+                {"id": {"$in": quote_ids}},
+                {"_id": 0, "id": 1, "quote_amount": 1, **{field: 1 for field in PROPERTY_FIELDS}}
+            ).to_list(len(quote_ids))
+            quotes_by_id = {q["id"]: q for q in quotes}
+
+        manual_fees = {}
+        if manual_ids:
+            manual_inspections = await db.manual_inspections.find(
+                {"id": {"$in": manual_ids}},
+                {"_id": 0, "id": 1, "fee_amount": 1}
+            ).to_list(len(manual_ids))
+            manual_fees = {m["id"]: m.get("fee_amount") for m in manual_inspections}
+
+        operations = []
+        for inspection in inspections:
+            update_fields = {}
+            quote = quotes_by_id.get(inspection.get("quote_id"))
+
+            if quote:
+                for field in PROPERTY_FIELDS:
+                    if not inspection.get(field) and quote.get(field):
+                        update_fields[field] = quote[field]
+
+            if not inspection.get("fee_amount"):
+                if inspection.get("quote_id") == "manual-entry":
+                    fee = manual_fees.get(inspection["id"])
+                else:
+                    fee = quote.get("quote_amount") if quote else None
+                if fee:
+                    update_fields["fee_amount"] = float(fee)
+                    fees_filled += 1
+
+            if update_fields:
+                operations.append(UpdateOne({"_id": inspection["_id"]}, {"$set": update_fields}))
+
+        if operations:
+            result = await db.inspections.bulk_write(operations, ordered=False)
+            updated_count += result.modified_count
+
+        processed += len(inspections)
+        last_id = inspections[-1]["_id"]
+        await db.app_state.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        print(f"  Processed {processed} inspections ({updated_count} updated)")
+
+    await db.app_state.update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {"completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+    missing = await db.inspections.count_documents({"fee_amount": {"$in": [None, 0]}, "quote_id": {"$nin": [None, ""]}})
+
+    print(f"\n✅ Backfill complete: {processed} inspections scanned, {updated_count} updated, {fees_filled} fees filled")
+    if missing:
+        print(f"⚠️  {missing} inspections still have no fee_amount (their quote has not been priced)")
     client.close()
 
 if __name__ == "__main__":
-    asyncio.run(backfill_inspection_data())
+    parser = argparse.ArgumentParser(description="Backfill property details and fee_amount on inspections")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start over")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(backfill_inspection_data(restart=args.restart, batch_size=args.batch_size))
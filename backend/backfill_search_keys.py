@@ -0,0 +1,105 @@
+"""
+Backfill search_keys on existing users, inspections and quotes
+New and edited documents get search_keys from the API; this fills in documents
+written before the search index existed.
+
+Resumable: progress is checkpointed in app_state after every batch, so re-running
+continues where the last run stopped. Pass --restart to start from the beginning.
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from search_service import (
+    USER_SEARCH_FIELDS, INSPECTION_SEARCH_FIELDS, QUOTE_SEARCH_FIELDS,
+    user_search_keys, inspection_search_keys, quote_search_keys
+)
+from db_indexes import apply_indexes
+
+load_dotenv()
+
+CHECKPOINT_ID = "backfill_search_keys"
+BATCH_SIZE = 1000
+
+COLLECTIONS = [
+    ("users", USER_SEARCH_FIELDS, user_search_keys),
+    ("inspections", INSPECTION_SEARCH_FIELDS, inspection_search_keys),
+    ("quotes", QUOTE_SEARCH_FIELDS, quote_search_keys)
+]
+
+
+async def backfill_collection(db, name, fields, builder, last_id, batch_size):
+    collection = db[name]
+    projection = {"_id": 1, "search_keys": 1, **{field: 1 for field in fields}}
+    processed = 0
+    updated_count = 0
+
+    if last_id is not None:
+        print(f"↪️  Resuming {name} after _id {last_id}")
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        documents = await collection.find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not documents:
+            break
+
+        operations = []
+        for document in documents:
+            keys = builder(document)
+            if document.get("search_keys") != keys:
+                operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"search_keys": keys}}))
+
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated_count += result.modified_count
+
+        processed += len(documents)
+        last_id = documents[-1]["_id"]
+        await db.app_state.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {f"{name}.last_id": last_id, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        print(f"  {name}: processed {processed} ({updated_count} updated)")
+
+    await db.app_state.update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {f"{name}.completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+    print(f"✅ {name}: {processed} scanned, {updated_count} updated")
+
+
+async def backfill_search_keys(restart: bool = False, batch_size: int = BATCH_SIZE):
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "test_database")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    if restart:
+        await db.app_state.delete_one({"_id": CHECKPOINT_ID})
+
+    await apply_indexes(db, collections=[name for name, _, _ in COLLECTIONS])
+
+    checkpoint = await db.app_state.find_one({"_id": CHECKPOINT_ID}) or {}
+    for name, fields, builder in COLLECTIONS:
+        state = checkpoint.get(name, {})
+        if state.get("completed_at"):
+            print(f"⏭️  {name} already backfilled")
+            continue
+        await backfill_collection(db, name, fields, builder, state.get("last_id"), batch_size)
+
+    print("\n✅ Search key backfill complete")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill search_keys for the search endpoints")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start over")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(backfill_search_keys(restart=args.restart, batch_size=args.batch_size))
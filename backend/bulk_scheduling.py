@@ -0,0 +1,172 @@
+"""
+Bulk scheduling - helpers behind the owner's bulk offer-times / reschedule endpoints
+A batch is validated with one inspections query, checked for double bookings as a
+set (against booked inspections and against the rest of the batch), written with
+one unordered bulk_write and re-read once for the per-item result. Notifications
+are collected while the batch is processed and sent after the response: one Expo
+request per 100 pushes, calendar invites on a worker thread.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from pymongo.errors import BulkWriteError
+from models import InspectionStatus
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Dispatch tasks still running - held so they are not garbage collected mid-send
+_pending_dispatches = set()
+
+
+def item_result(inspection_id: str, status_code: int = 200, detail: Optional[str] = None, **extra) -> dict:
+    return {
+        "inspection_id": inspection_id,
+        "success": status_code < 400,
+        "status_code": status_code,
+        "detail": detail,
+        **extra
+    }
+
+
+def summarize(results: List[dict]) -> dict:
+    succeeded = sum(1 for result in results if result["success"])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+def batch_timestamp() -> datetime:
+    """utcnow truncated to MongoDB's millisecond precision, so it compares equal after a round trip"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC, as MongoDB returns datetimes"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def load_batch(collection, inspection_ids: Iterable[str], projection: dict) -> Dict[str, dict]:
+    """Every inspection in the batch, by id, in one query"""
+    ids = list(set(inspection_ids))
+    documents = await collection.find({"id": {"$in": ids}}, projection).to_list(len(ids))
+    return {document["id"]: document for document in documents}
+
+
+def _inspector_keys(inspector_id: Optional[str], inspector_name: Optional[str]) -> List[tuple]:
+    keys = []
+    if inspector_id:
+        keys.append(("id", inspector_id))
+    if inspector_name and inspector_name.strip():
+        keys.append(("name", inspector_name.strip().lower()))
+    return keys
+
+
+async def find_slot_conflicts(
+    collection,
+    candidates: List[dict],
+    moving_ids: Iterable[str] = (),
+    within_batch: bool = True
+) -> Dict[int, Tuple[dict, str]]:
+    """
+    Double bookings for a whole batch with one query
+    candidates are {"index", "inspection_id", "inspector_id", "inspector_name", "scheduled_start"}.
+    Returns item index -> (candidate, conflicting inspection id) for every candidate whose
+    inspector is already booked at that start by a scheduled inspection outside `moving_ids`,
+    or - with within_batch - already claimed by an earlier candidate in the batch.
+    """
+    candidates = [c for c in candidates if c.get("scheduled_start")]
+    if not candidates:
+        return {}
+
+    starts = list({utc_naive(c["scheduled_start"]) for c in candidates})
+    booked = await collection.find(
+        {
+            "status": InspectionStatus.scheduled.value,
+            "scheduled_start": {"$in": starts},
+            "id": {"$nin": list(moving_ids)}
+        },
+        {"_id": 0, "id": 1, "inspector_id": 1, "inspector_name": 1, "scheduled_start": 1}
+    ).to_list(None)
+
+    taken: Dict[tuple, str] = {}
+    for inspection in booked:
+        for key in _inspector_keys(inspection.get("inspector_id"), inspection.get("inspector_name")):
+            taken[(key, utc_naive(inspection["scheduled_start"]))] = inspection["id"]
+
+    conflicts: Dict[int, Tuple[dict, str]] = {}
+    for candidate in candidates:
+        slot_keys = [
+            (key, utc_naive(candidate["scheduled_start"]))
+            for key in _inspector_keys(candidate.get("inspector_id"), candidate.get("inspector_name"))
+        ]
+        conflicting = next((taken[k] for k in slot_keys if k in taken), None)
+        if conflicting:
+            conflicts.setdefault(candidate["index"], (candidate, conflicting))
+        elif within_batch:
+            for k in slot_keys:
+                taken[k] = candidate["inspection_id"]
+    return conflicts
+
+
+async def apply_bulk(collection, operations: List[Tuple[int, object]]) -> Dict[int, Tuple[int, str]]:
+    """
+    One unordered bulk_write for (item index, operation) pairs
+    Returns item index -> (status code, detail) for the operations MongoDB rejected
+    """
+    if not operations:
+        return {}
+    try:
+        await collection.bulk_write([operation for _, operation in operations], ordered=False)
+        return {}
+    except BulkWriteError as e:
+        failures = {}
+        for error in e.details.get("writeErrors", []):
+            index = operations[error["index"]][0]
+            if error.get("code") == DUPLICATE_KEY_ERROR:
+                failures[index] = (409, "The inspector is already booked at that time")
+            else:
+                logger.error(f"Bulk write failed for item {index}: {error.get('errmsg')}")
+                failures[index] = (500, "Failed to update inspection")
+        return failures
+
+
+class NotificationBatch:
+    """Pushes and calendar invites collected for a batch and sent once it has been written"""
+
+    def __init__(self):
+        self.pushes: List[dict] = []
+        self.invites: List[dict] = []
+
+    def push(self, push_token: Optional[str], title: str, body: str, data: Optional[dict] = None):
+        if push_token:
+            self.pushes.append({"push_token": push_token, "title": title, "body": body, "data": data or {}})
+
+    def invite(self, **invite):
+        """Keyword arguments for email_service.send_inspection_calendar_invite"""
+        self.invites.append(invite)
+
+    def _send(self):
+        from push_notification_service import send_push_notifications
+        from email_service import send_inspection_calendar_invite
+
+        if self.pushes:
+            send_push_notifications(self.pushes)
+        for invite in self.invites:
+            try:
+                send_inspection_calendar_invite(**invite)
+            except Exception as e:
+                logger.error(f"Failed to send calendar invite to {invite.get('to_email')}: {e}")
+
+    def dispatch(self) -> Optional[asyncio.Task]:
+        """Send everything in the background - SMTP and Expo calls never hold up the response"""
+        if not self.pushes and not self.invites:
+            return None
+        logger.info(f"Dispatching {len(self.pushes)} push notifications and {len(self.invites)} calendar invites")
+        task = asyncio.create_task(asyncio.to_thread(self._send))
+        _pending_dispatches.add(task)
+        task.add_done_callback(_pending_dispatches.discard)
+        return task
@@ -0,0 +1,54 @@
+"""
+Verify that every registered hot query shape is served by an index
+Runs explain() on each entry of db_indexes.QUERY_SHAPES and exits non-zero if any
+winning plan contains a COLLSCAN. Pass --apply to create the registry first.
+
+Usage:
+    python check_indexes.py [--apply]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from db_indexes import QUERY_SHAPES, apply_indexes, explain_query_shape
+
+load_dotenv()
+
+
+async def check_indexes(apply: bool = False) -> int:
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "test_database")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    if apply:
+        result = await apply_indexes(db)
+        print(f"\n🔧 Applied index registry: {len(result['created'])} ensured, {len(result['failed'])} failed")
+
+    print(f"\nExplaining {len(QUERY_SHAPES)} query shapes on {db_name}\n")
+    failures = 0
+    for collection_name, query, sort, used_by in QUERY_SHAPES:
+        stages = await explain_query_shape(db, collection_name, query, sort)
+        if "COLLSCAN" in stages:
+            failures += 1
+            print(f"  ❌ {collection_name}: {used_by} -> {' > '.join(stages)}")
+        else:
+            print(f"  ✅ {collection_name}: {used_by} -> {' > '.join(stages)}")
+
+    client.close()
+
+    if failures:
+        print(f"\n❌ {failures} query shape(s) fall back to a collection scan")
+        return 1
+    print("\n✅ Every query shape uses an index")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if any registered query shape does a COLLSCAN")
+    parser.add_argument("--apply", action="store_true", help="Create the registered indexes before checking")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(check_indexes(apply=args.apply)))
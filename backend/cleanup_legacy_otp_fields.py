@@ -0,0 +1,32 @@
+"""
+Remove the legacy password reset OTP fields from user documents
+OTPs now live in the password_resets collection (see otp_service.py)
+"""
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LEGACY_OTP_FIELDS = ["otp_code", "otp_expires_at", "otp_created_at", "otp_attempts", "otp_last_attempt_at"]
+
+
+async def cleanup_legacy_otp_fields():
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "test_database")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    result = await db.users.update_many(
+        {"$or": [{field: {"$exists": True}} for field in LEGACY_OTP_FIELDS]},
+        {"$unset": {field: "" for field in LEGACY_OTP_FIELDS}}
+    )
+
+    print(f"\n✅ Removed legacy OTP fields from {result.modified_count} user(s)")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(cleanup_legacy_otp_fields())
@@ -0,0 +1,49 @@
+"""
+Contact normalization utilities - canonical email and E.164 phone values
+used to match inspections to customer accounts through indexed fields
+"""
+import re
+from typing import Optional
+
+DEFAULT_COUNTRY_CODE = "1"  # US numbers when no country code is given
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Lowercase and trim an email address, returning None for blanks"""
+    if not email:
+        return None
+    email = email.strip().lower()
+    return email or None
+
+
+def normalize_phone_e164(phone: Optional[str]) -> Optional[str]:
+    """
+    Convert a phone number to E.164 (+15125551234)
+    Handles formats like '(512) 555-1234', '512.555.1234', '1-512-555-1234', '+1 512 555 1234'
+    Returns None if the value cannot be a valid number
+    """
+    if not phone:
+        return None
+    phone = phone.strip()
+    has_plus = phone.startswith("+")
+    digits = _NON_DIGITS.sub("", phone)
+
+    if not digits:
+        return None
+    if has_plus:
+        return f"+{digits}" if 8 <= len(digits) <= 15 else None
+    if len(digits) == 10:
+        return f"+{DEFAULT_COUNTRY_CODE}{digits}"
+    if len(digits) == 11 and digits.startswith(DEFAULT_COUNTRY_CODE):
+        return f"+{digits}"
+    return None
+
+
+def customer_contact_fields(email: Optional[str], phone: Optional[str]) -> dict:
+    """Normalized customer contact fields stored on inspections for indexed linking"""
+    return {
+        "customer_email_normalized": normalize_email(email),
+        "customer_phone_e164": normalize_phone_e164(phone)
+    }
@@ -0,0 +1,440 @@
+"""
+Conversation store - the chat list, materialized one document per conversation
+Conversations are keyed like the ids the app already uses:
+- owner_{customer_id}          general chat between a customer (or agent) and the owners
+- inspector_{inspection_id}    chat about one inspection
+
+send_message updates the conversation in the same request with one upsert: last
+message, participants, per-party unread counters and the display fields
+(customer name/phone, property address, inspection date/time, inspector). The
+/conversations list is then one indexed, sorted query.
+
+Unread counters are kept per party rather than per user: `owners` is shared by
+every owner (messages addressed to "the owner"), and each conversation has at
+most one customer, one inspector and one agent. Every change to them is also
+applied to the users' totals in unread_counters.
+
+rebuild_conversations.py regenerates the collection from messages.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from pymongo import ReturnDocument
+from models import InspectionStatus, UserRole
+from pagination import DESC, keyset_filter, keyset_sort, split_page
+from unread_counters import OWNERS_POOL, UnreadCounters
+
+logger = logging.getLogger(__name__)
+
+OWNER_CHAT = "owner_chat"
+INSPECTOR_CHAT = "inspector_chat"
+
+# Inspection chats disappear from the list once the inspection is closed
+CLOSED_INSPECTION_STATUSES = [InspectionStatus.finalized.value, InspectionStatus.cancelled.value]
+
+INSPECTION_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "status": 1,
+    "customer_id": 1,
+    "customer_name": 1,
+    "customer_phone": 1,
+    "property_address": 1,
+    "scheduled_date": 1,
+    "scheduled_time": 1,
+    "inspector_id": 1,
+    "inspector_name": 1,
+    "agent_email": 1
+}
+
+
+def _value(role) -> Optional[str]:
+    return role.value if hasattr(role, "value") else role
+
+
+def conversation_id(inspection_id: Optional[str], customer_id: Optional[str]) -> str:
+    return f"inspector_{inspection_id}" if inspection_id else f"owner_{customer_id}"
+
+
+def owner_chat_customer_id(message: dict) -> Optional[str]:
+    """The non-owner side of a general chat message"""
+    if _value(message.get("sender_role")) != UserRole.owner.value:
+        return message.get("sender_id")
+    return message.get("recipient_id")
+
+
+def inspection_fields(inspection: dict) -> dict:
+    """Display and visibility fields copied from the inspection"""
+    return {
+        "inspection_status": inspection.get("status"),
+        "customer_id": inspection.get("customer_id"),
+        "customer_name": inspection.get("customer_name"),
+        "customer_phone": inspection.get("customer_phone"),
+        "property_address": inspection.get("property_address"),
+        "inspection_date": inspection.get("scheduled_date"),
+        "inspection_time": inspection.get("scheduled_time"),
+        "inspector_name": inspection.get("inspector_name"),
+        "inspector_id": inspection.get("inspector_id"),
+        "agent_email": inspection.get("agent_email")
+    }
+
+
+def unread_parties(message: dict, customer_id: Optional[str], inspector_id: Optional[str], has_agent: bool) -> List[str]:
+    """Parties a new message is unread for - everyone in the conversation except its sender"""
+    sender_id = message.get("sender_id")
+    sender_role = _value(message.get("sender_role"))
+    parties = []
+    if _value(message.get("recipient_role")) == UserRole.owner.value and sender_role != UserRole.owner.value:
+        parties.append("owners")
+    if customer_id and sender_id != customer_id:
+        parties.append("customer")
+    if message.get("inspection_id"):
+        if inspector_id and sender_id != inspector_id:
+            parties.append("inspector")
+        if has_agent and sender_role != UserRole.agent.value:
+            parties.append("agent")
+    return parties
+
+
+def viewer_parties(conversation: dict, principal) -> List[str]:
+    """The unread counters that belong to `principal` in this conversation"""
+    parties = []
+    if principal.role == UserRole.owner:
+        parties.append("owners")
+    if conversation.get("customer_id") == principal.id:
+        parties.append("customer")
+    if conversation.get("inspector_id") == principal.id:
+        parties.append("inspector")
+    if principal.role == UserRole.agent and conversation.get("agent_email") == principal.email:
+        parties.append("agent")
+    return parties
+
+
+def unread_for(conversation: dict, principal) -> int:
+    unread = conversation.get("unread") or {}
+    return sum(max(0, unread.get(party, 0)) for party in viewer_parties(conversation, principal))
+
+
+def conversation_summary(conversation: dict, principal, owner_name: Optional[str] = None) -> dict:
+    """ConversationSummary fields as seen by `principal`"""
+    summary = {
+        "id": conversation["_id"],
+        "conversation_type": conversation["conversation_type"],
+        "inspection_id": conversation.get("inspection_id"),
+        "property_address": conversation.get("property_address"),
+        "customer_name": conversation.get("customer_name") or "Unknown",
+        "customer_id": conversation.get("customer_id") or "",
+        "customer_phone": conversation.get("customer_phone"),
+        "inspector_name": conversation.get("inspector_name"),
+        "last_message": conversation.get("last_message"),
+        "last_message_time": conversation.get("last_message_time"),
+        "unread_count": unread_for(conversation, principal),
+        "expires_at": conversation.get("expires_at"),
+        "inspection_date": conversation.get("inspection_date"),
+        "inspection_time": conversation.get("inspection_time")
+    }
+    if principal.role in (UserRole.customer, UserRole.agent) and conversation.get("customer_id") == principal.id:
+        # The customer's own chat shows who they are talking to - always the current owner for general chats
+        if conversation["conversation_type"] == OWNER_CHAT:
+            summary["customer_name"] = owner_name or "Owner"
+        else:
+            summary["customer_name"] = conversation.get("staff_name") or owner_name or "Owner"
+        summary["customer_phone"] = principal.phone
+    return summary
+
+
+def unread_contributions(conversation: Optional[dict]) -> Dict[str, int]:
+    """What a conversation adds to each user's unread total - closed inspection chats add nothing"""
+    if not conversation or conversation.get("inspection_status") in CLOSED_INSPECTION_STATUSES:
+        return {}
+    unread = conversation.get("unread") or {}
+    holders = (
+        ("owners", OWNERS_POOL),
+        ("customer", conversation.get("customer_id")),
+        ("inspector", conversation.get("inspector_id")),
+        ("agent", conversation.get("agent_id"))
+    )
+    contributions: Dict[str, int] = {}
+    for party, key in holders:
+        amount = max(0, unread.get(party, 0))
+        if key and amount:
+            contributions[key] = contributions.get(key, 0) + amount
+    return contributions
+
+
+def contribution_change(before: Optional[dict], after: Optional[dict]) -> Dict[str, int]:
+    """Unread counter deltas for a conversation going from `before` to `after`"""
+    old, new = unread_contributions(before), unread_contributions(after)
+    return {key: new.get(key, 0) - old.get(key, 0) for key in set(old) | set(new) if new.get(key, 0) != old.get(key, 0)}
+
+
+class ConversationStore:
+    """Materialized conversations, updated on every message and inspection change"""
+
+    def __init__(
+        self,
+        db,
+        unread_counters: Optional[UnreadCounters] = None,
+        on_inspection_change: Optional[Callable[[str], None]] = None
+    ):
+        self._db = db
+        self._collection = db.conversations
+        self._unread_counters = unread_counters
+        # Called with the inspection id whenever an inspection's chat fields change (cache invalidation)
+        self._on_inspection_change = on_inspection_change
+
+    def _inspection_changed(self, inspection_id: str):
+        if self._on_inspection_change is not None:
+            self._on_inspection_change(inspection_id)
+
+    async def _account(self, changes: Iterable[Tuple[Optional[dict], Optional[dict]]]):
+        """Apply the unread total changes of one or more (before, after) conversation states"""
+        if self._unread_counters is None:
+            return
+        deltas: Dict[str, int] = {}
+        for before, after in changes:
+            for key, delta in contribution_change(before, after).items():
+                deltas[key] = deltas.get(key, 0) + delta
+        await self._unread_counters.apply(deltas)
+
+    async def _resolve_agent(self, key: str, before: Optional[dict], after: dict) -> dict:
+        """Agents are matched by email on the inspection - resolve their user id once per conversation"""
+        agent_email = after.get("agent_email")
+        if not agent_email or ((before or {}).get("agent_email") == agent_email and (before or {}).get("agent_id")):
+            return after
+        agent = await self._db.users.find_one({"email": agent_email, "role": UserRole.agent.value}, {"_id": 0, "id": 1})
+        agent_id = agent["id"] if agent else None
+        if agent_id != after.get("agent_id"):
+            await self._collection.update_one({"_id": key}, {"$set": {"agent_id": agent_id, "updated_at": datetime.utcnow()}})
+        return {**after, "agent_id": agent_id}
+
+    async def record_message(
+        self,
+        message: dict,
+        customer: Optional[dict],
+        inspection: Optional[dict] = None,
+        staff_name: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Fold a newly inserted message into its conversation (one upsert)
+        customer: {"id", "name", "phone"} of the customer/agent side; staff_name is the
+        owner or inspector the customer is talking to. Returns the updated conversation.
+        The inspection may come from a cache, so its fields only seed a new conversation -
+        sync_inspection keeps them current after that.
+        """
+        inspection_id = message.get("inspection_id")
+        customer_id = inspection.get("customer_id") if inspection else (customer or {}).get("id")
+        if not inspection_id and not customer_id:
+            return None
+        key = conversation_id(inspection_id, customer_id)
+
+        fields = {
+            "conversation_type": INSPECTOR_CHAT if inspection_id else OWNER_CHAT,
+            "inspection_id": inspection_id,
+            "last_message": message["message_text"],
+            "last_message_id": message["id"],
+            "last_sender_id": message["sender_id"],
+            "expires_at": message.get("expires_at"),
+            "updated_at": datetime.utcnow()
+        }
+        on_insert = {"created_at": datetime.utcnow()}
+        if inspection:
+            on_insert.update(inspection_fields(inspection))
+        if customer:
+            fields.update({"customer_id": customer.get("id"), "customer_name": customer.get("name"), "customer_phone": customer.get("phone")})
+            for field in ("customer_id", "customer_name", "customer_phone"):
+                on_insert.pop(field, None)
+        if staff_name:
+            fields["staff_name"] = staff_name
+
+        inspector_id = (inspection or {}).get("inspector_id")
+        if not inspector_id and inspection_id and _value(message.get("recipient_role")) == UserRole.inspector.value:
+            inspector_id = message.get("recipient_id")
+            fields["inspector_id"] = inspector_id
+            on_insert.pop("inspector_id", None)
+
+        participants = {message.get("sender_id"), message.get("recipient_id"), customer_id, inspector_id} - {None}
+        parties = unread_parties(message, customer_id, inspector_id, bool((inspection or {}).get("agent_email")))
+        owner_visible = not inspection_id or _value(message.get("recipient_role")) == UserRole.owner.value
+
+        update = {
+            "$set": fields,
+            "$max": {"last_message_time": message["created_at"], "owner_visible": owner_visible},
+            "$addToSet": {"participant_ids": {"$each": sorted(participants)}},
+            "$setOnInsert": on_insert
+        }
+        if parties:
+            update["$inc"] = {f"unread.{party}": 1 for party in parties}
+        try:
+            before = await self._collection.find_one_and_update(
+                {"_id": key}, update, upsert=True, return_document=ReturnDocument.BEFORE
+            )
+            unread = dict((before or {}).get("unread") or {})
+            for party in parties:
+                unread[party] = unread.get(party, 0) + 1
+            after = {**(before or {"_id": key, **on_insert}), **fields, "unread": unread}
+            after = await self._resolve_agent(key, before, after)
+            await self._account([(before, after)])
+            return after
+        except Exception as e:
+            # The message itself is stored - the next rebuild restores the conversation
+            logger.error(f"Failed to update conversation for message {message['id']}: {e}")
+            return None
+
+    async def mark_read(self, conversation_ids: Iterable[str], principal) -> int:
+        """Reset `principal`'s unread counters in these conversations; returns how many had unread"""
+
+        def reset_if(field: str, value, party: str) -> dict:
+            return {"$cond": [{"$eq": [f"${field}", value]}, 0, {"$ifNull": [f"$unread.{party}", 0]}]}
+
+        # Same rules as viewer_parties, evaluated by the server in the update itself
+        stage = {
+            "unread.customer": reset_if("customer_id", principal.id, "customer"),
+            "unread.inspector": reset_if("inspector_id", principal.id, "inspector")
+        }
+        if principal.role == UserRole.owner:
+            stage["unread.owners"] = {"$literal": 0}
+        if principal.role == UserRole.agent:
+            stage["unread.agent"] = reset_if("agent_email", principal.email, "agent")
+        # Only a read that clears something counts as a change (updated_at versions the list ETag)
+        stage["updated_at"] = {"$cond": [
+            {"$ne": [
+                list(stage.values()),
+                [{"$ifNull": [f"${field}", 0]} for field in stage]
+            ]},
+            {"$literal": datetime.utcnow()},
+            "$updated_at"
+        ]}
+
+        changes = []
+        for key in conversation_ids:
+            before = await self._collection.find_one_and_update(
+                {"_id": key}, [{"$set": stage}], return_document=ReturnDocument.BEFORE
+            )
+            if before and unread_for(before, principal):
+                unread = dict(before.get("unread") or {})
+                for party in viewer_parties(before, principal):
+                    unread[party] = 0
+                changes.append((before, {**before, "unread": unread}))
+        await self._account(changes)
+        return len(changes)
+
+    async def mark_owner_chats_read(self) -> int:
+        """An owner opening the general chat reads it for every owner"""
+        unread = await self._collection.find(
+            {"conversation_type": OWNER_CHAT, "unread.owners": {"$gt": 0}}, {"_id": 1}
+        ).to_list(None)
+        changes = []
+        for conversation in unread:
+            before = await self._collection.find_one_and_update(
+                {"_id": conversation["_id"], "unread.owners": {"$gt": 0}},
+                {"$set": {"unread.owners": 0, "updated_at": datetime.utcnow()}},
+                return_document=ReturnDocument.BEFORE
+            )
+            if before:
+                changes.append((before, {**before, "unread": {**before["unread"], "owners": 0}}))
+        await self._account(changes)
+        return len(changes)
+
+    async def discount_unread(self, counts: Dict[str, Dict[str, int]]):
+        """
+        Take messages that left the messages collection while still unread out of
+        their conversations' counters. counts: {conversation id: {party: messages}}
+        """
+        now = datetime.utcnow()
+        changes = []
+        for key, parties in counts.items():
+            stage = {
+                f"unread.{party}": {"$max": [0, {"$subtract": [{"$ifNull": [f"$unread.{party}", 0]}, amount]}]}
+                for party, amount in parties.items()
+            }
+            stage["updated_at"] = {"$literal": now}
+            before = await self._collection.find_one_and_update(
+                {"_id": key}, [{"$set": stage}], return_document=ReturnDocument.BEFORE
+            )
+            if before:
+                unread = dict(before.get("unread") or {})
+                for party, amount in parties.items():
+                    unread[party] = max(0, unread.get(party, 0) - amount)
+                changes.append((before, {**before, "unread": unread}))
+        await self._account(changes)
+
+    def visibility_filter(self, principal) -> dict:
+        """Conversations `principal` takes part in (owners also see every chat addressed to an owner)"""
+        if principal.role == UserRole.owner:
+            return {"$or": [{"owner_visible": True}, {"participant_ids": principal.id}]}
+        if principal.role == UserRole.agent:
+            return {"$or": [{"agent_email": principal.email}, {"participant_ids": principal.id}]}
+        return {"participant_ids": principal.id}
+
+    def list_query(self, principal) -> dict:
+        """Every open conversation `principal` sees (also what the /conversations ETag summarizes)"""
+        return {"$and": [
+            self.visibility_filter(principal),
+            {"inspection_status": {"$nin": CLOSED_INSPECTION_STATUSES}}
+        ]}
+
+    async def list_for(self, principal, limit: int, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """A page of `principal`'s open conversations, most recent first, and the next-page cursor"""
+        query = {"$and": [self.list_query(principal), keyset_filter("last_message_time", "_id", cursor, DESC)]}
+        documents = await self._collection.find(query).sort(
+            keyset_sort("last_message_time", "_id", DESC)
+        ).limit(limit + 1).to_list(limit + 1)
+        return split_page(documents, limit, "last_message_time", "_id")
+
+    async def sync_inspection(self, inspection_id: str, inspection: Optional[dict] = None):
+        """
+        Copy an inspection's current status, customer, agent and display fields into its conversation
+        Closing the inspection (finalized/cancelled), attaching a customer or reassigning it
+        moves its unread messages out of (or between) the participants' unread totals here,
+        not at read time. A newly attached customer or inspector joins participant_ids.
+        """
+        self._inspection_changed(inspection_id)
+        key = conversation_id(inspection_id, None)
+        try:
+            if inspection is None:
+                if not await self._collection.find_one({"_id": key}, {"_id": 1}):
+                    return
+                inspection = await self._db.inspections.find_one({"id": inspection_id}, INSPECTION_PROJECTION)
+            if inspection is None:
+                await self.delete(key)
+                return
+            fields = inspection_fields(inspection)
+            update = {"$set": {**fields, "updated_at": datetime.utcnow()}}
+            participants = {fields["customer_id"], fields["inspector_id"]} - {None}
+            if participants:
+                update["$addToSet"] = {"participant_ids": {"$each": sorted(participants)}}
+            before = await self._collection.find_one_and_update(
+                {"_id": key}, update, return_document=ReturnDocument.BEFORE
+            )
+            if before is None:
+                return
+            after = await self._resolve_agent(key, before, {**before, **fields})
+            await self._account([(before, after)])
+        except Exception as e:
+            logger.error(f"Failed to sync conversation for inspection {inspection_id}: {e}")
+
+    async def sync_user(self, user_id: str, name: Optional[str] = None, phone: Optional[str] = None):
+        """Propagate a customer's new name/phone to their conversations"""
+        update = {}
+        if name:
+            update["customer_name"] = name
+        if phone is not None:
+            update["customer_phone"] = phone or None
+        if update:
+            update["updated_at"] = datetime.utcnow()
+            await self._collection.update_many({"customer_id": user_id}, {"$set": update})
+
+    async def delete(self, conversation_id: str):
+        before = await self._collection.find_one_and_delete({"_id": conversation_id})
+        await self._account([(before, None)])
+
+    async def delete_for_inspection(self, inspection_id: str):
+        self._inspection_changed(inspection_id)
+        await self.delete(conversation_id(inspection_id, None))
+
+    async def delete_for_customer(self, customer_id: str):
+        """Drop every conversation of a removed account"""
+        conversations = await self._collection.find({"customer_id": customer_id}).to_list(None)
+        await self._collection.delete_many({"_id": {"$in": [c["_id"] for c in conversations]}})
+        await self._account([(conversation, None) for conversation in conversations])
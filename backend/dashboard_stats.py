@@ -0,0 +1,180 @@
+"""
+Dashboard stats - owner home screen counters kept in a single document
+Every quote and inspection status transition applies an $inc to the
+stats/"dashboard" document, so GET /admin/dashboard/stats is one _id read. A
+periodic reconciliation recounts from the source collections and corrects
+any drift (a transition raced with another writer, a bulk update, a script).
+
+Changes are pushed to owners as a `dashboard_stats` Socket.IO event.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from pymongo import ReturnDocument
+from models import InspectionStatus, QuoteStatus
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STATS_RECONCILE_SECONDS = int(os.getenv("DASHBOARD_STATS_RECONCILE_SECONDS", "300"))  # 0 = startup only
+STATS_DOCUMENT_ID = "dashboard"
+
+# Status -> counter, per source collection
+QUOTE_COUNTERS = {QuoteStatus.pending.value: "pending_quotes"}
+INSPECTION_COUNTERS = {
+    InspectionStatus.pending_scheduling.value: "pending_scheduling",
+    InspectionStatus.scheduled.value: "active_inspections"
+}
+COUNTER_FIELDS = ("pending_quotes", "pending_scheduling", "active_inspections")
+
+
+def _status_value(status) -> Optional[str]:
+    return status.value if hasattr(status, "value") else status
+
+
+def transition_deltas(counters: Dict[str, str], old_status, new_status) -> Dict[str, int]:
+    """$inc document for a document moving from old_status to new_status (None = created/deleted)"""
+    old_status, new_status = _status_value(old_status), _status_value(new_status)
+    deltas: Dict[str, int] = {}
+    if old_status == new_status:
+        return deltas
+    if old_status in counters:
+        deltas[counters[old_status]] = deltas.get(counters[old_status], 0) - 1
+    if new_status in counters:
+        deltas[counters[new_status]] = deltas.get(counters[new_status], 0) + 1
+    return {field: delta for field, delta in deltas.items() if delta}
+
+
+def public_stats(document: dict) -> dict:
+    """The counters as returned by the API and the Socket.IO event"""
+    stats = {field: max(0, document.get(field, 0)) for field in COUNTER_FIELDS}
+    updated_at = document.get("updated_at")
+    stats["updated_at"] = updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at
+    return stats
+
+
+class DashboardStats:
+    """Incrementally maintained owner dashboard counters"""
+
+    def __init__(self, db, on_change: Optional[Callable[[dict], Awaitable[None]]] = None):
+        self._db = db
+        self._collection = db.stats
+        self._on_change = on_change
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self.transitions = 0
+        self.reconciliations = 0
+        self.drift_corrections = 0
+
+    async def get(self) -> dict:
+        """Current counters (one _id read; recounted if the document does not exist yet)"""
+        document = await self._collection.find_one({"_id": STATS_DOCUMENT_ID})
+        if document is None:
+            return await self.reconcile()
+        return public_stats(document)
+
+    async def quote_transition(self, old_status, new_status):
+        """Record a quote created (old None), deleted (new None) or changing status"""
+        await self._apply(transition_deltas(QUOTE_COUNTERS, old_status, new_status))
+
+    async def inspection_transition(self, old_status, new_status):
+        """Record an inspection created (old None), deleted (new None) or changing status"""
+        await self._apply(transition_deltas(INSPECTION_COUNTERS, old_status, new_status))
+
+    async def inspection_transitions(self, transitions: Iterable[Tuple[Optional[str], Optional[str]]]):
+        """Record many (old, new) inspection transitions with a single $inc"""
+        deltas: Dict[str, int] = {}
+        for old_status, new_status in transitions:
+            for field, delta in transition_deltas(INSPECTION_COUNTERS, old_status, new_status).items():
+                deltas[field] = deltas.get(field, 0) + delta
+        await self._apply({field: delta for field, delta in deltas.items() if delta})
+
+    async def _apply(self, deltas: Dict[str, int]):
+        if not deltas:
+            return
+        try:
+            document = await self._collection.find_one_and_update(
+                {"_id": STATS_DOCUMENT_ID},
+                {"$inc": deltas, "$set": {"updated_at": datetime.utcnow()}},
+                return_document=ReturnDocument.AFTER
+            )
+            self.transitions += 1
+            if document is None:
+                # First transition ever - counting now already includes it
+                await self.reconcile()
+                return
+            await self._notify(public_stats(document))
+        except Exception as e:
+            # A missed increment is corrected by the next reconciliation
+            logger.error(f"Failed to update dashboard stats {deltas}: {e}")
+
+    async def count(self) -> Dict[str, int]:
+        """Recount every counter from the source collections"""
+        counts = {}
+        for status, field in QUOTE_COUNTERS.items():
+            counts[field] = await self._db.quotes.count_documents({"status": status})
+        for status, field in INSPECTION_COUNTERS.items():
+            counts[field] = await self._db.inspections.count_documents({"status": status})
+        return counts
+
+    async def reconcile(self) -> dict:
+        """Replace the counters with real counts; notify owners if they had drifted"""
+        counts = await self.count()
+        previous = await self._collection.find_one_and_update(
+            {"_id": STATS_DOCUMENT_ID},
+            {"$set": {**counts, "updated_at": datetime.utcnow(), "reconciled_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        self.reconciliations += 1
+        stats = public_stats({**counts, "updated_at": datetime.utcnow()})
+        drifted = previous is None or any(previous.get(field) != counts[field] for field in COUNTER_FIELDS)
+        if drifted:
+            if previous is not None:
+                self.drift_corrections += 1
+                logger.warning(
+                    "Dashboard stats drift corrected: "
+                    + ", ".join(f"{field} {previous.get(field)} -> {counts[field]}" for field in COUNTER_FIELDS)
+                )
+            await self._notify(stats)
+        return stats
+
+    async def _notify(self, stats: dict):
+        if self._on_change is None:
+            return
+        try:
+            await self._on_change(stats)
+        except Exception as e:
+            logger.error(f"Failed to push dashboard stats: {e}")
+
+    async def _reconcile_periodically(self, interval: int):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Dashboard stats reconciliation failed: {e}")
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    def start_periodic_reconcile(self, interval: int = DASHBOARD_STATS_RECONCILE_SECONDS):
+        """Reconcile now, then every `interval` seconds (once only if 0)"""
+        if self._reconcile_task is None:
+            self._reconcile_task = asyncio.create_task(self._reconcile_periodically(interval))
+
+    async def stop_periodic_reconcile(self):
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            try:
+                await self._reconcile_task
+            except asyncio.CancelledError:
+                pass
+            self._reconcile_task = None
+
+    def stats(self) -> dict:
+        """Transition and reconciliation counters for monitoring"""
+        return {
+            "transitions": self.transitions,
+            "reconciliations": self.reconciliations,
+            "drift_corrections": self.drift_corrections
+        }
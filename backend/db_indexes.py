@@ -0,0 +1,217 @@
+"""
+Index registry - every MongoDB index the API relies on, declared in one place
+apply_indexes() runs in a background task after startup; create_index is idempotent,
+so existing indexes are left alone and only missing ones are built. MongoDB 4.2+
+ignores background=True and holds each build until it finishes, which is why the
+API does not wait for it.
+
+QUERY_SHAPES lists the hot filters (with placeholder values) that each index is
+meant to serve; check_indexes.py explains every one and fails on a COLLSCAN.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+ASC = 1
+DESC = -1
+
+
+def index(*keys, **options) -> dict:
+    """Declare an index: index(("status", ASC), ("scheduled_date", ASC), unique=True)"""
+    return {"keys": list(keys), "options": options}
+
+
+INDEX_REGISTRY: Dict[str, List[dict]] = {
+    "users": [
+        index(("id", ASC), unique=True),
+        index(("email", ASC), unique=True),
+        index(("role", ASC)),
+        # Prefix search (search_service)
+        index(("search_keys", ASC)),
+        index(("role", ASC), ("search_keys", ASC)),
+    ],
+    "inspections": [
+        index(("id", ASC), unique=True),
+        # get_my_inspections - one index per $or branch / role
+        index(("customer_id", ASC), ("status", ASC)),
+        index(("customer_email", ASC)),
+        index(("agent_email", ASC)),
+        index(("inspector_id", ASC)),
+        index(("inspector_email", ASC)),
+        # Owner listings and dashboard counts by status
+        index(("status", ASC), ("scheduled_date", ASC)),
+        # Availability: bookings and offered slots in a date range
+        index(("status", ASC), ("scheduled_start", ASC)),
+        index(("status", ASC), ("offered_time_slots.date", ASC)),
+        # Double-booking guard: one scheduled inspection per inspector per slot start.
+        # Writes that would take a taken slot fail with DuplicateKeyError (409)
+        index(
+            ("inspector_id", ASC), ("scheduled_start", ASC),
+            unique=True,
+            name="inspector_slot_unique",
+            partialFilterExpression={
+                "status": "scheduled",
+                "inspector_id": {"$type": "string"},
+                "scheduled_start": {"$type": "date"}
+            }
+        ),
+        # Same check for inspectors entered by name only
+        index(("inspector_name", ASC), ("scheduled_start", ASC)),
+        # Quote price changes propagate fee_amount by quote_id
+        index(("quote_id", ASC)),
+        # link_customer_inspections
+        index(("customer_email_normalized", ASC), ("customer_id", ASC)),
+        index(("customer_phone_e164", ASC), ("customer_id", ASC)),
+        index(("search_keys", ASC)),
+    ],
+    "quotes": [
+        index(("id", ASC), unique=True),
+        index(("status", ASC), ("created_at", DESC)),
+        index(("agent_email", ASC)),
+        index(("customer_id", ASC)),
+        index(("customer_email", ASC)),
+        index(("search_keys", ASC)),
+    ],
+    "manual_inspections": [
+        index(("id", ASC), unique=True),
+    ],
+    "messages": [
+        # Chat history pages on (created_at, id) - inspection chats
+        index(("inspection_id", ASC), ("created_at", DESC), ("id", DESC)),
+        # Owner general chat (inspection_id None), one index per $or branch
+        index(("recipient_role", ASC), ("inspection_id", ASC), ("created_at", DESC), ("id", DESC)),
+        index(("sender_role", ASC), ("inspection_id", ASC), ("created_at", DESC), ("id", DESC)),
+        index(("sender_id", ASC), ("recipient_role", ASC), ("created_at", DESC), ("id", DESC)),
+        index(("recipient_id", ASC), ("sender_role", ASC), ("created_at", DESC), ("id", DESC)),
+        index(("sender_id", ASC), ("created_at", ASC)),
+        index(("sender_role", ASC), ("recipient_id", ASC)),
+        # Archival of expired messages (message_archive)
+        index(("expires_at", ASC)),
+    ],
+    "messages_archive": [
+        index(("id", ASC), unique=True),
+        # Inspection / conversation deletes, data export and account deletion
+        index(("inspection_id", ASC)),
+        index(("sender_id", ASC)),
+        index(("recipient_id", ASC)),
+    ],
+    "conversations": [
+        # Conversation lists, newest first - one index per visibility branch
+        index(("owner_visible", ASC), ("last_message_time", DESC), ("_id", DESC)),
+        index(("participant_ids", ASC), ("last_message_time", DESC), ("_id", DESC)),
+        index(("agent_email", ASC), ("last_message_time", DESC), ("_id", DESC)),
+        # Profile changes and account deletion
+        index(("customer_id", ASC)),
+        # Owner opening the general chat
+        index(("conversation_type", ASC)),
+        # Expired conversations (message_archive)
+        index(("expires_at", ASC)),
+    ],
+    "read_state": [
+        # Receipts for a page of messages; account deletion
+        index(("conversation_id", ASC)),
+        index(("user_id", ASC)),
+    ],
+    "password_resets": [
+        # TTL - MongoDB drops reset records once purge_at passes
+        index(("purge_at", ASC), expireAfterSeconds=0),
+    ],
+}
+
+
+# Hot query shapes: (collection, filter, sort, where it is used)
+QUERY_SHAPES = [
+    ("users", {"id": "u1"}, None, "get_current_user_from_token / user lookups"),
+    ("users", {"email": "a@example.com"}, None, "login / register"),
+    ("users", {"role": "owner"}, None, "staff directory load"),
+    ("users", {"role": "agent", "search_keys": "jan"}, None, "search_agents"),
+    ("inspections", {"id": "i1"}, None, "inspection by id"),
+    ("inspections", {"$or": [{"customer_id": "u1"}, {"customer_email": "a@example.com"}]}, None, "get_my_inspections (customer)"),
+    ("inspections", {"agent_email": "a@example.com"}, None, "get_my_inspections (agent)"),
+    ("inspections", {"$or": [{"inspector_id": "u1"}, {"inspector_email": "a@example.com"}]}, None, "get_my_inspections (inspector)"),
+    ("inspections", {"status": "pending_scheduling"}, None, "get_pending_scheduling / dashboard stats"),
+    ("inspections", {"status": {"$in": ["scheduled", "finalized"]}}, None, "get_confirmed_inspections"),
+    ("inspections", {"inspector_name": "Brad Baker", "scheduled_start": datetime(2025, 1, 1, 14), "status": "scheduled", "id": {"$ne": "i1"}}, None, "check_unindexed_double_booking"),
+    ("inspections", {"status": "scheduled", "scheduled_start": {"$gte": datetime(2025, 1, 1), "$lt": datetime(2025, 2, 1)}}, None, "availability (bookings)"),
+    ("inspections", {"status": "awaiting_customer_selection", "offered_time_slots.date": {"$gte": "2025-01-01", "$lte": "2025-01-31"}}, None, "availability (offered slots)"),
+    ("inspections", {"status": "scheduled", "scheduled_start": {"$in": [datetime(2025, 1, 1, 14), datetime(2025, 1, 2, 17)]}, "id": {"$nin": ["i1"]}}, None, "bulk offer-times / reschedule conflicts"),
+    ("inspections", {"quote_id": "q1", "payment_completed": {"$ne": True}}, None, "sync_inspection_fee_from_quote"),
+    ("inspections", {"customer_id": "u1", "status": {"$in": ["pending_scheduling", "scheduled"]}}, None, "delete_user_account"),
+    ("inspections", {"customer_id": None, "$or": [{"customer_email_normalized": "a@example.com"}, {"customer_phone_e164": "+15125551234"}]}, None, "link_customer_inspections"),
+    ("inspections", {"search_keys": "main"}, None, "search_inspections"),
+    ("quotes", {"id": "q1"}, None, "quote by id"),
+    ("quotes", {"status": "pending"}, None, "get_all_quotes / dashboard stats"),
+    ("quotes", {"agent_email": "a@example.com"}, None, "get_my_quotes (agent)"),
+    ("quotes", {"customer_id": "u1"}, None, "get_my_quotes (customer)"),
+    ("quotes", {"customer_email": "a@example.com"}, None, "export / delete account"),
+    ("manual_inspections", {"id": "i1"}, None, "manual inspection by id"),
+    ("messages", {"inspection_id": "i1"}, [("created_at", DESC), ("id", DESC)], "get_messages"),
+    ("messages", {"$and": [{"inspection_id": "i1"}, {"$or": [{"created_at": {"$lt": datetime(2025, 1, 1)}}, {"created_at": datetime(2025, 1, 1), "id": {"$lt": "m1"}}]}]}, [("created_at", DESC), ("id", DESC)], "get_messages (before)"),
+    ("messages", {"inspection_id": None, "$or": [{"recipient_role": "owner"}, {"sender_role": "owner"}]}, [("created_at", DESC), ("id", DESC)], "get_owner_chat_messages (owner)"),
+    ("messages", {"inspection_id": None, "$or": [{"sender_id": "u1", "recipient_role": "owner"}, {"sender_role": "owner", "recipient_id": "u1"}]}, [("created_at", DESC), ("id", DESC)], "get_owner_chat_messages (customer)"),
+    ("messages", {"$or": [{"sender_id": "u1"}, {"recipient_id": "u1"}]}, None, "export_user_data"),
+    ("messages", {"expires_at": {"$lte": datetime(2025, 1, 1)}}, [("expires_at", ASC)], "archive_expired"),
+    ("conversations", {"expires_at": {"$lte": datetime(2025, 1, 1)}}, None, "archive_expired (conversations)"),
+    ("read_state", {"conversation_id": {"$in": ["inspector_i1", "owner_chat"]}}, None, "read receipts"),
+    ("conversations", {"$or": [{"owner_visible": True}, {"participant_ids": "u1"}], "inspection_status": {"$nin": ["finalized", "cancelled"]}}, [("last_message_time", DESC), ("_id", DESC)], "get_conversations (owner)"),
+    ("conversations", {"participant_ids": "u1", "inspection_status": {"$nin": ["finalized", "cancelled"]}}, [("last_message_time", DESC), ("_id", DESC)], "get_conversations"),
+    ("conversations", {"$or": [{"agent_email": "a@example.com"}, {"participant_ids": "u1"}]}, [("last_message_time", DESC), ("_id", DESC)], "get_conversations (agent)"),
+    ("conversations", {"customer_id": "u1"}, None, "conversation sync_user / delete_for_customer"),
+]
+
+
+def index_name(spec: dict) -> str:
+    """Explicit name, or the MongoDB default for an index spec (field_dir_field_dir)"""
+    if spec["options"].get("name"):
+        return spec["options"]["name"]
+    return "_".join(f"{field}_{direction}" for field, direction in spec["keys"])
+
+
+async def apply_indexes(db, collections: Optional[List[str]] = None) -> dict:
+    """
+    Create every registered index (idempotent)
+    A failing index (build error, conflicting options, lost connection) is logged
+    and skipped so the remaining indexes are still built
+
+    Returns: {"created": [...], "failed": [...]}
+    """
+    created, failed = [], []
+    for collection_name, specs in INDEX_REGISTRY.items():
+        if collections and collection_name not in collections:
+            continue
+        for spec in specs:
+            name = f"{collection_name}.{index_name(spec)}"
+            try:
+                await db[collection_name].create_index(spec["keys"], background=True, **spec["options"])
+                created.append(name)
+            except PyMongoError as e:
+                logger.error(f"Could not create index {name}: {e}")
+                failed.append(name)
+    logger.info(f"Index registry applied: {len(created)} ensured, {len(failed)} failed")
+    return {"created": created, "failed": failed}
+
+
+def plan_stages(plan) -> List[str]:
+    """All stage names in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+async def explain_query_shape(db, collection_name: str, query: dict, sort=None) -> List[str]:
+    """Stages of the winning plan for a query shape"""
+    cursor = db[collection_name].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    explanation = await cursor.explain()
+    return plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
@@ -0,0 +1,176 @@
+"""
+Profile picture image pipeline
+Uploads are decoded, orientation-corrected, center-cropped to a square and
+re-encoded at a few fixed sizes, so chat bubbles download a 64 px thumbnail
+instead of the phone's original 3-8 MB photo. Pillow work runs on a thread pool.
+
+Every upload is stored under new keys ({user_id}-{version}-{px}, the version being
+a hash of the rendered image), so a new picture always gets new presigned URLs and
+no worker's URL cache or client image cache can keep serving the old one.
+"""
+import os
+import io
+import re
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+# Named sizes clients can request (square, in pixels)
+PROFILE_PICTURE_SIZES = {"small": 64, "medium": 256, "large": 1024}
+DEFAULT_PROFILE_PICTURE_SIZE = "large"
+
+PROFILE_PICTURE_MAX_UPLOAD_BYTES = int(os.getenv("PROFILE_PICTURE_MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+# WebP is roughly a third smaller than JPEG at the same quality; fall back if Pillow lacks it
+PROFILE_PICTURE_FORMAT = "WEBP" if features.check("webp") and os.getenv("PROFILE_PICTURE_FORMAT", "webp").lower() == "webp" else "JPEG"
+PROFILE_PICTURE_QUALITY = 82
+
+# Refuse decompression bombs - a 12 MP phone photo is well under this
+Image.MAX_IMAGE_PIXELS = 50_000_000
+
+_FORMAT_DETAILS = {
+    "WEBP": ("webp", "image/webp"),
+    "JPEG": ("jpg", "image/jpeg")
+}
+# Only the generated sizes - a legacy key's UUID can end in an all-digit group
+_SIZED_KEY = re.compile(
+    r"^(?P<base>.+)-(?P<px>" + "|".join(str(px) for px in PROFILE_PICTURE_SIZES.values()) + r")\.(?P<ext>webp|jpg)$"
+)
+
+_image_pool = None
+
+
+class InvalidImageError(ValueError):
+    """Upload could not be decoded as an image"""
+
+
+class UploadTooLargeError(ValueError):
+    """Upload exceeds PROFILE_PICTURE_MAX_UPLOAD_BYTES"""
+
+
+async def read_upload(file, max_bytes: int = PROFILE_PICTURE_MAX_UPLOAD_BYTES) -> bytes:
+    """Read an upload in chunks, stopping as soon as it exceeds max_bytes"""
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def resolve_profile_picture_size(size: Optional[str]) -> int:
+    """
+    Map a requested size ('small', 'medium', 'large' or a pixel value like '256')
+    to one of the generated sizes in pixels. Raises ValueError for unknown sizes
+    """
+    if not size:
+        return PROFILE_PICTURE_SIZES[DEFAULT_PROFILE_PICTURE_SIZE]
+    size = size.strip().lower()
+    if size in PROFILE_PICTURE_SIZES:
+        return PROFILE_PICTURE_SIZES[size]
+    if size.isdigit() and int(size) in PROFILE_PICTURE_SIZES.values():
+        return int(size)
+    raise ValueError(f"Unknown profile picture size '{size}'. Use one of: {', '.join(PROFILE_PICTURE_SIZES)}")
+
+
+def profile_picture_version(rendered: Dict[int, bytes]) -> str:
+    """Content hash of an upload's largest rendered size - identical pictures share keys"""
+    return hashlib.sha256(rendered[max(rendered)]).hexdigest()[:16]
+
+
+def profile_picture_key(user_id: str, version: str, px: int) -> str:
+    """S3 key of one generated size of one upload"""
+    extension = _FORMAT_DETAILS[PROFILE_PICTURE_FORMAT][0]
+    return f"profile-pictures/{user_id}-{version}-{px}.{extension}"
+
+
+def profile_picture_key_for_size(stored_key: str, px: int) -> str:
+    """
+    Swap the size suffix of a stored profile picture key
+    Legacy uploads (original bytes, no size suffix) only exist in one size and are returned unchanged;
+    keys from before versioning ({user_id}-{px}) still resolve
+    """
+    match = _SIZED_KEY.match(stored_key)
+    if not match:
+        return stored_key
+    return f"{match.group('base')}-{px}.{match.group('ext')}"
+
+
+def all_profile_picture_keys(stored_key: str) -> List[str]:
+    """Every S3 key belonging to a stored profile picture"""
+    if not _SIZED_KEY.match(stored_key):
+        return [stored_key]
+    return [profile_picture_key_for_size(stored_key, px) for px in PROFILE_PICTURE_SIZES.values()]
+
+
+def _render_sizes(image_bytes: bytes) -> Dict[int, bytes]:
+    """Decode once, then crop/resize/encode every size (runs on the image pool)"""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as source:
+            source.load()
+            image = ImageOps.exif_transpose(source)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImageError(f"Unsupported or corrupt image: {e}")
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    if PROFILE_PICTURE_FORMAT == "JPEG" and image.mode == "RGBA":
+        # JPEG has no alpha channel - flatten onto white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+
+    # Square crop at the largest size we need, never upscaling
+    largest = min(max(PROFILE_PICTURE_SIZES.values()), image.width, image.height)
+    square = ImageOps.fit(image, (largest, largest), method=Image.Resampling.LANCZOS)
+
+    rendered = {}
+    for px in sorted(PROFILE_PICTURE_SIZES.values(), reverse=True):
+        target = min(px, largest)
+        resized = square if target == largest else square.resize((target, target), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, format=PROFILE_PICTURE_FORMAT, quality=PROFILE_PICTURE_QUALITY, optimize=True)
+        rendered[px] = buffer.getvalue()
+    return rendered
+
+
+def _get_image_pool() -> ThreadPoolExecutor:
+    """Create the image thread pool on first use"""
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ThreadPoolExecutor(max_workers=IMAGE_PROCESSING_WORKERS, thread_name_prefix="image")
+    return _image_pool
+
+
+async def render_profile_picture_sizes(image_bytes: bytes) -> Dict[int, bytes]:
+    """
+    Produce every profile picture size from an upload without blocking the event loop
+
+    Returns: {pixel_size: encoded_bytes}
+    Raises InvalidImageError if the upload is not a decodable image
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_image_pool(), _render_sizes, image_bytes)
+
+
+def profile_picture_content_type() -> str:
+    return _FORMAT_DETAILS[PROFILE_PICTURE_FORMAT][1]
+
+
+def shutdown_image_pool():
+    """Stop the image thread pool (called on app shutdown)"""
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False)
+        _image_pool = None
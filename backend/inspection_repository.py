@@ -0,0 +1,123 @@
+"""
+Inspection repository - single round-trip, guarded writes to the inspections collection
+Each method is one find_one_and_update(return_document=AFTER): the filter carries
+the preconditions (expected status, not yet finalized, not yet paid ...) so an
+invalid or concurrent transition simply matches nothing and returns None, and a
+successful one returns the updated document without a second read.
+
+Status transitions are written as an update pipeline so the document also keeps
+`previous_status` - callers use it to account for the transition (dashboard_stats)
+without reading the document first.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
+
+INSPECTION_PROJECTION = {"_id": 0}
+
+
+def _literal(value):
+    """Pipeline stages treat "$..." strings as field paths - user data is always a literal"""
+    return {"$literal": value}
+
+
+class InspectionRepository:
+    """Guarded updates that return the inspection as it is after the write"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    @staticmethod
+    def transition_update(
+        inspection_id: str,
+        to_status: Optional[str] = None,
+        from_statuses: Optional[Iterable[str]] = None,
+        set_fields: Optional[dict] = None,
+        set_expressions: Optional[dict] = None,
+        guard: Optional[dict] = None,
+        now: Optional[datetime] = None
+    ) -> Tuple[dict, List[dict]]:
+        """Filter and update pipeline for a guarded transition (see transition)"""
+        query = {"id": inspection_id, **(guard or {})}
+        if from_statuses is not None:
+            query["status"] = {"$in": [getattr(s, "value", s) for s in from_statuses]}
+
+        stage = {field: _literal(value) for field, value in (set_fields or {}).items()}
+        stage.update(set_expressions or {})
+        stage["updated_at"] = _literal(now or datetime.utcnow())
+        if to_status is not None:
+            stage["previous_status"] = "$status"
+            stage["status"] = _literal(getattr(to_status, "value", to_status))
+        return query, [{"$set": stage}]
+
+    async def transition(self, inspection_id: str, **kwargs) -> Optional[dict]:
+        """
+        Apply set_fields (and to_status) if the inspection is in one of from_statuses and
+        matches `guard`. set_expressions are aggregation expressions evaluated against the
+        current document (e.g. {"payment_amount": "$fee_amount"}).
+
+        Returns the updated inspection, with previous_status set, or None if nothing matched.
+        """
+        query, pipeline = self.transition_update(inspection_id, **kwargs)
+        return await self._collection.find_one_and_update(
+            query,
+            pipeline,
+            projection=INSPECTION_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+
+    def transition_operation(self, inspection_id: str, **kwargs) -> UpdateOne:
+        """The same guarded transition as a bulk_write operation"""
+        query, pipeline = self.transition_update(inspection_id, **kwargs)
+        return UpdateOne(query, pipeline)
+
+    async def push_report_files(self, inspection_id: str, files: List[dict]) -> Optional[dict]:
+        """Append report files atomically - concurrent uploads never overwrite each other"""
+        now = datetime.utcnow()
+        update = {
+            "$push": {"report_files": {"$each": files}},
+            "$set": {"report_uploaded_at": now, "updated_at": now}
+        }
+        try:
+            return await self._collection.find_one_and_update(
+                {"id": inspection_id}, update,
+                projection=INSPECTION_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+        except OperationFailure:
+            # Inspections are created with report_files: null, which $push rejects -
+            # turn it into an empty list once and push again
+            await self._collection.update_one(
+                {"id": inspection_id, "report_files": None},
+                {"$set": {"report_files": []}}
+            )
+            return await self._collection.find_one_and_update(
+                {"id": inspection_id}, update,
+                projection=INSPECTION_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+
+    async def release_payment_claim(self, inspection_id: str):
+        """Drop the payment_pending claim after a charge that failed or was recorded elsewhere"""
+        await self._collection.update_one(
+            {"id": inspection_id},
+            {"$set": {"payment_pending": False, "updated_at": datetime.utcnow()}, "$unset": {"payment_pending_at": ""}}
+        )
+
+    async def record_duplicate_payment(self, inspection_id: str, payment: dict) -> Optional[dict]:
+        """Keep a charge that arrived after the inspection was already paid, and release the claim"""
+        now = datetime.utcnow()
+        return await self._collection.find_one_and_update(
+            {"id": inspection_id},
+            {
+                "$push": {"duplicate_payments": payment},
+                "$set": {"payment_pending": False, "updated_at": now},
+                "$unset": {"payment_pending_at": ""}
+            },
+            projection=INSPECTION_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def get(self, inspection_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self._collection.find_one({"id": inspection_id}, projection or INSPECTION_PROJECTION)
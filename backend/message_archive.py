@@ -0,0 +1,172 @@
+"""
+Message archive - moves expired chat messages out of the hot messages collection
+Messages expire 24 hours after their inspection (30 days for general chats). A
+periodic job copies expired messages into messages_archive in batches and then
+deletes them from messages, so the hot collection and its indexes stay bounded
+and chat queries no longer need an expiry predicate.
+
+Expired messages that were still unread are taken out of their conversation's
+unread counters (and the users' totals) - a general chat or a rescheduled
+inspection stays live after its older messages expire. Conversations whose last
+message has expired are removed in the same pass (with their unread counts and
+read watermarks). Safe with several workers: archive inserts are keyed on the
+message id, every delete is idempotent, and an unread message is only discounted
+by the run whose delete removed it.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo.errors import BulkWriteError
+from conversation_store import conversation_id, owner_chat_customer_id, unread_parties
+from read_state import OWNERS_CHAT_VIEW, is_unread_for, party_watermarks
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_ARCHIVE_INTERVAL_SECONDS = int(os.getenv("MESSAGE_ARCHIVE_INTERVAL_SECONDS", "900"))  # 0 = startup only
+MESSAGE_ARCHIVE_BATCH_SIZE = int(os.getenv("MESSAGE_ARCHIVE_BATCH_SIZE", "500"))
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class MessageArchiver:
+    """Batched move of expired messages into messages_archive"""
+
+    def __init__(self, db, conversation_store, read_states, batch_size: int = MESSAGE_ARCHIVE_BATCH_SIZE):
+        self._messages = db.messages
+        self._archive = db.messages_archive
+        self._conversations = db.conversations
+        self._conversation_store = conversation_store
+        self._read_states = read_states
+        self._batch_size = batch_size
+        self._archive_task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.messages_archived = 0
+        self.conversations_expired = 0
+
+    async def _copy_to_archive(self, messages: list):
+        """Insert into the archive; copies left by an interrupted or concurrent run are skipped"""
+        try:
+            await self._archive.insert_many(messages, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+
+    async def _unread_parties(self, messages: list) -> Dict[str, List[str]]:
+        """Parties each message is still unread for, by message id (only messages unread by someone)"""
+        by_conversation: Dict[str, list] = {}
+        for message in messages:
+            inspection_id = message.get("inspection_id")
+            key = conversation_id(inspection_id, None if inspection_id else owner_chat_customer_id(message))
+            by_conversation.setdefault(key, []).append(message)
+        conversations = await self._conversations.find(
+            {"_id": {"$in": list(by_conversation)}},
+            {"_id": 1, "inspection_id": 1, "customer_id": 1, "inspector_id": 1, "agent_id": 1, "agent_email": 1}
+        ).to_list(None)
+        states = await self._read_states.for_conversations(list(by_conversation) + [OWNERS_CHAT_VIEW])
+
+        unread: Dict[str, List[str]] = {}
+        for conversation in conversations:
+            key = conversation["_id"]
+            watermarks = party_watermarks(
+                states.get(key, []),
+                states.get(key if conversation.get("inspection_id") else OWNERS_CHAT_VIEW, []),
+                {"customer": conversation.get("customer_id"), "inspector": conversation.get("inspector_id"), "agent": conversation.get("agent_id")}
+            )
+            for message in by_conversation[key]:
+                parties = [
+                    party for party in unread_parties(
+                        message, conversation.get("customer_id"), conversation.get("inspector_id"), bool(conversation.get("agent_email"))
+                    )
+                    if is_unread_for(message, party, watermarks)
+                ]
+                if parties:
+                    unread[message["id"]] = parties
+        return unread
+
+    async def _delete_batch(self, messages: list) -> int:
+        """
+        Delete archived messages from the hot collection and discount the unread ones
+        Unread messages are deleted one by one so a message removed by a concurrent run
+        is not discounted twice
+        """
+        unread = await self._unread_parties(messages)
+        read_ids = [message["_id"] for message in messages if message.get("id") not in unread]
+        deleted = (await self._messages.delete_many({"_id": {"$in": read_ids}})).deleted_count if read_ids else 0
+
+        counts: Dict[str, Dict[str, int]] = {}
+        for message in messages:
+            parties = unread.get(message.get("id"))
+            if not parties or not (await self._messages.delete_one({"_id": message["_id"]})).deleted_count:
+                continue
+            deleted += 1
+            inspection_id = message.get("inspection_id")
+            key = conversation_id(inspection_id, None if inspection_id else owner_chat_customer_id(message))
+            for party in parties:
+                counts.setdefault(key, {})[party] = counts.get(key, {}).get(party, 0) + 1
+        await self._conversation_store.discount_unread(counts)
+        return deleted
+
+    async def archive_expired(self) -> int:
+        """Move every message expired by now into the archive; returns how many were moved"""
+        now = datetime.utcnow()
+        moved = 0
+        while True:
+            messages = await self._messages.find(
+                {"expires_at": {"$lte": now}}
+            ).sort("expires_at", 1).limit(self._batch_size).to_list(self._batch_size)
+            if not messages:
+                break
+            archived_at = datetime.utcnow()
+            await self._copy_to_archive([{**message, "archived_at": archived_at} for message in messages])
+            moved += await self._delete_batch(messages)
+            if len(messages) < self._batch_size:
+                break
+
+        expired = await self._conversations.find({"expires_at": {"$lte": now}}, {"_id": 1}).to_list(None)
+        keys = [conversation["_id"] for conversation in expired]
+        for key in keys:
+            await self._conversation_store.delete(key)
+        if keys:
+            await self._read_states.delete_for_conversations(keys)
+
+        self.runs += 1
+        self.messages_archived += moved
+        self.conversations_expired += len(keys)
+        if moved or keys:
+            logger.info(f"Archived {moved} expired messages, removed {len(keys)} expired conversations")
+        return moved
+
+    async def _archive_periodically(self, interval: int):
+        while True:
+            try:
+                await self.archive_expired()
+            except Exception as e:
+                logger.error(f"Message archival failed: {e}")
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    def start_periodic_archive(self, interval: int = MESSAGE_ARCHIVE_INTERVAL_SECONDS):
+        """Archive now, then every `interval` seconds (once only if 0)"""
+        if self._archive_task is None:
+            self._archive_task = asyncio.create_task(self._archive_periodically(interval))
+
+    async def stop_periodic_archive(self):
+        if self._archive_task is not None:
+            self._archive_task.cancel()
+            try:
+                await self._archive_task
+            except asyncio.CancelledError:
+                pass
+            self._archive_task = None
+
+    def stats(self) -> dict:
+        """Archival counters for monitoring"""
+        return {
+            "runs": self.runs,
+            "messages_archived": self.messages_archived,
+            "conversations_expired": self.conversations_expired
+        }
@@ -1,39 +1,120 @@
 """
-Migration script to add customer_phone to existing inspections
+Migration script to backfill customer contact fields on existing inspections
+- Copies customer_phone from the customer's user account when missing
+- Writes customer_email_normalized / customer_phone_e164 used by the linking indexes
+
+Resumable: progress is checkpointed in app_state after every batch, so re-running
+continues where the last run stopped. Pass --restart to start from the beginning.
 """
+import argparse
 import asyncio
+import os
+from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from contact_utils import customer_contact_fields
+
+load_dotenv()
+
+CHECKPOINT_ID = "migration_customer_phone"
+BATCH_SIZE = 500
+
+
+async def migrate_customer_phone(restart: bool = False, batch_size: int = BATCH_SIZE):
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "test_database")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
 
-async def migrate_customer_phone():
-    client = AsyncIOMotorClient("mongodb://localhost:27017")
-    db = client.beneficial_inspections
-    
-    # Get all inspections
-    inspections = await db.inspections.find({}).to_list(1000)
-    
-    print(f"\n✅ Found {len(inspections)} inspections")
-    
+    if restart:
+        await db.app_state.delete_one({"_id": CHECKPOINT_ID})
+
+    checkpoint = await db.app_state.find_one({"_id": CHECKPOINT_ID})
+    last_id = checkpoint.get("last_id") if checkpoint else None
+    if last_id is not None:
+        print(f"\n↪️  Resuming after inspection _id {last_id}")
+
+    processed = 0
     updated_count = 0
-    for inspection in inspections:
-        # If customer_phone is missing or None, try to get it from the user
-        if not inspection.get("customer_phone"):
-            customer_id = inspection.get("customer_id")
-            
-            # Skip manual entries
-            if customer_id == "manual-entry":
-                continue
-            
-            # Get customer user account
-            customer = await db.users.find_one({"id": customer_id})
-            if customer and customer.get("phone"):
-                # Update inspection with customer phone
-                await db.inspections.update_one(
-                    {"id": inspection["id"]},
-                    {"$set": {"customer_phone": customer["phone"]}}
-                )
-                print(f"  Updated inspection {inspection['id'][:8]}... with phone: {customer['phone']}")
-                updated_count += 1
-    
-    print(f"\n✅ Updated {updated_count} inspections with customer phone numbers")
-
-asyncio.run(migrate_customer_phone())
+    phones_copied = 0
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        inspections = await db.inspections.find(
+            query,
+            {"_id": 1, "id": 1, "customer_id": 1, "customer_email": 1, "customer_phone": 1,
+             "customer_email_normalized": 1, "customer_phone_e164": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(batch_size)
+
+        if not inspections:
+            break
+
+        # Look up phones for every customer in the batch with one query
+        customer_ids = {
+            insp["customer_id"] for insp in inspections
+            if not insp.get("customer_phone") and insp.get("customer_id") not in (None, "manual-entry", "deleted_user")
+        }
+        phones_by_customer = {}
+        if customer_ids:
+            customers = await db.users.find(
+                {"id": {"$in": list(customer_ids)}, "phone": {"$nin": [None, ""]}},
+                {"_id": 0, "id": 1, "phone": 1}
+            ).to_list(len(customer_ids))
+            phones_by_customer = {c["id"]: c["phone"] for c in customers}
+
+        operations = []
+        for inspection in inspections:
+            update_fields = {}
+
+            phone = inspection.get("customer_phone")
+            if not phone and inspection.get("customer_id") in phones_by_customer:
+                phone = phones_by_customer[inspection["customer_id"]]
+                update_fields["customer_phone"] = phone
+                phones_copied += 1
+
+            for field, value in customer_contact_fields(inspection.get("customer_email"), phone).items():
+                if inspection.get(field) != value:
+                    update_fields[field] = value
+
+            if update_fields:
+                operations.append(UpdateOne({"_id": inspection["_id"]}, {"$set": update_fields}))
+
+        if operations:
+            result = await db.inspections.bulk_write(operations, ordered=False)
+            updated_count += result.modified_count
+
+        processed += len(inspections)
+        last_id = inspections[-1]["_id"]
+        await db.app_state.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        print(f"  Processed {processed} inspections ({updated_count} updated)")
+
+    # Previously-unlinkable inspections are now indexed - let customers re-run linking on login
+    if updated_count:
+        await db.app_state.update_one(
+            {"_id": "inspection_linking"},
+            {"$max": {"last_unlinked_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    await db.app_state.update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {"completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+    print(f"\n✅ Backfill complete: {processed} inspections scanned, {updated_count} updated, {phones_copied} phones copied from user accounts")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill normalized customer contact fields on inspections")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start over")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(migrate_customer_phone(restart=args.restart, batch_size=args.batch_size))
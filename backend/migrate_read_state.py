@@ -0,0 +1,123 @@
+"""
+Migration script to convert per-message is_read flags into read_state watermarks
+Each read message advances the watermark of whoever read it, the same reader
+read_state.py derives receipts from:
+- messages to the owners -> every owner (inspection chat, or the shared owner chat view)
+- other messages -> their recipient
+
+A watermark covers everything up to the newest message its reader had read, so
+an older message that was somehow still unread now counts as read.
+
+Resumable: progress is checkpointed in app_state after every batch, so re-running
+continues where the last run stopped. Pass --restart to start from the beginning.
+Watermarks only move forward ($max), so re-processing a batch is harmless.
+Run rebuild_conversations.py afterwards to recount unread totals from the watermarks.
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from models import UserRole
+from read_state import reader_conversation, read_state_id, read_state_update
+
+load_dotenv()
+
+CHECKPOINT_ID = "migration_read_state"
+BATCH_SIZE = 1000
+
+
+async def migrate_read_state(restart: bool = False, batch_size: int = BATCH_SIZE):
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "test_database")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    if restart:
+        await db.app_state.delete_one({"_id": CHECKPOINT_ID})
+
+    checkpoint = await db.app_state.find_one({"_id": CHECKPOINT_ID})
+    last_id = checkpoint.get("last_id") if checkpoint else None
+    if last_id is not None:
+        print(f"\n↪️  Resuming after message _id {last_id}")
+
+    owners = await db.users.find({"role": UserRole.owner.value}, {"_id": 0, "id": 1}).to_list(None)
+    owner_ids = [owner["id"] for owner in owners]
+
+    processed = 0
+    watermarks_written = 0
+
+    while True:
+        query = {"is_read": True}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        messages = await db.messages.find(
+            query,
+            {"_id": 1, "inspection_id": 1, "sender_id": 1, "recipient_id": 1, "recipient_role": 1, "created_at": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(batch_size)
+
+        if not messages:
+            break
+
+        # Recipient roles for every reader in the batch with one query
+        recipient_ids = {m["recipient_id"] for m in messages if m.get("recipient_id")}
+        recipients = await db.users.find(
+            {"id": {"$in": list(recipient_ids)}}, {"_id": 0, "id": 1, "role": 1}
+        ).to_list(len(recipient_ids))
+        roles = {recipient["id"]: recipient["role"] for recipient in recipients}
+
+        # Newest read message per (reader, conversation) in this batch
+        latest = {}
+        for message in messages:
+            key = reader_conversation(message)
+            if message.get("recipient_role") == UserRole.owner.value:
+                readers = [(owner_id, UserRole.owner.value) for owner_id in owner_ids]
+            elif message.get("recipient_id") in roles:
+                readers = [(message["recipient_id"], roles[message["recipient_id"]])]
+            else:
+                continue  # Recipient account removed
+            for reader in readers:
+                if latest.get((reader, key)) is None or latest[(reader, key)] < message["created_at"]:
+                    latest[(reader, key)] = message["created_at"]
+
+        operations = [
+            UpdateOne(
+                {"_id": read_state_id(user_id, key)},
+                read_state_update(user_id, role, key, read_at),
+                upsert=True
+            )
+            for ((user_id, role), key), read_at in latest.items()
+        ]
+        if operations:
+            result = await db.read_state.bulk_write(operations, ordered=False)
+            watermarks_written += result.upserted_count + result.modified_count
+
+        processed += len(messages)
+        last_id = messages[-1]["_id"]
+        await db.app_state.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        print(f"  Processed {processed} read messages ({watermarks_written} watermarks written)")
+
+    await db.app_state.update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {"completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+    print(f"\n✅ Migration complete: {processed} read messages converted, {watermarks_written} watermarks written")
+    print("ℹ️  Run rebuild_conversations.py to recount unread totals from the watermarks")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert message is_read flags into read_state watermarks")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start over")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(migrate_read_state(restart=args.restart, batch_size=args.batch_size))
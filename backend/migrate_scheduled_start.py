@@ -0,0 +1,135 @@
+"""
+Migrate inspections to the canonical scheduled_start / scheduled_end fields
+Parses the existing scheduled_date + scheduled_time strings with
+timezone_utils.scheduled_window, then reports any inspector that is already
+double-booked - those must be resolved before the inspector_slot_unique index
+can be built. The index registry is applied at the end.
+
+Resumable: progress is checkpointed in app_state after every batch, so re-running
+continues where the last run stopped. Pass --restart to start from the beginning.
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from timezone_utils import scheduled_window
+from db_indexes import apply_indexes
+
+load_dotenv()
+
+CHECKPOINT_ID = "migration_scheduled_start"
+BATCH_SIZE = 1000
+
+
+async def report_double_bookings(db) -> int:
+    """Print every (inspector_id, scheduled_start) held by more than one scheduled inspection"""
+    duplicates = await db.inspections.aggregate([
+        {"$match": {
+            "status": "scheduled",
+            "inspector_id": {"$type": "string"},
+            "scheduled_start": {"$type": "date"}
+        }},
+        {"$group": {
+            "_id": {"inspector_id": "$inspector_id", "scheduled_start": "$scheduled_start"},
+            "inspections": {"$push": "$id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]).to_list(None)
+
+    for duplicate in duplicates:
+        slot = duplicate["_id"]
+        print(f"  ⚠️  Inspector {slot['inspector_id']} at {slot['scheduled_start']} UTC: {', '.join(duplicate['inspections'])}")
+    return len(duplicates)
+
+
+async def migrate_scheduled_start(restart: bool = False, batch_size: int = BATCH_SIZE):
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "test_database")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    if restart:
+        await db.app_state.delete_one({"_id": CHECKPOINT_ID})
+
+    checkpoint = await db.app_state.find_one({"_id": CHECKPOINT_ID})
+    last_id = checkpoint.get("last_id") if checkpoint else None
+    if last_id is not None:
+        print(f"\n↪️  Resuming after inspection _id {last_id}")
+
+    processed = 0
+    updated_count = 0
+    unparseable = []
+
+    while True:
+        query = {"scheduled_date": {"$nin": [None, ""]}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        inspections = await db.inspections.find(
+            query,
+            {"_id": 1, "id": 1, "scheduled_date": 1, "scheduled_time": 1, "scheduled_start": 1, "scheduled_end": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(batch_size)
+
+        if not inspections:
+            break
+
+        operations = []
+        for inspection in inspections:
+            scheduled_start, scheduled_end = scheduled_window(
+                inspection.get("scheduled_date"), inspection.get("scheduled_time")
+            )
+            if scheduled_start is None:
+                unparseable.append(f"{inspection.get('id')} ({inspection.get('scheduled_date')} {inspection.get('scheduled_time')})")
+                continue
+            operations.append(UpdateOne(
+                {"_id": inspection["_id"]},
+                {"$set": {"scheduled_start": scheduled_start, "scheduled_end": scheduled_end}}
+            ))
+
+        if operations:
+            result = await db.inspections.bulk_write(operations, ordered=False)
+            updated_count += result.modified_count
+
+        processed += len(inspections)
+        last_id = inspections[-1]["_id"]
+        await db.app_state.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        print(f"  Processed {processed} inspections ({updated_count} updated)")
+
+    await db.app_state.update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {"completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+    print(f"\n✅ Migration complete: {processed} scheduled inspections scanned, {updated_count} updated")
+    if unparseable:
+        print(f"⚠️  {len(unparseable)} inspections have a date/time that could not be parsed (no double-booking guard):")
+        for entry in unparseable:
+            print(f"  - {entry}")
+
+    print("\n🔍 Checking for existing double bookings...")
+    duplicate_count = await report_double_bookings(db)
+    if duplicate_count:
+        print(f"❌ {duplicate_count} double-booked slots - reschedule them, then re-run to build the unique index")
+    else:
+        print("✅ No double bookings")
+        result = await apply_indexes(db, collections=["inspections"])
+        print(f"🔧 Inspection indexes: {len(result['created'])} ensured, {len(result['failed'])} failed")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add scheduled_start/scheduled_end to existing inspections")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start over")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(migrate_scheduled_start(restart=args.restart, batch_size=args.batch_size))
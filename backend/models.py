@@ -19,6 +19,11 @@ class QuoteStatus(str, Enum):
     rejected = "rejected"
 
 
+class ListView(str, Enum):
+    summary = "summary"  # List-screen fields only (see *Summary models)
+    full = "full"
+
+
 class InspectionStatus(str, Enum):
     pending_scheduling = "pending_scheduling"
     awaiting_customer_selection = "awaiting_customer_selection"
@@ -57,6 +62,12 @@ class UserProfileUpdate(BaseModel):
     phone: Optional[str] = None
 
 
+class UserBatchRequest(BaseModel):
+    ids: List[str] = []
+    emails: List[str] = []
+    size: Optional[str] = None  # Profile picture size: small, medium or large
+
+
 class UserInDB(UserBase):
     id: str
     hashed_password: str
@@ -72,12 +83,7 @@ class UserInDB(UserBase):
     marketing_consent: bool = False
     data_processing_consent: bool = False  # GDPR compliance
     ip_address_at_registration: Optional[str] = None  # For audit trail
-    # Password Reset OTP fields
-    otp_code: Optional[str] = None  # Hashed OTP code
-    otp_expires_at: Optional[datetime] = None  # OTP expiration time (15 minutes)
-    otp_created_at: Optional[datetime] = None  # When OTP was created
-    otp_attempts: int = 0  # Rate limiting: track attempts
-    otp_last_attempt_at: Optional[datetime] = None  # Track last attempt for rate limiting
+    # Password reset OTPs live in the password_resets collection (see otp_service.py)
 
 
 class UserResponse(UserBase):
@@ -148,6 +154,24 @@ class QuoteResponse(QuoteInDB):
     pass
 
 
+class QuoteSummary(BaseModel):
+    """Quote fields shown on list screens (GET /quotes?view=summary)"""
+    id: str
+    customer_id: str
+    customer_email: str
+    customer_name: str
+    property_address: str
+    property_city: Optional[str] = None
+    property_type: str
+    status: QuoteStatus = QuoteStatus.pending
+    quote_amount: Optional[float] = None
+    is_agent_quote: bool = False
+    agent_name: Optional[str] = None
+    agent_email: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 # Inspection Models
 class InspectionBase(BaseModel):
     quote_id: str
@@ -187,6 +211,9 @@ class InspectionInDB(InspectionBase):
     customer_email: str
     customer_name: str
     customer_phone: Optional[str] = None
+    # Normalized customer contact - indexed for linking inspections to customer accounts
+    customer_email_normalized: Optional[str] = None
+    customer_phone_e164: Optional[str] = None
     property_address: str
     square_feet: Optional[int] = None
     year_built: Optional[int] = None
@@ -197,6 +224,9 @@ class InspectionInDB(InspectionBase):
     status: InspectionStatus = InspectionStatus.pending_scheduling
     scheduled_date: Optional[str] = None
     scheduled_time: Optional[str] = None
+    # Canonical slot derived from scheduled_date/time (timezone_utils.scheduled_window)
+    scheduled_start: Optional[datetime] = None
+    scheduled_end: Optional[datetime] = None
     # Scheduling request fields
     option_period_end_date: Optional[str] = None
     option_period_unsure: bool = False
@@ -251,6 +281,47 @@ class InspectionResponse(InspectionInDB):
     pass
 
 
+class InspectionSummary(BaseModel):
+    """
+    Inspection fields shown on list screens (view=summary)
+    Leaves out the signature image, report file list and payment details
+    """
+    id: str
+    quote_id: Optional[str] = None
+    customer_id: Optional[str] = None
+    customer_email: str
+    customer_name: str
+    customer_phone: Optional[str] = None
+    property_address: str
+    property_type: Optional[str] = None
+    status: InspectionStatus = InspectionStatus.pending_scheduling
+    scheduled_date: Optional[str] = None
+    scheduled_time: Optional[str] = None
+    scheduled_start: Optional[datetime] = None
+    scheduled_end: Optional[datetime] = None
+    preferred_date: Optional[str] = None
+    preferred_time: Optional[str] = None
+    option_period_end_date: Optional[str] = None
+    preferred_days_of_week: list[str] = []
+    offered_time_slots: Optional[list[dict]] = None
+    inspector_id: Optional[str] = None
+    inspector_name: Optional[str] = None
+    agent_name: Optional[str] = None
+    agent_email: Optional[str] = None
+    agreement_signed: bool = False
+    fee_amount: Optional[float] = None
+    finalized: bool = False
+    payment_completed: bool = False
+    report_uploaded_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+def list_projection(model) -> dict:
+    """Mongo projection returning only the fields declared on a response model"""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+
 # Admin Update Models
 class QuotePriceUpdate(BaseModel):
     quote_amount: float
@@ -261,6 +332,47 @@ class InspectionDateTimeUpdate(BaseModel):
     scheduled_time: str
 
 
+# Bulk Owner Operation Models
+BULK_OPERATION_MAX_ITEMS = 100
+
+
+class BulkOfferTimesItem(BaseModel):
+    inspection_id: str
+    offered_time_slots: List[dict]  # Same shape as the single offer-times endpoint
+    inspector_name: Optional[str] = None
+    inspector_license: Optional[str] = None
+    inspector_phone: Optional[str] = None
+    inspection_fee: Optional[float] = None  # For direct schedule inspections
+
+
+class BulkOfferTimesRequest(BaseModel):
+    items: List[BulkOfferTimesItem] = Field(..., min_length=1, max_length=BULK_OPERATION_MAX_ITEMS)
+
+
+class BulkRescheduleItem(InspectionDateTimeUpdate):
+    inspection_id: str
+
+
+class BulkRescheduleRequest(BaseModel):
+    items: List[BulkRescheduleItem] = Field(..., min_length=1, max_length=BULK_OPERATION_MAX_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    inspection_id: str
+    success: bool
+    status_code: int
+    detail: Optional[str] = None
+    status: Optional[str] = None
+    scheduled_date: Optional[str] = None
+    scheduled_time: Optional[str] = None
+
+
+class BulkOperationResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 # Manual Inspection Entry Model
 class ManualInspectionCreate(BaseModel):
     client_name: str
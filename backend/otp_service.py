@@ -0,0 +1,42 @@
+"""
+Password reset OTP helpers
+OTPs are stored in the password_resets collection as keyed HMAC-SHA256 digests.
+A 6-digit code has too little entropy for slow hashing to help; the attempt
+counter is what stops guessing, so verification can be a cheap HMAC compare.
+"""
+import os
+import hmac
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from auth import SECRET_KEY
+
+OTP_HMAC_SECRET = os.getenv("OTP_HMAC_SECRET", SECRET_KEY).encode()
+OTP_LENGTH = 6
+OTP_TTL = timedelta(minutes=15)
+OTP_MAX_VERIFY_ATTEMPTS = 5  # Guesses allowed per issued code
+OTP_MAX_REQUESTS_PER_WINDOW = 3  # Codes that can be requested per window
+OTP_REQUEST_WINDOW = timedelta(hours=1)
+
+
+def generate_otp() -> str:
+    """Generate a random numeric OTP"""
+    return ''.join(str(secrets.randbelow(10)) for _ in range(OTP_LENGTH))
+
+
+def otp_digest(email: str, otp_code: str) -> str:
+    """Keyed digest of an OTP, bound to the email it was issued for"""
+    message = f"{email}:{otp_code.strip()}".encode()
+    return hmac.new(OTP_HMAC_SECRET, message, hashlib.sha256).hexdigest()
+
+
+def otp_matches(email: str, otp_code: str, stored_digest: str) -> bool:
+    """Constant-time comparison of a submitted OTP against the stored digest"""
+    if not stored_digest:
+        return False
+    return hmac.compare_digest(otp_digest(email, otp_code), stored_digest)
+
+
+def purge_time(window_started_at: datetime, expires_at: datetime) -> datetime:
+    """When the reset record can be dropped - after both the code and the rate-limit window end"""
+    return max(window_started_at + OTP_REQUEST_WINDOW, expires_at)
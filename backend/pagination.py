@@ -0,0 +1,92 @@
+"""
+Keyset pagination - opaque cursors over a (timestamp, id) sort key
+A page is fetched with a range filter on the sort key instead of skip(), so
+reading page N costs the same as reading page 1 however long the list is. The
+cursor is the sort key of the last document returned, base64-encoded so clients
+treat it as opaque.
+
+find_page() serves chat histories: newest page first, each page returned oldest
+first, paging back with `before` and forward with `after`.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+
+ASC = 1
+DESC = -1
+
+
+def encode_cursor(timestamp: datetime, key: str) -> str:
+    raw = f"{timestamp.isoformat()}|{key}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """(timestamp, id) from a cursor; 400 if it was not produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, key = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), key
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(time_field: str, id_field: str, cursor: Optional[str], direction: int) -> dict:
+    """
+    Filter for the documents after `cursor` in a sort on (time_field, id_field)
+    direction DESC pages towards older documents, ASC towards newer ones
+    """
+    if not cursor:
+        return {}
+    timestamp, key = decode_cursor(cursor)
+    operator = "$lt" if direction == DESC else "$gt"
+    return {"$or": [
+        {time_field: {operator: timestamp}},
+        {time_field: timestamp, id_field: {operator: key}}
+    ]}
+
+
+def keyset_sort(time_field: str, id_field: str, direction: int) -> List[Tuple[str, int]]:
+    return [(time_field, direction), (id_field, direction)]
+
+
+def split_page(documents: List[dict], limit: int, time_field: str, id_field: str) -> Tuple[List[dict], Optional[str]]:
+    """
+    Page and next-page cursor from a query run with limit + 1
+    The extra document only tells whether another page exists; the cursor is None on the last page
+    """
+    page = documents[:limit]
+    if len(documents) <= limit:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(last[time_field], last[id_field])
+
+
+async def find_page(
+    collection,
+    query: dict,
+    time_field: str,
+    id_field: str,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    A page of `query` in (time_field, id_field) order, oldest first, and the next-page cursor
+    Without a cursor this is the newest page. `before` pages back towards older documents
+    (the next cursor continues further back), `after` forward towards newer ones.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+    direction = ASC if after else DESC
+    page_filter = keyset_filter(time_field, id_field, after or before, direction)
+    if page_filter:
+        query = {"$and": [query, page_filter]}
+    documents = await collection.find(query).sort(
+        keyset_sort(time_field, id_field, direction)
+    ).limit(limit + 1).to_list(limit + 1)
+    page, next_cursor = split_page(documents, limit, time_field, id_field)
+    if direction == DESC:
+        page.reverse()
+    return page, next_cursor
@@ -0,0 +1,123 @@
+"""
+Participant resolver - who takes part in a chat, cached for send_message
+Sending a message needs the inspection (permissions, expiry, display fields), the
+inspector's user account (recipient), the owner and the recipient's push token.
+Those are looked up once and kept in small TTL caches, so a warm send is one
+insert plus the conversation upsert and the fan-out.
+
+Entries are invalidated on the writes that change them: inspection changes go
+through ConversationStore.sync_inspection / delete_for_inspection (reassignment,
+rescheduling, finalize, delete), user changes through the same call sites as the
+principal cache. Other workers see a change when their entry expires.
+"""
+import os
+import logging
+from typing import Optional
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PARTICIPANT_CACHE_TTL_SECONDS = int(os.getenv("PARTICIPANT_CACHE_TTL_SECONDS", "60"))
+PARTICIPANT_CACHE_MAX_SIZE = int(os.getenv("PARTICIPANT_CACHE_MAX_SIZE", "5000"))
+
+# What send_message and the conversation store read from an inspection
+CHAT_INSPECTION_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "status": 1,
+    "customer_id": 1,
+    "customer_name": 1,
+    "customer_phone": 1,
+    "property_address": 1,
+    "scheduled_date": 1,
+    "scheduled_time": 1,
+    "inspector_id": 1,
+    "inspector_name": 1,
+    "inspector_email": 1,
+    "agent_email": 1
+}
+
+USER_PROJECTION = {"_id": 0, "id": 1, "name": 1, "role": 1, "phone": 1, "push_token": 1, "expo_push_token": 1}
+
+
+def _participant(user: dict) -> dict:
+    return {
+        "id": user["id"],
+        "name": user.get("name"),
+        "role": user.get("role"),
+        "phone": user.get("phone"),
+        # Older accounts registered under expo_push_token
+        "push_token": user.get("push_token") or user.get("expo_push_token")
+    }
+
+
+class ParticipantResolver:
+    """TTL caches of chat inspections (with their inspector) and chat users"""
+
+    def __init__(self, db, maxsize: int = PARTICIPANT_CACHE_MAX_SIZE, ttl: int = PARTICIPANT_CACHE_TTL_SECONDS):
+        self._db = db
+        self._inspections = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._users = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def inspection(self, inspection_id: str) -> Optional[dict]:
+        """
+        The inspection's chat fields plus "inspector": the inspector's user account
+        (looked up by inspector_email), or None if the inspection does not exist
+        """
+        entry = self._inspections.get(inspection_id)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        inspection = await self._db.inspections.find_one({"id": inspection_id}, CHAT_INSPECTION_PROJECTION)
+        if inspection is None:
+            return None
+        inspector = None
+        if inspection.get("inspector_email"):
+            inspector = await self._db.users.find_one({"email": inspection["inspector_email"]}, USER_PROJECTION)
+        entry = {**inspection, "inspector": _participant(inspector) if inspector else None}
+        self._inspections[inspection_id] = entry
+        return entry
+
+    async def user(self, user_id: str) -> Optional[dict]:
+        """A user's id, name, role, phone and push token"""
+        participant = self._users.get(user_id)
+        if participant is not None:
+            self.hits += 1
+            return participant
+        self.misses += 1
+        user = await self._db.users.find_one({"id": user_id}, USER_PROJECTION)
+        if user is None:
+            return None
+        participant = _participant(user)
+        self._users[user_id] = participant
+        return participant
+
+    def invalidate_inspection(self, inspection_id: str):
+        """Drop an inspection after it is reassigned, rescheduled, closed or deleted"""
+        if self._inspections.pop(inspection_id, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id: str):
+        """Drop a user after a write to their user document (and any inspection they inspect)"""
+        if self._users.pop(user_id, None) is not None:
+            self.invalidations += 1
+        stale = [key for key, entry in self._inspections.items() if (entry.get("inspector") or {}).get("id") == user_id]
+        for key in stale:
+            self.invalidate_inspection(key)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "inspections": len(self._inspections),
+            "users": len(self._users),
+            "ttl_seconds": self._inspections.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,138 @@
+"""
+Authenticated-principal cache
+Keeps a small, TTL-bounded view of each authenticated user so that
+get_current_user_from_token does not hit MongoDB on every request
+"""
+import os
+import logging
+from datetime import datetime
+from typing import Optional
+from cachetools import TTLCache
+from models import UserRole
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+# Only the fields route handlers actually read - OTP, consent timestamps and
+# Google Calendar credentials stay out of the per-request path
+PRINCIPAL_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "email": 1,
+    "name": 1,
+    "role": 1,
+    "phone": 1,
+    "profile_picture": 1,
+    "license_number": 1,
+    "push_token": 1,
+    "created_at": 1,
+    "terms_accepted": 1,
+    "privacy_policy_accepted": 1
+}
+
+
+class Principal:
+    """Lightweight authenticated user (the subset of UserInDB used by route handlers)"""
+    __slots__ = (
+        "id", "email", "name", "role", "phone", "profile_picture",
+        "license_number", "push_token", "created_at",
+        "terms_accepted", "privacy_policy_accepted"
+    )
+
+    def __init__(
+        self,
+        id: str,
+        email: str,
+        name: str,
+        role: UserRole,
+        phone: Optional[str] = None,
+        profile_picture: Optional[str] = None,
+        license_number: Optional[str] = None,
+        push_token: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        terms_accepted: bool = False,
+        privacy_policy_accepted: bool = False
+    ):
+        self.id = id
+        self.email = email
+        self.name = name
+        self.role = role
+        self.phone = phone
+        self.profile_picture = profile_picture
+        self.license_number = license_number
+        self.push_token = push_token
+        self.created_at = created_at or datetime.utcnow()
+        self.terms_accepted = terms_accepted
+        self.privacy_policy_accepted = privacy_policy_accepted
+
+    @classmethod
+    def from_document(cls, user_doc: dict) -> "Principal":
+        """Build a principal from a users document (projected with PRINCIPAL_PROJECTION)"""
+        return cls(
+            id=user_doc["id"],
+            email=user_doc["email"],
+            name=user_doc["name"],
+            role=UserRole(user_doc.get("role", UserRole.customer.value)),
+            phone=user_doc.get("phone"),
+            profile_picture=user_doc.get("profile_picture"),
+            license_number=user_doc.get("license_number"),
+            push_token=user_doc.get("push_token"),
+            created_at=user_doc.get("created_at"),
+            terms_accepted=user_doc.get("terms_accepted", False),
+            privacy_policy_accepted=user_doc.get("privacy_policy_accepted", False)
+        )
+
+    def __repr__(self):
+        return f"Principal(id={self.id!r}, role={self.role.value!r})"
+
+
+class PrincipalCache:
+    """Bounded TTL cache of Principal objects keyed by user id"""
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_MAX_SIZE, ttl: int = PRINCIPAL_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[Principal]:
+        """Return the cached principal for user_id, or None on a miss"""
+        principal = self._cache.get(user_id)
+        if principal is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return principal
+
+    def put(self, principal: Principal):
+        """Cache a principal under its user id"""
+        self._cache[principal.id] = principal
+
+    def invalidate(self, user_id: str):
+        """Drop a user's cached principal after a write to their user document"""
+        if self._cache.pop(user_id, None) is not None:
+            self.invalidations += 1
+            logger.debug(f"Principal cache invalidated for user {user_id}")
+
+    def clear(self):
+        """Drop every cached principal"""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "ttl_seconds": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Process-wide cache used by get_current_user_from_token
+principal_cache = PrincipalCache()
@@ -1,9 +1,11 @@
 import requests
 import logging
+from typing import List
 
 logger = logging.getLogger(__name__)
 
 EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+EXPO_BATCH_SIZE = 100  # Expo accepts at most 100 messages per request
 
 
 def send_push_notification(push_token: str, title: str, body: str, data: dict = None):
@@ -48,6 +50,52 @@ def send_push_notification(push_token: str, title: str, body: str, data: dict =
         return False
 
 
+def send_push_notifications(messages: List[dict]) -> int:
+    """
+    Send many notifications with one Expo request per EXPO_BATCH_SIZE messages
+    Each message is {"push_token", "title", "body", "data"}; returns how many Expo accepted
+    """
+    valid = [m for m in messages if m.get("push_token") and m["push_token"].startswith('ExponentPushToken')]
+    if len(valid) < len(messages):
+        logger.warning(f"Skipped {len(messages) - len(valid)} notifications with invalid push tokens")
+    
+    accepted = 0
+    for start in range(0, len(valid), EXPO_BATCH_SIZE):
+        chunk = [
+            {
+                "to": m["push_token"],
+                "sound": "default",
+                "title": m["title"],
+                "body": m["body"],
+                "data": m.get("data") or {},
+                "priority": "high",
+            }
+            for m in valid[start:start + EXPO_BATCH_SIZE]
+        ]
+        try:
+            response = requests.post(
+                EXPO_PUSH_URL,
+                json=chunk,
+                headers={
+                    "Accept": "application/json",
+                    "Accept-Encoding": "gzip, deflate",
+                    "Content-Type": "application/json",
+                },
+                timeout=10
+            )
+            response.raise_for_status()
+            tickets = response.json().get("data") or []
+            ok = sum(1 for ticket in tickets if ticket.get("status") == "ok")
+            accepted += ok
+            if ok < len(chunk):
+                logger.error(f"{len(chunk) - ok} of {len(chunk)} push notifications failed: {tickets}")
+        except Exception as e:
+            logger.error(f"Failed to send {len(chunk)} push notifications: {str(e)}")
+    
+    logger.info(f"Push notifications sent: {accepted}/{len(valid)}")
+    return accepted
+
+
 def send_inspection_cancelled_notification(push_token: str, property_address: str, is_owner: bool = False):
     """Send cancellation notification"""
     if is_owner:
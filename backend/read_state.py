@@ -0,0 +1,108 @@
+"""
+Read state - one `last_read_at` watermark per (user, conversation)
+Opening a chat is a single upsert of the reader's watermark instead of flipping
+is_read on every unread message. A message counts as read once a reader on its
+receiving side has a watermark at or after its created_at:
+- inspection chats: anyone other than the sender (conversation inspector_{id})
+- general chat to the owners: any owner (owners read every general chat at once,
+  so their watermark is kept on the shared OWNERS_CHAT_VIEW key)
+- general chat from an owner: the customer (conversation owner_{customer_id})
+
+migrate_read_state.py converts the is_read flags of existing messages.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from models import UserRole
+from conversation_store import conversation_id
+
+# Owners' watermark for the combined general chat (every owner_{customer_id} at once)
+OWNERS_CHAT_VIEW = "owner_chat"
+
+
+def _value(value):
+    return getattr(value, "value", value)
+
+
+def read_state_id(user_id: str, conversation_key: str) -> str:
+    return f"{user_id}:{conversation_key}"
+
+
+def reader_conversation(message: dict) -> str:
+    """The read-state key a message's recipients advance when they read it"""
+    if message.get("inspection_id"):
+        return conversation_id(message["inspection_id"], None)
+    if _value(message.get("recipient_role")) == UserRole.owner.value:
+        return OWNERS_CHAT_VIEW
+    return conversation_id(None, message.get("recipient_id"))
+
+
+def read_state_update(user_id: str, user_role: str, conversation_key: str, read_at: datetime) -> dict:
+    """Upsert that only ever moves the watermark forward"""
+    return {
+        "$max": {"last_read_at": read_at},
+        "$set": {"user_id": user_id, "user_role": user_role, "conversation_id": conversation_key}
+    }
+
+
+def is_read_by(message: dict, state: dict) -> bool:
+    """Whether `state` marks `message` as read by the receiving side"""
+    if state["user_id"] == message.get("sender_id") or state.get("last_read_at") is None:
+        return False
+    if state["conversation_id"] == OWNERS_CHAT_VIEW and state.get("user_role") != UserRole.owner.value:
+        return False
+    return state["last_read_at"] >= message["created_at"]
+
+
+def party_watermarks(states: list, owner_states: list, party_users: dict) -> dict:
+    """Last read time per unread party; owners share the newest watermark of any owner"""
+    watermarks = {
+        party: next((s["last_read_at"] for s in states if s["user_id"] == user_id), None)
+        for party, user_id in party_users.items() if user_id
+    }
+    owner_reads = [s["last_read_at"] for s in owner_states if s.get("user_role") == UserRole.owner.value]
+    watermarks["owners"] = max(owner_reads) if owner_reads else None
+    return watermarks
+
+
+def is_unread_for(message: dict, party: str, watermarks: dict) -> bool:
+    """Whether `party` has not read `message` yet (see party_watermarks)"""
+    return watermarks.get(party) is None or message["created_at"] > watermarks[party]
+
+
+class ReadStates:
+    """Per-user conversation watermarks stored in the read_state collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def mark_read(self, principal, conversation_key: str, read_at: Optional[datetime] = None):
+        """Advance `principal`'s watermark in one conversation (one upsert)"""
+        await self._collection.update_one(
+            {"_id": read_state_id(principal.id, conversation_key)},
+            read_state_update(principal.id, principal.role.value, conversation_key, read_at or datetime.utcnow()),
+            upsert=True
+        )
+
+    async def delete_for_user(self, user_id: str):
+        await self._collection.delete_many({"user_id": user_id})
+
+    async def delete_for_conversations(self, conversation_keys: Iterable[str]):
+        await self._collection.delete_many({"conversation_id": {"$in": list(conversation_keys)}})
+
+    async def for_conversations(self, conversation_keys: Iterable[str]) -> Dict[str, List[dict]]:
+        """Every watermark in these conversations, by conversation key"""
+        keys = list(set(conversation_keys))
+        states = await self._collection.find(
+            {"conversation_id": {"$in": keys}}, {"_id": 0, "user_id": 1, "user_role": 1, "conversation_id": 1, "last_read_at": 1}
+        ).to_list(None)
+        by_conversation: Dict[str, List[dict]] = {}
+        for state in states:
+            by_conversation.setdefault(state["conversation_id"], []).append(state)
+        return by_conversation
+
+    async def apply_receipts(self, messages: List[dict]) -> List[dict]:
+        """Set each message's is_read from the watermarks of its receiving side"""
+        states = await self.for_conversations(reader_conversation(message) for message in messages)
+        for message in messages:
+            message["is_read"] = any(is_read_by(message, state) for state in states.get(reader_conversation(message), []))
+        return messages
@@ -0,0 +1,179 @@
+"""
+Rebuild the materialized conversations collection from messages
+Replays every message in created_at order through the same rules send_message
+uses (conversation key, participants, per-party unread counters from the readers'
+read_state watermarks) and
+copies display fields from the inspection and the customer's user document.
+Conversations with no remaining messages are removed, and every user's unread
+total in unread_counters is recounted from the rebuilt conversations.
+
+Safe to re-run at any time; the collection is replaced document by document, so
+the chat list keeps working while the rebuild runs.
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+from dotenv import load_dotenv
+from models import UserRole
+from conversation_store import (
+    INSPECTION_PROJECTION, INSPECTOR_CHAT, OWNER_CHAT,
+    conversation_id, inspection_fields, owner_chat_customer_id, unread_contributions, unread_parties
+)
+from read_state import OWNERS_CHAT_VIEW, ReadStates, is_unread_for, party_watermarks
+from unread_counters import UnreadCounters
+from db_indexes import apply_indexes
+
+load_dotenv()
+
+BATCH_SIZE = 1000
+STAFF_ROLES = (UserRole.owner.value, UserRole.inspector.value)
+
+
+async def load_by_id(collection, ids, projection) -> dict:
+    ids = [i for i in set(ids) if i]
+    documents = await collection.find({"id": {"$in": ids}}, projection).to_list(None)
+    return {document["id"]: document for document in documents}
+
+
+async def rebuild_conversations(batch_size: int = BATCH_SIZE):
+    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME", "test_database")
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    print("\n📨 Reading messages...")
+    messages_by_conversation = {}
+    last_id = None
+    scanned = 0
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await db.messages.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        for message in batch:
+            key = (message.get("inspection_id"), None if message.get("inspection_id") else owner_chat_customer_id(message))
+            messages_by_conversation.setdefault(key, []).append(message)
+        scanned += len(batch)
+        last_id = batch[-1]["_id"]
+        print(f"  Scanned {scanned} messages")
+
+    inspections = await load_by_id(
+        db.inspections, [inspection_id for inspection_id, _ in messages_by_conversation], INSPECTION_PROJECTION
+    )
+    customer_ids = [customer_id for _, customer_id in messages_by_conversation]
+    customer_ids += [inspection.get("customer_id") for inspection in inspections.values()]
+    users = await load_by_id(db.users, customer_ids, {"_id": 0, "id": 1, "name": 1, "phone": 1, "role": 1})
+    agent_emails = list({inspection["agent_email"] for inspection in inspections.values() if inspection.get("agent_email")})
+    agents = await db.users.find(
+        {"email": {"$in": agent_emails}, "role": UserRole.agent.value}, {"_id": 0, "id": 1, "email": 1}
+    ).to_list(None)
+    agent_ids = {agent["email"]: agent["id"] for agent in agents}
+    read_states = await ReadStates(db.read_state).for_conversations(
+        [conversation_id(inspection_id, customer_id) for inspection_id, customer_id in messages_by_conversation]
+        + [OWNERS_CHAT_VIEW]
+    )
+
+    operations = []
+    kept = []
+    totals = {}
+    skipped = 0
+    for (inspection_id, customer_id), messages in messages_by_conversation.items():
+        messages.sort(key=lambda m: m["created_at"])
+        inspection = inspections.get(inspection_id) if inspection_id else None
+        if inspection_id:
+            if not inspection:
+                skipped += 1  # Inspection deleted
+                continue
+            customer_id = inspection.get("customer_id")
+        customer = users.get(customer_id)
+        if not customer or (not inspection_id and customer.get("role") == UserRole.owner.value):
+            skipped += 1  # Account removed, or owner-to-owner chat
+            continue
+
+        inspector_id = (inspection or {}).get("inspector_id")
+        if inspection_id and not inspector_id:
+            inspector_id = next(
+                (m["recipient_id"] for m in messages if m.get("recipient_role") == UserRole.inspector.value and m.get("recipient_id")),
+                None
+            )
+        has_agent = bool((inspection or {}).get("agent_email"))
+        agent_id = agent_ids.get((inspection or {}).get("agent_email"))
+        key = conversation_id(inspection_id, customer_id)
+        watermarks = party_watermarks(
+            read_states.get(key, []),
+            read_states.get(key if inspection_id else OWNERS_CHAT_VIEW, []),
+            {"customer": customer_id, "inspector": inspector_id, "agent": agent_id}
+        )
+
+        unread = {}
+        participants = {customer_id, inspector_id} - {None}
+        owner_visible = not inspection_id
+        staff_name = None
+        for message in messages:
+            participants |= {message.get("sender_id"), message.get("recipient_id")} - {None}
+            if message.get("recipient_role") == UserRole.owner.value:
+                owner_visible = True
+            if message.get("sender_role") in STAFF_ROLES:
+                staff_name = message.get("sender_name")
+            for party in unread_parties(message, customer_id, inspector_id, has_agent):
+                if is_unread_for(message, party, watermarks):
+                    unread[party] = unread.get(party, 0) + 1
+
+        last = messages[-1]
+        document = {
+            "_id": key,
+            "conversation_type": INSPECTOR_CHAT if inspection_id else OWNER_CHAT,
+            "inspection_id": inspection_id,
+            "customer_id": customer_id,
+            "customer_name": customer.get("name"),
+            "customer_phone": customer.get("phone"),
+            "staff_name": staff_name or (inspection or {}).get("inspector_name"),
+            "participant_ids": sorted(participants),
+            "owner_visible": owner_visible,
+            "last_message": last.get("message_text"),
+            "last_message_id": last.get("id"),
+            "last_sender_id": last.get("sender_id"),
+            "last_message_time": last["created_at"],
+            "expires_at": last.get("expires_at"),
+            "unread": unread,
+            "created_at": messages[0]["created_at"],
+            "updated_at": datetime.utcnow()
+        }
+        if inspection:
+            document.update(inspection_fields(inspection))
+            document["inspector_id"] = inspector_id
+            document["agent_id"] = agent_id
+        for key, amount in unread_contributions(document).items():
+            totals[key] = totals.get(key, 0) + amount
+        operations.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+        kept.append(document["_id"])
+
+    written = 0
+    for start in range(0, len(operations), batch_size):
+        result = await db.conversations.bulk_write(operations[start:start + batch_size], ordered=False)
+        written += result.upserted_count + result.modified_count
+
+    removed = await db.conversations.delete_many({"_id": {"$nin": kept}})
+
+    # Pushed totals resume from these on the next change
+    await UnreadCounters(db.unread_counters).replace(totals)
+
+    await apply_indexes(db, collections=["conversations"])
+
+    print(f"\n✅ Rebuilt {len(operations)} conversations from {scanned} messages ({written} written, {removed.deleted_count} stale removed)")
+    print(f"✅ Recounted unread totals for {len(totals)} users")
+    if skipped:
+        print(f"ℹ️  Skipped {skipped} conversations whose inspection or customer no longer exists")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate the conversations collection from messages")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(rebuild_conversations(batch_size=args.batch_size))
@@ -0,0 +1,84 @@
+"""
+Resource versions - weak ETags on polled GET endpoints, derived from the caller's own data
+A conditional GET summarizes the documents its response is built from - the
+caller's own list query - as a count plus the newest updated_at (created_at for
+documents never updated) in one indexed aggregation. That summary, hashed with the
+caller's identity and the request variant, is the weak ETag: it changes only when
+one of the caller's documents is added, removed or updated, so writes to other
+users' documents never invalidate it and a 304 is answered before any document
+is loaded.
+
+The ETag also carries a time bucket, so a write that does not touch updated_at (a
+maintenance script, say) is picked up within ETAG_MAX_AGE_SECONDS.
+"""
+import os
+import time
+import hashlib
+import logging
+from typing import Optional
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+ETAG_MAX_AGE_SECONDS = int(os.getenv("ETAG_MAX_AGE_SECONDS", "3600"))
+
+
+async def list_version(collection, query: dict) -> tuple:
+    """(count, newest updated_at) over the documents matching `query`"""
+    pipeline = [
+        {"$match": query},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "latest": {"$max": {"$ifNull": ["$updated_at", "$created_at"]}}
+        }}
+    ]
+    summary = await collection.aggregate(pipeline).to_list(1)
+    if not summary:
+        return 0, None
+    return summary[0]["count"], summary[0]["latest"]
+
+
+async def list_etag(collection, query: dict, *parts) -> str:
+    """
+    Weak ETag for a response built from the documents matching `query`
+    `parts` identify the caller and the request variant (user id, role, query string)
+    """
+    count, latest = await list_version(collection, query)
+    return weak_etag(count, latest.isoformat() if latest else None, *parts)
+
+
+def weak_etag(*parts) -> str:
+    """Weak ETag over `parts` and the current ETAG_MAX_AGE_SECONDS bucket"""
+    bucket = int(time.time() // ETAG_MAX_AGE_SECONDS) if ETAG_MAX_AGE_SECONDS > 0 else 0
+    material = "|".join([str(p) for p in parts] + [str(bucket)])
+    return 'W/"' + hashlib.sha1(material.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already names `etag` (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    """Empty 304 carrying the current ETag"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def set_etag(response: Optional[Response], etag: str):
+    """Attach the ETag to a full 200 response"""
+    if response is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
@@ -1,7 +1,12 @@
 import boto3
 import logging
 import os
+import threading
+import time
+from typing import Optional
 from botocore.exceptions import ClientError
+from cachetools import LRUCache
+from image_service import profile_picture_key_for_size
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,6 +27,130 @@ s3_client = boto3.client(
     region_name=AWS_REGION
 )
 
+# Presigned URL settings
+PROFILE_PICTURE_URL_EXPIRATION = 604800  # 7 days
+DOWNLOAD_URL_EXPIRATION = 3600  # 1 hour
+PRESIGNED_URL_CACHE_MAX_SIZE = int(os.getenv("PRESIGNED_URL_CACHE_MAX_SIZE", "5000"))
+# Stop handing out a cached URL once this fraction of its lifetime is left,
+# so clients never receive a URL that expires before they use it
+PRESIGNED_URL_SAFETY_FRACTION = 0.25
+
+
+class PresignedUrlCache:
+    """
+    LRU cache of presigned URLs keyed by (s3_key, operation, expiration)
+    Reusing a URL keeps it byte-for-byte stable, so client image/HTTP caches hit
+    """
+
+    def __init__(self, maxsize: int = PRESIGNED_URL_CACHE_MAX_SIZE):
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, s3_key: str, operation: str, expiration: int) -> Optional[str]:
+        """Return a cached URL that is still outside its safety margin, or None"""
+        with self._lock:
+            entry = self._cache.get((s3_key, operation, expiration))
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, s3_key: str, operation: str, expiration: int, url: str):
+        """Cache a freshly generated URL until its safety margin begins"""
+        reuse_until = time.monotonic() + expiration * (1 - PRESIGNED_URL_SAFETY_FRACTION)
+        with self._lock:
+            self._cache[(s3_key, operation, expiration)] = (url, reuse_until)
+
+    def invalidate(self, s3_key: str):
+        """Drop every cached URL for an object that was overwritten or deleted"""
+        with self._lock:
+            stale = [key for key in self._cache.keys() if key[0] == s3_key]
+            for key in stale:
+                del self._cache[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop every cached URL"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+presigned_url_cache = PresignedUrlCache()
+
+
+def get_presigned_url(s3_key: str, expiration: int = DOWNLOAD_URL_EXPIRATION, operation: str = 'get_object') -> str:
+    """
+    Return a pre-signed URL for an S3 object, reusing a cached one when possible
+    
+    Args:
+        s3_key: S3 key (path) of the file
+        expiration: URL expiration time in seconds - also the cache's expiry class
+        operation: S3 client method to sign (default 'get_object')
+    
+    Returns:
+        Pre-signed URL string
+    """
+    url = presigned_url_cache.get(s3_key, operation, expiration)
+    if url is not None:
+        return url
+    
+    url = s3_client.generate_presigned_url(
+        operation,
+        Params={
+            'Bucket': AWS_S3_BUCKET_NAME,
+            'Key': s3_key
+        },
+        ExpiresIn=expiration
+    )
+    presigned_url_cache.put(s3_key, operation, expiration, url)
+    return url
+
+
+def get_profile_picture_url(profile_picture: Optional[str], size_px: Optional[int] = None) -> Optional[str]:
+    """
+    Resolve a stored profile_picture value to a URL the app can load
+    New records store the S3 key; old records store a full URL, returned as-is
+    size_px selects one of the generated sizes (default: the stored, largest size)
+    Returns None if there is no picture or the URL cannot be generated
+    """
+    if not profile_picture:
+        return None
+    if profile_picture.startswith('http'):
+        return profile_picture
+    s3_key = profile_picture_key_for_size(profile_picture, size_px) if size_px else profile_picture
+    try:
+        return get_presigned_url(s3_key, expiration=PROFILE_PICTURE_URL_EXPIRATION)
+    except Exception as e:
+        logger.error(f"Error generating presigned URL for profile picture {profile_picture}: {e}")
+        return None
+
+
+def upload_profile_picture_to_s3(s3_key: str, file_content: bytes, content_type: str):
+    """Upload (or overwrite) a profile picture and drop any cached URLs for it"""
+    s3_client.put_object(
+        Bucket=AWS_S3_BUCKET_NAME,
+        Key=s3_key,
+        Body=file_content,
+        ContentType=content_type
+    )
+    presigned_url_cache.invalidate(s3_key)
+
 
 def upload_agreement_to_s3(inspection_id: str, pdf_bytes: bytes) -> dict:
     """
@@ -48,6 +177,7 @@ def upload_agreement_to_s3(inspection_id: str, pdf_bytes: bytes) -> dict:
             ACL='private'
         )
         
+        presigned_url_cache.invalidate(s3_key)
         logger.info(f"Successfully uploaded agreement to S3: {s3_key}")
         
         # Generate the S3 URL (not directly accessible, will need signed URL)
@@ -67,7 +197,7 @@ def upload_agreement_to_s3(inspection_id: str, pdf_bytes: bytes) -> dict:
         raise
 
 
-def get_agreement_download_url(s3_key: str, expiration: int = 3600) -> str:
+def get_agreement_download_url(s3_key: str, expiration: int = DOWNLOAD_URL_EXPIRATION) -> str:
     """
     Generate a pre-signed URL for downloading an agreement from S3
     
@@ -79,18 +209,7 @@ def get_agreement_download_url(s3_key: str, expiration: int = 3600) -> str:
         Pre-signed URL string that can be used to download the file
     """
     try:
-        # Generate pre-signed URL
-        url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={
-                'Bucket': AWS_S3_BUCKET_NAME,
-                'Key': s3_key
-            },
-            ExpiresIn=expiration
-        )
-        
-        logger.info(f"Generated pre-signed URL for {s3_key}")
-        return url
+        return get_presigned_url(s3_key, expiration=expiration)
         
     except ClientError as e:
         logger.error(f"Failed to generate pre-signed URL: {str(e)}")
@@ -122,6 +241,7 @@ def upload_report_to_s3(inspection_id: str, pdf_bytes: bytes, suffix: str = "")
             ACL='private'
         )
         
+        presigned_url_cache.invalidate(s3_key)
         logger.info(f"Successfully uploaded report to S3: {s3_key}")
         
         s3_url = f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
@@ -140,7 +260,7 @@ def upload_report_to_s3(inspection_id: str, pdf_bytes: bytes, suffix: str = "")
         raise
 
 
-def get_report_download_url(s3_key: str, expiration: int = 3600) -> str:
+def get_report_download_url(s3_key: str, expiration: int = DOWNLOAD_URL_EXPIRATION) -> str:
     """
     Generate a pre-signed URL for downloading a report from S3
     
@@ -152,17 +272,7 @@ def get_report_download_url(s3_key: str, expiration: int = 3600) -> str:
         Pre-signed URL string that can be used to download the file
     """
     try:
-        url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={
-                'Bucket': AWS_S3_BUCKET_NAME,
-                'Key': s3_key
-            },
-            ExpiresIn=expiration
-        )
-        
-        logger.info(f"Generated pre-signed URL for report {s3_key}")
-        return url
+        return get_presigned_url(s3_key, expiration=expiration)
         
     except ClientError as e:
         logger.error(f"Failed to generate pre-signed URL for report: {str(e)}")
@@ -185,6 +295,7 @@ def delete_file_from_s3(s3_key: str) -> bool:
             Key=s3_key
         )
         
+        presigned_url_cache.invalidate(s3_key)
         logger.info(f"Successfully deleted file from S3: {s3_key}")
         return True
         
@@ -0,0 +1,225 @@
+"""
+Search service - prefix and token search over users, inspections and quotes
+Each searchable document carries a `search_keys` array holding every prefix of
+every token in its searchable fields ("main" -> m, ma, mai, main). A multikey
+index on that array turns a prefix query into an index lookup instead of the
+unanchored $regex collection scan. Candidates are ranked in-process, and only up
+to SEARCH_CANDIDATE_LIMIT of them: a broad prefix ("a") matching more documents
+than that is ranked over an arbitrary subset, so the response reports the full
+match count and `truncated` and the caller should ask for a longer query.
+
+search_keys is written when a document is created and refreshed whenever a
+searchable field changes; backfill_search_keys.py fills in existing documents.
+The indexes are declared in db_indexes.py.
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+from pymongo import UpdateOne
+
+MAX_PREFIX_LENGTH = 20  # Longer tokens are stored whole as well
+SEARCH_CANDIDATE_LIMIT = 500  # Upper bound on documents fetched for ranking (and paged through)
+SEARCH_MAX_PAGE_SIZE = 50
+MAX_QUERY_TOKENS = 6
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+_NON_DIGITS = re.compile(r"\D")
+
+
+# Searchable fields per collection with ranking weights (higher = more important)
+USER_SEARCH_FIELDS = {"name": 3.0, "email": 2.0, "phone": 1.0}
+INSPECTION_SEARCH_FIELDS = {"property_address": 3.0, "customer_name": 3.0, "agent_name": 2.0}
+QUOTE_SEARCH_FIELDS = {"property_address": 3.0, "customer_name": 3.0, "agent_name": 2.0}
+
+USER_RESULT_PROJECTION = {"_id": 0, "id": 1, "name": 1, "email": 1, "phone": 1, "role": 1}
+INSPECTION_RESULT_PROJECTION = {
+    "_id": 0, "id": 1, "property_address": 1, "customer_name": 1, "customer_email": 1,
+    "agent_name": 1, "status": 1, "scheduled_date": 1, "scheduled_time": 1, "created_at": 1
+}
+QUOTE_RESULT_PROJECTION = {
+    "_id": 0, "id": 1, "property_address": 1, "customer_name": 1, "customer_email": 1,
+    "agent_name": 1, "status": 1, "quote_amount": 1, "created_at": 1
+}
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens of a field value"""
+    if not value:
+        return []
+    return [token for token in _TOKEN_SPLIT.split(str(value).lower()) if token]
+
+
+def field_tokens(field: str, value: Optional[str]) -> List[str]:
+    """Tokens of a document field - phone numbers also match on their bare digits"""
+    tokens = tokenize(value)
+    if field == "phone" and tokens:
+        digits = _NON_DIGITS.sub("", str(value))
+        if len(digits) == 11 and digits.startswith("1"):
+            digits = digits[1:]
+        if digits and digits not in tokens:
+            tokens.append(digits)
+    return tokens
+
+
+def _prefixes(token: str) -> Iterable[str]:
+    for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+        yield token[:length]
+    if len(token) > MAX_PREFIX_LENGTH:
+        yield token
+
+
+def build_search_keys(document: dict, fields: Dict[str, float]) -> List[str]:
+    """Every prefix of every token in the document's searchable fields"""
+    keys = set()
+    for field in fields:
+        for token in field_tokens(field, document.get(field)):
+            keys.update(_prefixes(token))
+    return sorted(keys)
+
+
+def user_search_keys(document: dict) -> List[str]:
+    return build_search_keys(document, USER_SEARCH_FIELDS)
+
+
+def inspection_search_keys(document: dict) -> List[str]:
+    return build_search_keys(document, INSPECTION_SEARCH_FIELDS)
+
+
+def quote_search_keys(document: dict) -> List[str]:
+    return build_search_keys(document, QUOTE_SEARCH_FIELDS)
+
+
+def query_tokens(query: str) -> List[str]:
+    """Tokens of a search box query, truncated to the indexed prefix length"""
+    tokens = []
+    for token in tokenize(query):
+        token = token[:MAX_PREFIX_LENGTH]
+        if token not in tokens:
+            tokens.append(token)
+    return tokens[:MAX_QUERY_TOKENS]
+
+
+def score_document(document: dict, tokens: List[str], fields: Dict[str, float]) -> float:
+    """
+    Rank a candidate: each query token scores its best match across fields -
+    exact token beats token prefix - times the field weight.
+    Earlier field positions score slightly higher ("Main St" beats "12 Main St" for "main").
+    """
+    score = 0.0
+    for query_token in tokens:
+        best = 0.0
+        for field, weight in fields.items():
+            for position, token in enumerate(field_tokens(field, document.get(field))):
+                if token == query_token:
+                    match = 3.0
+                elif token.startswith(query_token):
+                    match = 2.0
+                else:
+                    continue
+                best = max(best, (match - min(position, 5) * 0.05) * weight)
+        score += best
+    return score
+
+
+async def run_search(
+    collection,
+    query: str,
+    fields: Dict[str, float],
+    projection: dict,
+    filters: Optional[dict] = None,
+    limit: int = 20,
+    offset: int = 0,
+    sort_field: str = "name"
+) -> dict:
+    """
+    Prefix/token search over a collection with a search_keys index
+
+    Every query token must prefix-match some token of the document. Candidates are
+    fetched through the index, ranked with score_document, then paginated.
+    At most SEARCH_CANDIDATE_LIMIT candidates are ranked, in no particular order, so
+    when more documents match the best ones may be missing: `total` still counts
+    every match, `truncated` is set and has_more stops at the end of the ranked set.
+
+    Returns: {"results": [...], "total": int, "limit": int, "offset": int, "has_more": bool, "truncated": bool}
+    """
+    tokens = query_tokens(query)
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    if not tokens:
+        return {"results": [], "total": 0, "limit": limit, "offset": offset, "has_more": False, "truncated": False}
+
+    mongo_query = dict(filters or {})
+    # Longest token first - it is the most selective, so the index scan is smallest
+    ordered_tokens = sorted(tokens, key=len, reverse=True)
+    mongo_query["search_keys"] = ordered_tokens[0] if len(ordered_tokens) == 1 else {"$all": ordered_tokens}
+
+    field_projection = dict(projection)
+    for field in fields:
+        field_projection[field] = 1
+
+    candidates = await collection.find(mongo_query, field_projection).limit(SEARCH_CANDIDATE_LIMIT).to_list(SEARCH_CANDIDATE_LIMIT)
+    total = len(candidates)
+    if total >= SEARCH_CANDIDATE_LIMIT:
+        # Same index, keys only - the true match count for a broad prefix
+        total = await collection.count_documents(mongo_query)
+
+    ranked = sorted(
+        candidates,
+        key=lambda doc: (-score_document(doc, tokens, fields), str(doc.get(sort_field) or "").lower())
+    )
+    page = ranked[offset:offset + limit]
+    results = [{key: doc.get(key) for key in projection if key != "_id"} for doc in page]
+
+    return {
+        "results": results,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "has_more": offset + limit < len(ranked),
+        "truncated": total > len(ranked)
+    }
+
+
+async def search_users(db, query: str, roles: Optional[List[str]] = None, limit: int = 20, offset: int = 0) -> dict:
+    filters = {"role": {"$in": roles}} if roles else None
+    return await run_search(db.users, query, USER_SEARCH_FIELDS, USER_RESULT_PROJECTION, filters, limit, offset, "name")
+
+
+async def search_inspections(db, query: str, limit: int = 20, offset: int = 0) -> dict:
+    return await run_search(
+        db.inspections, query, INSPECTION_SEARCH_FIELDS, INSPECTION_RESULT_PROJECTION, None, limit, offset, "property_address"
+    )
+
+
+async def search_quotes(db, query: str, limit: int = 20, offset: int = 0) -> dict:
+    return await run_search(
+        db.quotes, query, QUOTE_SEARCH_FIELDS, QUOTE_RESULT_PROJECTION, None, limit, offset, "property_address"
+    )
+
+
+_KEY_BUILDERS = {
+    "users": (USER_SEARCH_FIELDS, user_search_keys),
+    "inspections": (INSPECTION_SEARCH_FIELDS, inspection_search_keys),
+    "quotes": (QUOTE_SEARCH_FIELDS, quote_search_keys)
+}
+
+
+async def refresh_search_keys(collection, query: dict) -> int:
+    """
+    Recompute search_keys for the documents matching query (after a searchable field changed)
+
+    Returns: number of documents modified
+    """
+    fields, builder = _KEY_BUILDERS[collection.name]
+    projection = {"_id": 1, "search_keys": 1, **{field: 1 for field in fields}}
+    documents = await collection.find(query, projection).to_list(None)
+
+    operations = []
+    for document in documents:
+        keys = builder(document)
+        if document.get("search_keys") != keys:
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"search_keys": keys}}))
+
+    if not operations:
+        return 0
+    result = await collection.bulk_write(operations, ordered=False)
+    return result.modified_count
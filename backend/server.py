@@ -1,30 +1,61 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Body, File, UploadFile
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Body, File, UploadFile, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Union
 import uuid
 from datetime import datetime, timedelta
 import socketio
 
 from models import (
     UserCreate, UserLogin, UserResponse, TokenResponse, UserInDB, UserRole,
-    UserProfileUpdate, NotificationPreferences,
-    QuoteCreate, QuoteResponse, QuoteInDB, QuoteStatus,
-    InspectionCreate, InspectionResponse, InspectionInDB, InspectionStatus,
+    UserProfileUpdate, UserBatchRequest, NotificationPreferences,
+    QuoteCreate, QuoteResponse, QuoteInDB, QuoteStatus, QuoteSummary,
+    InspectionCreate, InspectionResponse, InspectionInDB, InspectionStatus, InspectionSummary,
+    ListView, list_projection,
     SchedulingRequestCreate, DirectScheduleRequest,
     QuotePriceUpdate, InspectionDateTimeUpdate,
     MessageCreate, MessageResponse, MessageInDB, ConversationSummary,
-    ManualInspectionCreate, ManualInspectionResponse, ManualInspectionInDB
+    ManualInspectionCreate, ManualInspectionResponse, ManualInspectionInDB,
+    BulkOfferTimesRequest, BulkRescheduleRequest, BulkOperationResponse
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token,
-    decode_token, require_role
+    get_password_hash_async, verify_password_async, create_access_token,
+    decode_token, require_role, get_hash_pool_stats, shutdown_hash_pool
 )
+from principal_cache import Principal, principal_cache, PRINCIPAL_PROJECTION
+from staff_directory import StaffDirectory
+from dashboard_stats import DashboardStats
+from inspection_repository import InspectionRepository
+from conversation_store import ConversationStore, conversation_id, conversation_summary
+from unread_counters import UnreadCounters
+from pagination import encode_cursor, find_page
+from read_state import ReadStates, OWNERS_CHAT_VIEW
+from message_archive import MessageArchiver
+from participant_resolver import ParticipantResolver
+from bulk_scheduling import (
+    NotificationBatch, item_result, summarize, batch_timestamp,
+    load_batch, find_slot_conflicts, apply_bulk
+)
+from resource_versions import list_etag, weak_etag, etag_matches, not_modified_response, set_etag
+from db_indexes import apply_indexes
+from search_service import (
+    user_search_keys, inspection_search_keys, quote_search_keys, refresh_search_keys,
+    search_users, search_inspections, search_quotes
+)
+from contact_utils import normalize_email, normalize_phone_e164, customer_contact_fields
+from otp_service import (
+    generate_otp, otp_digest, otp_matches, purge_time,
+    OTP_TTL, OTP_MAX_VERIFY_ATTEMPTS, OTP_MAX_REQUESTS_PER_WINDOW, OTP_REQUEST_WINDOW
+)
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from timezone_utils import scheduled_window, parse_date_central
 
 security = HTTPBearer()
 
@@ -35,64 +66,111 @@ from socket_server import (
     emit_new_inspection, emit_inspection_updated,
     emit_time_slots_offered, emit_time_slot_confirmed,
     emit_new_message, emit_calendar_updated,
-    emit_reschedule_request
+    emit_reschedule_request, emit_dashboard_stats, emit_unread_count
+)
+
+
+# Statuses an owner may (re)schedule or offer times from
+SCHEDULABLE_STATUSES = (
+    InspectionStatus.pending_scheduling,
+    InspectionStatus.awaiting_customer_selection,
+    InspectionStatus.scheduled
 )
 
 
-# Helper function to normalize time formats for comparison
-def normalize_time_format(time_str: str) -> str:
+def schedule_fields(scheduled_date: str, scheduled_time: str) -> dict:
     """
-    Normalize time format to 24-hour HH:MM for consistent comparison.
-    Handles various formats: '08:00 AM', '8:00 AM', '8am', '8:00am', '08:00', etc.
+    scheduled_date/time as entered plus the canonical Central Time scheduled_start/end
+    The partial unique index on (inspector_id, scheduled_start) rejects double bookings
     """
-    if not time_str:
-        return ""
-    
-    # Remove spaces and convert to lowercase
-    time_str = time_str.strip().lower().replace(" ", "")
-    
-    # Extract hour, minute, and am/pm
-    hour = 0
-    minute = 0
-    is_pm = False
-    
-    # Check for am/pm
-    if 'pm' in time_str:
-        is_pm = True
-        time_str = time_str.replace('pm', '')
-    elif 'am' in time_str:
-        time_str = time_str.replace('am', '')
-    
-    # Parse time components
-    if ':' in time_str:
-        parts = time_str.split(':')
-        hour = int(parts[0])
-        if len(parts) > 1:
-            minute = int(parts[1])
-    else:
-        # Just hour, no minutes (e.g., "8")
-        hour = int(time_str) if time_str.isdigit() else 0
-    
-    # Convert to 24-hour format
-    if is_pm and hour != 12:
-        hour += 12
-    elif not is_pm and hour == 12:
-        hour = 0
-    
-    # Return normalized format HH:MM
-    return f"{hour:02d}:{minute:02d}"
+    scheduled_start, scheduled_end = scheduled_window(scheduled_date, scheduled_time)
+    if scheduled_date and scheduled_time and scheduled_start is None:
+        logging.warning(f"Unrecognized schedule '{scheduled_date} {scheduled_time}' - stored without scheduled_start")
+    return {
+        "scheduled_date": scheduled_date,
+        "scheduled_time": scheduled_time,
+        "scheduled_start": scheduled_start,
+        "scheduled_end": scheduled_end
+    }
+
+
+async def inspection_transition_error(inspection_id: str, detail: str, status_code: int = 409) -> HTTPException:
+    """Error for a guarded write that matched nothing: 404 if the inspection is gone, else `detail`"""
+    if not await inspection_repository.get(inspection_id, {"_id": 1}):
+        return HTTPException(status_code=404, detail="Inspection not found")
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def double_booking_error(inspector_name: Optional[str], scheduled_date: str, scheduled_time: str) -> HTTPException:
+    inspector_label = f"Inspector {inspector_name}" if inspector_name else "The inspector"
+    return HTTPException(
+        status_code=409,
+        detail=f"{inspector_label} is already scheduled for another inspection at {scheduled_date} {scheduled_time}. Please select a different time slot or assign a different inspector."
+    )
+
+
+async def check_unindexed_double_booking(inspection_id: str, inspector_name: Optional[str], slot: dict):
+    """
+    Conflict check by inspector name, run whether or not the inspector has a user id
+    The unique index only covers bookings that carry an inspector_id; bookings with just a
+    name (typed in by hand, or made before inspector ids were stored) need one indexed lookup
+    """
+    if not inspector_name or slot["scheduled_start"] is None:
+        return
+    conflict = await db.inspections.find_one(
+        {
+            "inspector_name": inspector_name,
+            "scheduled_start": slot["scheduled_start"],
+            "status": InspectionStatus.scheduled.value,
+            "id": {"$ne": inspection_id}
+        },
+        {"_id": 1}
+    )
+    if conflict:
+        raise double_booking_error(inspector_name, slot["scheduled_date"], slot["scheduled_time"])
 
 
 ROOT_DIR = Path(__file__).parent
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 
 load_dotenv(ROOT_DIR / '.env')
 
+from image_service import PROFILE_PICTURE_MAX_UPLOAD_BYTES
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ.get('DB_NAME', 'inspection_app')]
 
+# In-process roster of owners and inspectors
+staff_directory = StaffDirectory(db.users)
+
+# Owner dashboard counters, maintained on every status transition
+dashboard_stats = DashboardStats(db, on_change=emit_dashboard_stats)
+
+# Guarded single round-trip inspection writes
+inspection_repository = InspectionRepository(db.inspections)
+
+async def _owner_ids() -> List[str]:
+    return [owner["id"] for owner in await staff_directory.owners()]
+
+# Per-user unread totals, pushed as `unread_count` events whenever they change
+unread_counters = UnreadCounters(db.unread_counters, owner_ids=_owner_ids, on_change=emit_unread_count)
+
+# Per-user conversation watermarks behind read receipts
+read_states = ReadStates(db.read_state)
+
+# Cached chat participants for send_message, dropped whenever an inspection's chat fields change
+participant_resolver = ParticipantResolver(db)
+
+# Materialized chat list, updated by send_message and inspection changes
+conversation_store = ConversationStore(
+    db, unread_counters=unread_counters, on_inspection_change=participant_resolver.invalidate_inspection
+)
+
+# Moves expired messages (and conversations) out of the hot collections
+message_archiver = MessageArchiver(db, conversation_store, read_states)
+
 # Create the main app without a prefix
 app = FastAPI(title="Inspection App API")
 
@@ -101,8 +179,8 @@ api_router = APIRouter(prefix="/api")
 
 
 # Dependency to get current user
-async def get_current_user_from_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInDB:
-    """Get current user from JWT token"""
+async def get_current_user_from_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Principal:
+    """Get current user from JWT token (served from the principal cache when possible)"""
     token = credentials.credentials
     payload = decode_token(token)
     user_id = payload.get("sub")
@@ -110,11 +188,86 @@ async def get_current_user_from_token(credentials: HTTPAuthorizationCredentials
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
-    user_dict = await db.users.find_one({"id": user_id})
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    
+    user_dict = await db.users.find_one({"id": user_id}, PRINCIPAL_PROJECTION)
     if user_dict is None:
         raise HTTPException(status_code=401, detail="User not found")
     
-    return UserInDB(**user_dict)
+    principal = Principal.from_document(user_dict)
+    principal_cache.put(principal)
+    return principal
+
+
+# ============= INSPECTION LINKING HELPERS =============
+
+INSPECTION_LINKING_STATE_ID = "inspection_linking"
+
+
+async def mark_unlinked_inspections():
+    """
+    Record that an inspection without a customer account was written.
+    Customers whose linking watermark is older than this will re-run linking on next login.
+    """
+    await db.app_state.update_one(
+        {"_id": INSPECTION_LINKING_STATE_ID},
+        {"$max": {"last_unlinked_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def link_customer_inspections(user_id: str, email: str, phone: Optional[str], linked_up_to: Optional[datetime] = None) -> int:
+    """
+    Link unclaimed inspections (customer_id null) whose normalized email or E.164 phone
+    matches this customer, in a single index-backed update_many.
+    
+    linked_up_to is the user's watermark from a previous run - if no unlinked inspection
+    has been written since then, the inspections query is skipped entirely.
+    Returns the number of inspections linked.
+    """
+    if linked_up_to:
+        state = await db.app_state.find_one({"_id": INSPECTION_LINKING_STATE_ID}, {"last_unlinked_at": 1})
+        last_unlinked_at = state.get("last_unlinked_at") if state else None
+        if not last_unlinked_at or last_unlinked_at <= linked_up_to:
+            return 0
+    
+    # Take the watermark before querying so inspections written during the update are not missed
+    watermark = datetime.utcnow()
+    
+    match_clauses = []
+    email_normalized = normalize_email(email)
+    if email_normalized:
+        match_clauses.append({"customer_email_normalized": email_normalized})
+    phone_e164 = normalize_phone_e164(phone)
+    if phone_e164:
+        match_clauses.append({"customer_phone_e164": phone_e164})
+    
+    linked_count = 0
+    if match_clauses:
+        # Ids first, so each linked inspection's chat can pick up its new customer
+        unlinked = await db.inspections.find(
+            {"customer_id": None, "$or": match_clauses}, {"_id": 0, "id": 1}
+        ).to_list(None)
+        inspection_ids = [inspection["id"] for inspection in unlinked]
+        if inspection_ids:
+            result = await db.inspections.update_many(
+                {"id": {"$in": inspection_ids}, "customer_id": None},
+                {"$set": {"customer_id": user_id, "updated_at": watermark}}
+            )
+            linked_count = result.modified_count
+            for inspection_id in inspection_ids:
+                await conversation_store.sync_inspection(inspection_id)
+        if linked_count:
+            logging.info(f"Linked {linked_count} inspections to customer {user_id}")
+    
+    await db.users.update_one(
+        {"id": user_id},
+        {"$set": {"inspections_linked_at": watermark}}
+    )
+    
+    return linked_count
 
 
 # ============= AUTHENTICATION ENDPOINTS =============
@@ -143,7 +296,7 @@ async def register(user_data: UserCreate):
     
     # Create new user
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     current_time = datetime.utcnow()
     
     user_in_db = UserInDB(
@@ -164,36 +317,14 @@ async def register(user_data: UserCreate):
         ip_address_at_registration=None  # Could be captured from request headers if needed
     )
     
-    await db.users.insert_one(user_in_db.dict())
+    user_doc = user_in_db.dict()
+    user_doc["search_keys"] = user_search_keys(user_doc)
+    await db.users.insert_one(user_doc)
+    staff_directory.invalidate_user(user_id, user_data.role)
     
     # If this is a customer registration, link any inspections with matching email/phone
     if user_data.role == UserRole.customer:
-        # Find inspections with matching email or phone where customer_id is null
-        matching_inspections = await db.inspections.find({
-            "$or": [
-                {"customer_id": None},
-                {"customer_id": {"$exists": False}}
-            ],
-            "$and": [
-                {
-                    "$or": [
-                        {"customer_email": user_data.email},
-                        {"customer_phone": user_data.phone}
-                    ]
-                }
-            ]
-        }).to_list(1000)
-        
-        if matching_inspections:
-            logging.info(f"Found {len(matching_inspections)} inspections to link to new customer {user_id}")
-            
-            # Update all matching inspections with the customer_id
-            for inspection in matching_inspections:
-                await db.inspections.update_one(
-                    {"id": inspection["id"]},
-                    {"$set": {"customer_id": user_id}}
-                )
-                logging.info(f"Linked inspection {inspection['id']} to customer {user_id}")
+        await link_customer_inspections(user_id, user_data.email, user_data.phone)
     
     # Create access token
     access_token = create_access_token({"sub": user_id, "role": user_data.role.value})
@@ -220,7 +351,7 @@ async def login(credentials: UserLogin):
     
     user = UserInDB(**user_dict)
     
-    if not verify_password(credentials.password, user.hashed_password):
+    if not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Create access token
@@ -230,52 +361,16 @@ async def login(credentials: UserLogin):
     needs_consent = not user.terms_accepted or not user.privacy_policy_accepted
     
     # If this is a customer logging in, link any unlinked inspections with matching email/phone
+    # (skipped when nothing unlinked has been written since their last linking run)
     if user.role == UserRole.customer:
-        matching_inspections = await db.inspections.find({
-            "$or": [
-                {"customer_id": None},
-                {"customer_id": {"$exists": False}}
-            ],
-            "$and": [
-                {
-                    "$or": [
-                        {"customer_email": user.email},
-                        {"customer_phone": user.phone}
-                    ]
-                }
-            ]
-        }).to_list(1000)
-        
-        if matching_inspections:
-            logging.info(f"Found {len(matching_inspections)} inspections to link to existing customer {user.id} on login")
-            
-            for inspection in matching_inspections:
-                await db.inspections.update_one(
-                    {"id": inspection["id"]},
-                    {"$set": {"customer_id": user.id}}
-                )
-                logging.info(f"Linked inspection {inspection['id']} to customer {user.id}")
+        await link_customer_inspections(
+            user.id, user.email, user.phone,
+            linked_up_to=user_dict.get("inspections_linked_at")
+        )
     
-    # Generate presigned URL for profile picture if exists
-    profile_picture_url = None
-    if user.profile_picture:
-        if not user.profile_picture.startswith('http'):
-            # It's an S3 key, generate presigned URL
-            try:
-                from s3_service import s3_client, AWS_S3_BUCKET_NAME
-                profile_picture_url = s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={
-                        'Bucket': AWS_S3_BUCKET_NAME,
-                        'Key': user.profile_picture
-                    },
-                    ExpiresIn=604800  # 7 days
-                )
-            except Exception as e:
-                logging.error(f"Error generating presigned URL for profile picture on login: {e}")
-                profile_picture_url = None
-        else:
-            profile_picture_url = user.profile_picture
+    # Resolve profile picture (S3 key -> cached presigned URL)
+    from s3_service import get_profile_picture_url
+    profile_picture_url = get_profile_picture_url(user.profile_picture)
     
     user_response = UserResponse(
         id=user.id,
@@ -294,31 +389,26 @@ async def login(credentials: UserLogin):
 
 
 @api_router.get("/auth/me", response_model=UserResponse)
-async def get_me(current_user: UserInDB = Depends(get_current_user_from_token)):
+async def get_me(
+    request: Request,
+    response: Response,
+    size: Optional[str] = Query(None, description="Profile picture size: small (64px), medium (256px) or large (1024px)"),
+    current_user: Principal = Depends(get_current_user_from_token)
+):
     """Get current user info"""
-    from s3_service import s3_client, AWS_S3_BUCKET_NAME
-    
-    # If user has a profile picture (stored as S3 key), generate a presigned URL
-    profile_picture_url = None
-    if current_user.profile_picture:
-        # Check if it's already a full URL (old format) or just an S3 key (new format)
-        if current_user.profile_picture.startswith('http'):
-            # Old format - full URL (may not work if private)
-            profile_picture_url = current_user.profile_picture
-        else:
-            # New format - S3 key, generate presigned URL
-            try:
-                profile_picture_url = s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={
-                        'Bucket': AWS_S3_BUCKET_NAME,
-                        'Key': current_user.profile_picture
-                    },
-                    ExpiresIn=604800  # 7 days
-                )
-            except Exception as e:
-                logging.error(f"Error generating presigned URL for profile picture: {e}")
-                profile_picture_url = None
+    from s3_service import get_profile_picture_url
+    
+    # The principal already holds every field in the response, so no lookup is needed
+    etag = weak_etag(
+        current_user.id, current_user.email, current_user.name, current_user.role.value,
+        current_user.phone, current_user.profile_picture, current_user.created_at, size
+    )
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+    
+    # Profile pictures are stored as S3 keys (old records hold a full URL)
+    profile_picture_url = get_profile_picture_url(current_user.profile_picture, parse_profile_picture_size(size))
     
     return UserResponse(
         id=current_user.id,
@@ -334,51 +424,74 @@ async def get_me(current_user: UserInDB = Depends(get_current_user_from_token)):
 @api_router.post("/users/profile-picture")
 async def upload_profile_picture(
     file: UploadFile = File(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    size: Optional[str] = Query(None, description="Profile picture size: small (64px), medium (256px) or large (1024px)"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Upload and update user profile picture"""
+    from image_service import (
+        render_profile_picture_sizes, profile_picture_key, profile_picture_version, profile_picture_content_type,
+        all_profile_picture_keys, read_upload, InvalidImageError, UploadTooLargeError, PROFILE_PICTURE_SIZES
+    )
+    from s3_service import upload_profile_picture_to_s3, get_profile_picture_url, delete_file_from_s3
+    
+    size_px = parse_profile_picture_size(size)
+    
+    # Read file content, giving up as soon as it is over the limit
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Generate unique filename
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-        s3_key = f"profile-pictures/{current_user.id}.{file_extension}"
-        
-        # Upload to S3 using s3_client from s3_service
-        from s3_service import s3_client, AWS_S3_BUCKET_NAME
-        
-        # Upload without ACL - bucket policy will handle access
-        s3_client.put_object(
-            Bucket=AWS_S3_BUCKET_NAME,
-            Key=s3_key,
-            Body=file_content,
-            ContentType=f"image/{file_extension}"
-        )
-        
-        # Generate a long-lived presigned URL (7 days) for the profile picture
-        profile_picture_url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={
-                'Bucket': AWS_S3_BUCKET_NAME,
-                'Key': s3_key
-            },
-            ExpiresIn=604800  # 7 days in seconds
-        )
+        file_content = await read_upload(file)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="Profile picture is too large")
+    
+    # Decode, crop and re-encode every size off the event loop
+    try:
+        rendered = await render_profile_picture_sizes(file_content)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Upload without ACL - bucket policy will handle access.
+        # Each upload gets new versioned keys, so cached presigned URLs of the old picture
+        # (on every worker and in clients) are never reused for the new one.
+        content_type = profile_picture_content_type()
+        version = profile_picture_version(rendered)
+        for px, image_bytes in rendered.items():
+            upload_profile_picture_to_s3(profile_picture_key(current_user.id, version, px), image_bytes, content_type)
+        
+        # The stored key is the largest size; other sizes are found by swapping the suffix
+        s3_key = profile_picture_key(current_user.id, version, max(PROFILE_PICTURE_SIZES.values()))
+        
+        # Long-lived (7 day) presigned URLs, reused until close to expiry
+        profile_picture_url = get_profile_picture_url(s3_key, size_px)
+        profile_picture_urls = {
+            name: get_profile_picture_url(s3_key, px) for name, px in PROFILE_PICTURE_SIZES.items()
+        }
         
         # Store the S3 key in database instead of the presigned URL
-        # We'll generate a new presigned URL each time the user data is fetched
+        # Reads resolve it through the shared presigned URL cache
         await db.users.update_one(
             {"id": current_user.id},
             {"$set": {"profile_picture": s3_key}}  # Store S3 key, not URL
         )
+        principal_cache.invalidate(current_user.id)
+        staff_directory.invalidate_user(current_user.id, current_user.role)
+        participant_resolver.invalidate_user(current_user.id)
+        
+        # Remove the previous generation (older version, original bytes or another format)
+        previous_key = current_user.profile_picture
+        if previous_key and not previous_key.startswith('http') and previous_key != s3_key:
+            for old_key in all_profile_picture_keys(previous_key):
+                try:
+                    delete_file_from_s3(old_key)
+                except Exception as e:
+                    logging.warning(f"Could not delete old profile picture {old_key}: {e}")
         
         logging.info(f"Profile picture uploaded for user {current_user.id}: {s3_key}")
         
         return {
             "success": True,
             "message": "Profile picture uploaded successfully",
-            "profile_picture_url": profile_picture_url  # Return presigned URL to frontend
+            "profile_picture_url": profile_picture_url,  # Return presigned URL to frontend
+            "profile_picture_urls": profile_picture_urls
         }
         
     except Exception as e:
@@ -389,7 +502,8 @@ async def upload_profile_picture(
 @api_router.put("/users/profile")
 async def update_profile(
     profile_data: UserProfileUpdate,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    size: Optional[str] = Query(None, description="Profile picture size: small (64px), medium (256px) or large (1024px)"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Update user profile information (name, email, phone)"""
     try:
@@ -414,30 +528,31 @@ async def update_profile(
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        # Update user in database
+        # Update user in database - a new email/phone may match unclaimed inspections,
+        # so reset the linking watermark
+        update_ops = {"$set": update_data}
+        if "email" in update_data or "phone" in update_data:
+            update_ops["$unset"] = {"inspections_linked_at": ""}
         await db.users.update_one(
             {"id": current_user.id},
-            {"$set": update_data}
+            update_ops
+        )
+        principal_cache.invalidate(current_user.id)
+        staff_directory.invalidate_user(current_user.id, current_user.role)
+        participant_resolver.invalidate_user(current_user.id)
+        await refresh_search_keys(db.users, {"id": current_user.id})
+        await conversation_store.sync_user(
+            current_user.id,
+            name=update_data.get("name"),
+            phone=(update_data["phone"] or "") if "phone" in update_data else None
         )
         
         # Fetch updated user data
         updated_user = await db.users.find_one({"id": current_user.id})
         
-        # Generate presigned URL for profile picture if exists
-        profile_picture_url = None
-        if updated_user.get("profile_picture"):
-            try:
-                from s3_service import s3_client, AWS_S3_BUCKET_NAME
-                profile_picture_url = s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={
-                        'Bucket': AWS_S3_BUCKET_NAME,
-                        'Key': updated_user["profile_picture"]
-                    },
-                    ExpiresIn=604800  # 7 days
-                )
-            except Exception as e:
-                logger.error(f"Error generating presigned URL: {e}")
+        # Resolve profile picture (S3 key -> cached presigned URL)
+        from s3_service import get_profile_picture_url
+        profile_picture_url = get_profile_picture_url(updated_user.get("profile_picture"), parse_profile_picture_size(size))
         
         logger.info(f"Profile updated for user {current_user.id}: {list(update_data.keys())}")
         
@@ -463,12 +578,13 @@ async def update_profile(
 async def change_password(
     old_password: str,
     new_password: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Change user password"""
     try:
-        # Verify old password
-        if not verify_password(old_password, current_user.hashed_password):
+        # Verify old password (the cached principal does not carry the hash)
+        user_doc = await db.users.find_one({"id": current_user.id}, {"hashed_password": 1})
+        if not user_doc or not await verify_password_async(old_password, user_doc["hashed_password"]):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
         
         # Validate new password
@@ -479,13 +595,14 @@ async def change_password(
             raise HTTPException(status_code=400, detail="New password must be different from current password")
         
         # Hash new password
-        new_hashed_password = get_password_hash(new_password)
+        new_hashed_password = await get_password_hash_async(new_password)
         
         # Update password in database
         await db.users.update_one(
             {"id": current_user.id},
             {"$set": {"hashed_password": new_hashed_password}}
         )
+        principal_cache.invalidate(current_user.id)
         
         logger.info(f"Password changed for user {current_user.id}")
         
@@ -501,7 +618,6 @@ async def change_password(
 @api_router.post("/auth/forgot-password")
 async def forgot_password(email: str = Body(..., embed=True)):
     """Send OTP to user's email for password reset"""
-    import secrets
     from email_service import send_email
     
     # Always return success to prevent email enumeration attacks
@@ -511,51 +627,55 @@ async def forgot_password(email: str = Body(..., embed=True)):
     }
     
     try:
+        reset_key = email.lower().strip()
+        
         # Find user by email
-        user = await db.users.find_one({"email": email.lower().strip()})
+        user = await db.users.find_one({"email": reset_key}, {"_id": 0, "id": 1})
         
         if not user:
             # Return success even if user doesn't exist (security best practice)
             logger.info(f"Password reset requested for non-existent email: {email}")
             return standard_response
         
-        # Rate limiting: Check attempts in last hour
-        if user.get("otp_last_attempt_at"):
-            time_since_last_attempt = datetime.utcnow() - user["otp_last_attempt_at"]
-            if time_since_last_attempt.total_seconds() < 3600:  # Within 1 hour
-                if user.get("otp_attempts", 0) >= 3:
-                    logger.warning(f"Rate limit exceeded for password reset: {email}")
-                    return standard_response  # Don't reveal rate limiting
-        
-        # Generate 6-digit OTP
-        otp_code = ''.join([str(secrets.randbelow(10)) for _ in range(6)])
-        
-        # Hash the OTP before storing
-        from auth import get_password_hash
-        hashed_otp = get_password_hash(otp_code)
+        # Rate limiting: atomically count requests in the current window
+        now = datetime.utcnow()
+        reset_state = await db.password_resets.find_one_and_update(
+            {"_id": reset_key, "window_started_at": {"$gt": now - OTP_REQUEST_WINDOW}},
+            {"$inc": {"request_count": 1}},
+            projection={"request_count": 1, "window_started_at": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if reset_state is None:
+            # No request in the last window - start a new one
+            window_started_at = now
+            request_count = 1
+        else:
+            window_started_at = reset_state["window_started_at"]
+            request_count = reset_state["request_count"]
         
-        # Calculate expiration (15 minutes from now)
-        expires_at = datetime.utcnow() + timedelta(minutes=15)
+        if request_count > OTP_MAX_REQUESTS_PER_WINDOW:
+            logger.warning(f"Rate limit exceeded for password reset: {email}")
+            return standard_response  # Don't reveal rate limiting
         
-        # Reset attempts if more than 1 hour has passed
-        current_attempts = 0
-        if user.get("otp_last_attempt_at"):
-            time_since_last = datetime.utcnow() - user["otp_last_attempt_at"]
-            if time_since_last.total_seconds() < 3600:
-                current_attempts = user.get("otp_attempts", 0)
+        # Generate 6-digit OTP and store only its keyed digest
+        otp_code = generate_otp()
+        expires_at = now + OTP_TTL
         
-        # Update user with OTP details
-        await db.users.update_one(
-            {"id": user["id"]},
+        await db.password_resets.update_one(
+            {"_id": reset_key},
             {
                 "$set": {
-                    "otp_code": hashed_otp,
-                    "otp_expires_at": expires_at,
-                    "otp_created_at": datetime.utcnow(),
-                    "otp_attempts": current_attempts + 1,
-                    "otp_last_attempt_at": datetime.utcnow()
+                    "user_id": user["id"],
+                    "otp_digest": otp_digest(reset_key, otp_code),
+                    "created_at": now,
+                    "expires_at": expires_at,
+                    "verify_attempts": 0,
+                    "window_started_at": window_started_at,
+                    "request_count": request_count,
+                    "purge_at": purge_time(window_started_at, expires_at)
                 }
-            }
+            },
+            upsert=True
         )
         
         # Send branded HTML email with OTP
@@ -702,28 +822,38 @@ async def forgot_password(email: str = Body(..., embed=True)):
     return standard_response
 
 
+async def consume_otp_attempt(email: str, otp: str) -> dict:
+    """
+    Count one verification attempt against the active reset code and check the OTP.
+    Single round trip: the filter rejects expired codes and exhausted attempt budgets.
+    """
+    reset_key = email.lower().strip()
+    reset = await db.password_resets.find_one_and_update(
+        {
+            "_id": reset_key,
+            "otp_digest": {"$ne": None},
+            "expires_at": {"$gt": datetime.utcnow()},
+            "verify_attempts": {"$lt": OTP_MAX_VERIFY_ATTEMPTS}
+        },
+        {"$inc": {"verify_attempts": 1}},
+        projection={"user_id": 1, "otp_digest": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if not reset:
+        raise HTTPException(status_code=400, detail="Invalid or expired code. Please request a new one")
+    
+    if not otp_matches(reset_key, otp, reset["otp_digest"]):
+        raise HTTPException(status_code=400, detail="Invalid code")
+    
+    return reset
+
+
 @api_router.post("/auth/verify-otp")
 async def verify_otp(email: str = Body(...), otp: str = Body(...)):
     """Verify OTP code for password reset"""
     try:
-        # Find user by email
-        user = await db.users.find_one({"email": email.lower().strip()})
-        
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid or expired code")
-        
-        # Check if OTP exists
-        if not user.get("otp_code") or not user.get("otp_expires_at"):
-            raise HTTPException(status_code=400, detail="Invalid or expired code")
-        
-        # Check if OTP is expired
-        if datetime.utcnow() > user["otp_expires_at"]:
-            raise HTTPException(status_code=400, detail="Code has expired. Please request a new one")
-        
-        # Verify OTP
-        from auth import verify_password
-        if not verify_password(otp, user["otp_code"]):
-            raise HTTPException(status_code=400, detail="Invalid code")
+        await consume_otp_attempt(email, otp)
         
         logger.info(f"OTP verified successfully for {email}")
         
@@ -748,50 +878,32 @@ async def reset_password_with_otp(
 ):
     """Reset password using verified OTP"""
     try:
-        # Find user by email
-        user = await db.users.find_one({"email": email.lower().strip()})
-        
-        if not user:
-            raise HTTPException(status_code=400, detail="Invalid request")
-        
-        # Check if OTP exists and not expired
-        if not user.get("otp_code") or not user.get("otp_expires_at"):
-            raise HTTPException(status_code=400, detail="Invalid or expired code")
-        
-        if datetime.utcnow() > user["otp_expires_at"]:
-            raise HTTPException(status_code=400, detail="Code has expired")
-        
         # Verify OTP one more time
-        from auth import verify_password
-        if not verify_password(otp, user["otp_code"]):
-            raise HTTPException(status_code=400, detail="Invalid code")
+        reset = await consume_otp_attempt(email, otp)
         
         # Validate new password
         if len(new_password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
         
         # Hash new password
-        new_hashed_password = get_password_hash(new_password)
+        new_hashed_password = await get_password_hash_async(new_password)
         
-        # Update password and clear OTP fields
-        await db.users.update_one(
-            {"id": user["id"]},
-            {
-                "$set": {
-                    "hashed_password": new_hashed_password
-                },
-                "$unset": {
-                    "otp_code": "",
-                    "otp_expires_at": "",
-                    "otp_created_at": "",
-                    "otp_attempts": "",
-                    "otp_last_attempt_at": ""
-                }
-            }
+        # Update password
+        result = await db.users.update_one(
+            {"id": reset["user_id"]},
+            {"$set": {"hashed_password": new_hashed_password}}
+        )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=400, detail="Invalid request")
+        
+        # The code is single-use - clear it but keep the rate-limit window
+        await db.password_resets.update_one(
+            {"_id": email.lower().strip()},
+            {"$set": {"otp_digest": None}}
         )
         
         # Send confirmation email
-        from email_service import send_email
+        from email_service import send_email, GMAIL_USER
         confirmation_html = f"""
         <!DOCTYPE html>
         <html>
@@ -881,20 +993,23 @@ async def reset_password_with_otp(
 @api_router.post("/auth/register-push-token")
 async def register_push_token(
     push_token: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Register push notification token for user"""
     await db.users.update_one(
         {"id": current_user.id},
         {"$set": {"push_token": push_token}}
     )
+    principal_cache.invalidate(current_user.id)
+    staff_directory.invalidate_user(current_user.id, current_user.role)
+    participant_resolver.invalidate_user(current_user.id)
     return {"success": True, "message": "Push token registered"}
 
 
 @api_router.get("/admin/search-agents")
 async def search_agents(
     query: str = Query(..., min_length=1),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Search for registered agents by name (Owner only)"""
     # Check if user is owner
@@ -902,22 +1017,17 @@ async def search_agents(
         raise HTTPException(status_code=403, detail="Only owners can search agents")
     
     try:
-        # Search agents whose name contains the query (case-insensitive)
-        agents_cursor = db.users.find({
-            "role": UserRole.agent.value,
-            "name": {"$regex": query, "$options": "i"}
-        })
-        
-        agents = await agents_cursor.to_list(length=50)  # Limit to 50 results
+        # Indexed prefix search over agent name/email/phone
+        search = await search_users(db, query, roles=[UserRole.agent.value], limit=50)
         
         # Return only relevant information
         agent_results = []
-        for agent in agents:
+        for agent in search["results"]:
             agent_results.append({
                 "id": agent["id"],
                 "name": agent["name"],
                 "email": agent["email"],
-                "phone": agent.get("phone", "Not provided")
+                "phone": agent.get("phone") or "Not provided"
             })
         
         logger.info(f"Agent search by owner {current_user.id}: query='{query}', found={len(agent_results)} agents")
@@ -929,9 +1039,52 @@ async def search_agents(
         raise HTTPException(status_code=500, detail="Failed to search agents")
 
 
+@api_router.get("/admin/search/users")
+async def search_users_endpoint(
+    q: str = Query(..., min_length=1),
+    role: Optional[UserRole] = None,
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Prefix search over users by name, email and phone (Owner only)"""
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Only owners can search users")
+    
+    return await search_users(db, q, roles=[role.value] if role else None, limit=limit, offset=offset)
+
+
+@api_router.get("/admin/search/inspections")
+async def search_inspections_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Prefix search over inspections by property address, client and agent (Owner only)"""
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Only owners can search inspections")
+    
+    return await search_inspections(db, q, limit=limit, offset=offset)
+
+
+@api_router.get("/admin/search/quotes")
+async def search_quotes_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Prefix search over quotes by property address, client and agent (Owner only)"""
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Only owners can search quotes")
+    
+    return await search_quotes(db, q, limit=limit, offset=offset)
+
+
 @api_router.get("/users/notification-preferences")
 async def get_notification_preferences(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get user's notification preferences"""
     try:
@@ -955,7 +1108,7 @@ async def get_notification_preferences(
 @api_router.put("/users/notification-preferences")
 async def update_notification_preferences(
     preferences: NotificationPreferences,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Update user's notification preferences"""
     try:
@@ -981,7 +1134,34 @@ async def update_notification_preferences(
 
 # ============= USER HELPER FUNCTIONS =============
 
-async def get_user_details(user_id: str, include_profile_picture: bool = True):
+def parse_profile_picture_size(size: Optional[str]) -> int:
+    """Validate a ?size= profile picture parameter, returning pixels"""
+    from image_service import resolve_profile_picture_size
+    try:
+        return resolve_profile_picture_size(size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+USER_DETAILS_PROJECTION = {"_id": 0, "id": 1, "name": 1, "email": 1, "phone": 1, "role": 1, "profile_picture": 1}
+MAX_USER_BATCH_SIZE = 100
+
+
+def user_details_from_document(user: dict, include_profile_picture: bool = True, picture_size_px: Optional[int] = None) -> dict:
+    """Shape a users document (projected with USER_DETAILS_PROJECTION) into user details"""
+    from s3_service import get_profile_picture_url
+    
+    return {
+        "id": user["id"],
+        "name": user["name"],
+        "email": user["email"],
+        "phone": user.get("phone"),
+        "role": user["role"],
+        "profile_picture": get_profile_picture_url(user.get("profile_picture"), picture_size_px) if include_profile_picture else None
+    }
+
+
+async def get_user_details(user_id: str, include_profile_picture: bool = True, picture_size_px: Optional[int] = None):
     """
     Central function to fetch user details by ID - Single Source of Truth
     This is the "file" in the filing cabinet - all user data comes from here
@@ -991,44 +1171,70 @@ async def get_user_details(user_id: str, include_profile_picture: bool = True):
     if not user_id:
         return None
         
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id}, USER_DETAILS_PROJECTION)
     if not user:
         logger.warning(f"User not found: {user_id}")
         return None
     
-    result = {
-        "id": user["id"],
-        "name": user["name"],
-        "email": user["email"],
-        "phone": user.get("phone"),
-        "role": user["role"]
-    }
+    return user_details_from_document(user, include_profile_picture, picture_size_px)
+
+
+async def get_users_details(
+    user_ids: List[str] = None,
+    emails: List[str] = None,
+    include_profile_picture: bool = True,
+    picture_size_px: Optional[int] = None
+) -> List[dict]:
+    """
+    Batch version of get_user_details - resolves ids and/or emails with a single $in query
     
-    if include_profile_picture and user.get("profile_picture"):
-        try:
-            from s3_service import generate_presigned_url
-            result["profile_picture"] = generate_presigned_url(user["profile_picture"])
-        except Exception as e:
-            logger.error(f"Error generating presigned URL for profile picture: {e}")
-            result["profile_picture"] = None
-    else:
-        result["profile_picture"] = None
+    Returns: list of user details (unknown ids/emails are simply absent)
+    """
+    clauses = []
+    if user_ids:
+        clauses.append({"id": {"$in": list(set(user_ids))}})
+    if emails:
+        # Older accounts may have mixed-case emails, so match both spellings
+        email_values = {email.strip() for email in emails} | {email.lower().strip() for email in emails}
+        clauses.append({"email": {"$in": list(email_values)}})
+    if not clauses:
+        return []
+    
+    query = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+    users = await db.users.find(query, USER_DETAILS_PROJECTION).to_list(MAX_USER_BATCH_SIZE * 2)
+    return [user_details_from_document(user, include_profile_picture, picture_size_px) for user in users]
+
+
+@api_router.post("/users/batch")
+async def get_users_batch(
+    request: UserBatchRequest,
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Get profiles for many chat participants at once, by id and/or email"""
+    if len(request.ids) + len(request.emails) > MAX_USER_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot look up more than {MAX_USER_BATCH_SIZE} users per request"
+        )
     
-    return result
+    users = await get_users_details(
+        user_ids=request.ids,
+        emails=request.emails,
+        picture_size_px=parse_profile_picture_size(request.size)
+    )
+    return {"users": users}
 
 
 @api_router.get("/users/inspectors")
 async def get_inspectors(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get list of all inspectors (Owner only)"""
     if current_user.role != UserRole.owner:
         raise HTTPException(status_code=403, detail="Only owners can view inspectors")
     
-    # Fetch all users with role inspector or owner (owners can also be inspectors)
-    inspectors = await db.users.find({
-        "role": {"$in": [UserRole.inspector.value, UserRole.owner.value]}
-    }).to_list(100)
+    # All users with role inspector or owner (owners can also be inspectors)
+    inspectors = await staff_directory.all_staff()
     
     # Return inspector info including license and phone
     inspector_list = [
@@ -1048,28 +1254,17 @@ async def get_inspectors(
 
 @api_router.get("/users/owner")
 async def get_owner_info(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    size: Optional[str] = Query(None, description="Profile picture size: small (64px), medium (256px) or large (1024px)"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get owner information for chat display (accessible to all authenticated users)"""
-    owner = await db.users.find_one({"role": UserRole.owner.value})
+    owner = await staff_directory.primary_owner()
     if not owner:
         raise HTTPException(status_code=404, detail="Owner not found")
     
-    # Generate presigned URL for profile picture if exists
-    profile_picture_url = None
-    if owner.get("profile_picture"):
-        try:
-            from s3_service import s3_client, AWS_S3_BUCKET_NAME
-            profile_picture_url = s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': AWS_S3_BUCKET_NAME,
-                    'Key': owner["profile_picture"]
-                },
-                ExpiresIn=604800  # 7 days
-            )
-        except Exception as e:
-            logger.error(f"Error generating presigned URL for owner profile picture: {e}")
+    # Resolve profile picture (S3 key -> cached presigned URL)
+    from s3_service import get_profile_picture_url
+    profile_picture_url = get_profile_picture_url(owner.get("profile_picture"), parse_profile_picture_size(size))
     
     return {
         "id": owner["id"],
@@ -1084,28 +1279,17 @@ async def get_owner_info(
 @api_router.get("/users/by-email/{email}")
 async def get_user_by_email(
     email: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    size: Optional[str] = Query(None, description="Profile picture size: small (64px), medium (256px) or large (1024px)"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get user profile by email - for chat participants"""
     user = await db.users.find_one({"email": email})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Generate presigned URL for profile picture
-    profile_picture_url = None
-    if user.get("profile_picture"):
-        try:
-            from s3_service import s3_client, AWS_S3_BUCKET_NAME
-            profile_picture_url = s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': AWS_S3_BUCKET_NAME,
-                    'Key': user["profile_picture"]
-                },
-                ExpiresIn=604800  # 7 days
-            )
-        except Exception as e:
-            logging.error(f"Error generating presigned URL for profile: {e}")
+    # Resolve profile picture (S3 key -> cached presigned URL)
+    from s3_service import get_profile_picture_url
+    profile_picture_url = get_profile_picture_url(user.get("profile_picture"), parse_profile_picture_size(size))
     
     return {
         "id": user["id"],
@@ -1120,28 +1304,17 @@ async def get_user_by_email(
 @api_router.get("/users/{user_id}")
 async def get_user_by_id(
     user_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    size: Optional[str] = Query(None, description="Profile picture size: small (64px), medium (256px) or large (1024px)"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get user details by ID (for chat profile display)"""
     user = await db.users.find_one({"id": user_id})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Generate presigned URL for profile picture if exists
-    profile_picture_url = None
-    if user.get("profile_picture"):
-        try:
-            from s3_service import s3_client, AWS_S3_BUCKET_NAME
-            profile_picture_url = s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': AWS_S3_BUCKET_NAME,
-                    'Key': user["profile_picture"]
-                },
-                ExpiresIn=604800  # 7 days
-            )
-        except Exception as e:
-            logger.error(f"Error generating presigned URL for profile picture: {e}")
+    # Resolve profile picture (S3 key -> cached presigned URL)
+    from s3_service import get_profile_picture_url
+    profile_picture_url = get_profile_picture_url(user.get("profile_picture"), parse_profile_picture_size(size))
     
     return {
         "id": user["id"],
@@ -1157,7 +1330,7 @@ async def get_user_by_id(
 @api_router.post("/quotes", response_model=QuoteResponse)
 async def create_quote(
     quote_data: QuoteCreate,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Create a new quote request (Customer or Agent)"""
     from push_notification_service import send_push_notification
@@ -1200,10 +1373,13 @@ async def create_quote(
         updated_at=datetime.utcnow()
     )
     
-    await db.quotes.insert_one(quote.dict())
+    quote_doc = quote.dict()
+    quote_doc["search_keys"] = quote_search_keys(quote_doc)
+    await db.quotes.insert_one(quote_doc)
+    await dashboard_stats.quote_transition(None, QuoteStatus.pending)
     
     # Send push notification to all owners
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if owner.get("push_token"):
             notification_title = "New Agent Quote Request" if is_agent_quote else "New Quote Request"
@@ -1221,10 +1397,28 @@ async def create_quote(
     return QuoteResponse(**quote.dict())
 
 
-@api_router.get("/quotes", response_model=List[QuoteResponse])
+# List endpoints take ?view=summary|full. They return plain model lists with
+# response_model=None so the documents are validated once, not twice.
+QUOTE_SUMMARY_PROJECTION = list_projection(QuoteSummary)
+INSPECTION_SUMMARY_PROJECTION = list_projection(InspectionSummary)
+
+
+async def find_list_view(collection, query: dict, view: ListView, full_model, summary_model, summary_projection: dict):
+    """Run a list query with the projection for the requested view and build the response models"""
+    if view == ListView.summary:
+        documents = await collection.find(query, summary_projection).to_list(1000)
+        return [summary_model(**document) for document in documents]
+    documents = await collection.find(query, {"_id": 0}).to_list(1000)
+    return [full_model(**document) for document in documents]
+
+
+@api_router.get("/quotes", response_model=None)
 async def get_my_quotes(
-    current_user: UserInDB = Depends(get_current_user_from_token)
-):
+    request: Request,
+    response: Response,
+    view: ListView = Query(ListView.full, description="summary for list screens, full for every field"),
+    current_user: Principal = Depends(get_current_user_from_token)
+) -> Union[List[QuoteResponse], List[QuoteSummary]]:
     """Get quotes for current customer or agent"""
     if current_user.role not in [UserRole.customer, UserRole.agent]:
         raise HTTPException(status_code=403, detail="Only customers and agents can view their quotes")
@@ -1232,17 +1426,22 @@ async def get_my_quotes(
     # For agents, find quotes where they are the agent
     # For customers, find quotes where they are the customer
     if current_user.role == UserRole.agent:
-        quotes = await db.quotes.find({"agent_email": current_user.email}).to_list(1000)
+        query = {"agent_email": current_user.email}
     else:
-        quotes = await db.quotes.find({"customer_id": current_user.id}).to_list(1000)
+        query = {"customer_id": current_user.id}
     
-    return [QuoteResponse(**quote) for quote in quotes]
+    etag = await list_etag(db.quotes, query, current_user.id, current_user.email, current_user.role.value, view.value)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+    
+    return await find_list_view(db.quotes, query, view, QuoteResponse, QuoteSummary, QUOTE_SUMMARY_PROJECTION)
 
 
 @api_router.get("/quotes/{quote_id}", response_model=QuoteResponse)
 async def get_quote(
     quote_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get a specific quote"""
     quote = await db.quotes.find_one({"id": quote_id})
@@ -1259,7 +1458,7 @@ async def get_quote(
 @api_router.delete("/quotes/{quote_id}")
 async def decline_quote(
     quote_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Decline a quote (Customer only) - deletes the quote"""
     from push_notification_service import send_push_notification
@@ -1276,7 +1475,7 @@ async def decline_quote(
         raise HTTPException(status_code=403, detail="Not authorized to decline this quote")
     
     # Send push notification to all owners
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if owner.get("push_token"):
             send_push_notification(
@@ -1290,6 +1489,7 @@ async def decline_quote(
     
     # Delete the quote
     await db.quotes.delete_one({"id": quote_id})
+    await dashboard_stats.quote_transition(quote.get("status"), None)
     
     return {"message": "Quote declined successfully"}
 
@@ -1299,7 +1499,7 @@ async def decline_quote(
 @api_router.get("/admin/quotes", response_model=List[QuoteResponse])
 async def get_all_quotes(
     status: QuoteStatus = None,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get all quotes (Owner only)"""
     if current_user.role != UserRole.owner:
@@ -1313,11 +1513,19 @@ async def get_all_quotes(
     return [QuoteResponse(**quote) for quote in quotes]
 
 
+async def sync_inspection_fee_from_quote(quote_id: str, quote_amount: float):
+    """Write a quote's price onto the inspections created from it (unpaid ones only)"""
+    await db.inspections.update_many(
+        {"quote_id": quote_id, "payment_completed": {"$ne": True}},
+        {"$set": {"fee_amount": float(quote_amount), "updated_at": datetime.utcnow()}}
+    )
+
+
 @api_router.patch("/admin/quotes/{quote_id}/price")
 async def set_quote_price(
     quote_id: str,
     quote_amount: float = Query(..., description="Quote amount"),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Set price for a quote (Owner only)"""
     from push_notification_service import send_push_notification
@@ -1351,6 +1559,10 @@ async def set_quote_price(
             }
         }
     )
+    await dashboard_stats.quote_transition(quote.get("status"), new_status)
+    
+    # Keep the fee on any inspection already created from this quote in sync
+    await sync_inspection_fee_from_quote(quote_id, quote_amount)
     
     # Only send notifications to customer if status is "quoted"
     if new_status == QuoteStatus.quoted.value:
@@ -1414,7 +1626,7 @@ async def set_quote_price(
 @api_router.patch("/quotes/{quote_id}/approve")
 async def approve_quote_by_agent(
     quote_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Agent approves a quote (Agent only)"""
     if current_user.role != UserRole.agent:
@@ -1442,11 +1654,15 @@ async def approve_quote_by_agent(
             }
         }
     )
+    await dashboard_stats.quote_transition(QuoteStatus.agent_review, QuoteStatus.accepted)
+    
+    if quote.get("quote_amount"):
+        await sync_inspection_fee_from_quote(quote_id, quote["quote_amount"])
     
     updated_quote = await db.quotes.find_one({"id": quote_id})
     
     # Emit Socket.IO event to owner
-    owner = await db.users.find_one({"role": UserRole.owner.value})
+    owner = await staff_directory.primary_owner()
     if owner:
         await emit_quote_updated(quote_id, owner["id"], updated_quote)
     
@@ -1456,7 +1672,7 @@ async def approve_quote_by_agent(
 @api_router.patch("/quotes/{quote_id}/decline")
 async def decline_quote_by_agent(
     quote_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Agent declines a quote (Agent only)"""
     if current_user.role != UserRole.agent:
@@ -1484,11 +1700,12 @@ async def decline_quote_by_agent(
             }
         }
     )
+    await dashboard_stats.quote_transition(QuoteStatus.agent_review, QuoteStatus.rejected)
     
     updated_quote = await db.quotes.find_one({"id": quote_id})
     
     # Emit Socket.IO event to owner
-    owner = await db.users.find_one({"role": UserRole.owner.value})
+    owner = await staff_directory.primary_owner()
     if owner:
         await emit_quote_updated(quote_id, owner["id"], updated_quote)
     
@@ -1501,7 +1718,7 @@ async def decline_quote_by_agent(
 @api_router.post("/inspections", response_model=InspectionResponse)
 async def schedule_inspection(
     scheduling_data: SchedulingRequestCreate,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Schedule an inspection (Customer or Agent) - with scheduling preferences"""
     from push_notification_service import send_push_notification
@@ -1563,6 +1780,7 @@ async def schedule_inspection(
         customer_email=customer_email,
         customer_name=customer_name,
         customer_phone=customer_phone,
+        **customer_contact_fields(customer_email, customer_phone),
         agent_name=agent_name,
         agent_email=agent_email,
         agent_phone=agent_phone,
@@ -1590,7 +1808,12 @@ async def schedule_inspection(
         updated_at=datetime.utcnow()
     )
     
-    await db.inspections.insert_one(inspection.dict())
+    inspection_doc = inspection.dict()
+    inspection_doc["search_keys"] = inspection_search_keys(inspection_doc)
+    await db.inspections.insert_one(inspection_doc)
+    await dashboard_stats.inspection_transition(None, InspectionStatus.pending_scheduling)
+    if customer_id is None:
+        await mark_unlinked_inspections()
     
     # Update quote status to "accepted" so it no longer shows in customer's pending quotes
     await db.quotes.update_one(
@@ -1602,9 +1825,10 @@ async def schedule_inspection(
             }
         }
     )
+    await dashboard_stats.quote_transition(quote.get("status"), QuoteStatus.accepted)
     
     # Send push notification to all owners
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if owner.get("push_token"):
             send_push_notification(
@@ -1623,7 +1847,7 @@ async def schedule_inspection(
 @api_router.post("/inspections/direct-schedule", response_model=InspectionResponse)
 async def direct_schedule_inspection(
     request: DirectScheduleRequest,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Agent submits direct schedule request - skips quote flow"""
     from push_notification_service import send_push_notification
@@ -1660,6 +1884,7 @@ async def direct_schedule_inspection(
         customer_email=request.customer_email,
         customer_name=request.customer_name,
         customer_phone=request.customer_phone,
+        **customer_contact_fields(request.customer_email, request.customer_phone),
         property_address=property_address,
         property_city=request.property_city,
         property_zip=request.property_zip,
@@ -1679,10 +1904,15 @@ async def direct_schedule_inspection(
         updated_at=datetime.utcnow()
     )
     
-    await db.inspections.insert_one(inspection.dict())
+    inspection_doc = inspection.dict()
+    inspection_doc["search_keys"] = inspection_search_keys(inspection_doc)
+    await db.inspections.insert_one(inspection_doc)
+    await dashboard_stats.inspection_transition(None, InspectionStatus.pending_scheduling)
+    if customer_id is None:
+        await mark_unlinked_inspections()
     
     # Send push notification to owner about new direct schedule request
-    owners = await db.users.find({"role": "owner"}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if owner.get("push_token"):
             try:
@@ -1699,61 +1929,50 @@ async def direct_schedule_inspection(
     return InspectionResponse(**inspection.dict())
 
 
-@api_router.get("/inspections", response_model=List[InspectionResponse])
+@api_router.get("/inspections", response_model=None)
 async def get_my_inspections(
-    current_user: UserInDB = Depends(get_current_user_from_token)
-):
+    request: Request,
+    response: Response,
+    view: ListView = Query(ListView.full, description="summary for list screens, full for every field"),
+    current_user: Principal = Depends(get_current_user_from_token)
+) -> Union[List[InspectionResponse], List[InspectionSummary]]:
     """Get inspections for current customer, agent, or inspector"""
     if current_user.role == UserRole.customer:
         # Customers see their own inspections (including manual entries by email)
-        inspections = await db.inspections.find({
+        query = {
             "$or": [
                 {"customer_id": current_user.id},
                 {"customer_email": current_user.email}  # Include manual entries
             ]
-        }).to_list(1000)
+        }
     elif current_user.role == UserRole.agent:
         # Agents see inspections where they're listed as the agent
-        inspections = await db.inspections.find({"agent_email": current_user.email}).to_list(1000)
+        query = {"agent_email": current_user.email}
     elif current_user.role == UserRole.inspector:
         # Inspectors see inspections assigned to them
-        inspections = await db.inspections.find({
+        query = {
             "$or": [
                 {"inspector_id": current_user.id},
                 {"inspector_email": current_user.email}
             ]
-        }).to_list(1000)
+        }
     else:
         raise HTTPException(status_code=403, detail="Only customers, agents, and inspectors can view their inspections")
     
-    # Add fee_amount from linked quote or manual_inspection
-    for inspection in inspections:
-        quote_id = inspection.get("quote_id")
-        logging.info(f"Processing inspection {inspection.get('id')}, quote_id: {quote_id}")
-        
-        # Check if this is a manual entry
-        if quote_id == "manual-entry":
-            # Get fee from manual_inspections collection
-            manual_inspection = await db.manual_inspections.find_one({"id": inspection["id"]})
-            if manual_inspection and manual_inspection.get("fee_amount"):
-                inspection["fee_amount"] = float(manual_inspection["fee_amount"])
-                logging.info(f"Added fee_amount from manual inspection: {inspection['fee_amount']}")
-        elif quote_id:
-            quote = await db.quotes.find_one({"id": quote_id})
-            logging.info(f"Quote found: {quote is not None}, quote_amount: {quote.get('quote_amount') if quote else 'N/A'}")
-            if quote and quote.get("quote_amount"):
-                inspection["fee_amount"] = float(quote["quote_amount"])
-                logging.info(f"Added fee_amount: {inspection['fee_amount']}")
-        else:
-            logging.info(f"Inspection {inspection.get('id')} has no quote_id")
+    etag = await list_etag(db.inspections, query, current_user.id, current_user.email, current_user.role.value, view.value)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
     
-    return [InspectionResponse(**inspection) for inspection in inspections]
+    return await find_list_view(
+        db.inspections, query, view, InspectionResponse, InspectionSummary, INSPECTION_SUMMARY_PROJECTION
+    )
 
 
 @api_router.get("/inspections/{inspection_id}", response_model=InspectionResponse)
 async def get_inspection(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get a specific inspection"""
     inspection = await db.inspections.find_one({"id": inspection_id})
@@ -1768,12 +1987,6 @@ async def get_inspection(
         if inspection.get("agent_email") != current_user.email:
             raise HTTPException(status_code=403, detail="Not authorized to view this inspection")
     
-    # Add fee_amount if it's a manual entry and not already present
-    if inspection.get("quote_id") == "manual-entry" and not inspection.get("fee_amount"):
-        manual_inspection = await db.manual_inspections.find_one({"id": inspection_id})
-        if manual_inspection and manual_inspection.get("fee_amount"):
-            inspection["fee_amount"] = float(manual_inspection["fee_amount"])
-    
     return InspectionResponse(**inspection)
 
 
@@ -1781,7 +1994,7 @@ async def get_inspection(
 async def confirm_time_slot(
     inspection_id: str,
     request_body: dict = Body(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Customer or Agent confirms a selected time slot"""
     from push_notification_service import send_push_notification
@@ -1833,10 +2046,7 @@ async def confirm_time_slot(
     
     if inspector_name:
         # Try to find inspector user by name
-        inspector_user = await db.users.find_one({
-            "role": {"$in": ["inspector", "owner"]},
-            "name": inspector_name
-        })
+        inspector_user = await staff_directory.find_by_name(inspector_name)
         if inspector_user:
             inspector_email = inspector_user.get("email")
             inspector_id = inspector_user.get("id")
@@ -1844,34 +2054,12 @@ async def confirm_time_slot(
         else:
             logging.warning(f"Could not find user for inspector name: {inspector_name}")
     
-    # Check for double-booking with same inspector
-    if inspector_name:
-        # Get all scheduled inspections for the same date
-        potential_conflicts = await db.inspections.find({
-            "id": {"$ne": inspection_id},  # Exclude current inspection
-            "status": InspectionStatus.scheduled.value,
-            "scheduled_date": scheduled_date,
-            "inspector_name": inspector_name
-        }).to_list(100)
-        
-        # Normalize the requested time
-        normalized_requested_time = normalize_time_format(scheduled_time)
-        
-        # Check if any existing inspection has a conflicting time
-        for existing in potential_conflicts:
-            existing_time = existing.get("scheduled_time", "")
-            normalized_existing_time = normalize_time_format(existing_time)
-            
-            if normalized_requested_time == normalized_existing_time:
-                raise HTTPException(
-                    status_code=409, 
-                    detail=f"Inspector {inspector_name} is already scheduled for another inspection at {scheduled_date} {scheduled_time}. Please select a different time slot or assign a different inspector."
-                )
+    slot = schedule_fields(scheduled_date, scheduled_time)
+    await check_unindexed_double_booking(inspection_id, inspector_name, slot)
     
     # Update inspection to scheduled status with inspector info
     update_fields = {
-        "scheduled_date": scheduled_date,
-        "scheduled_time": scheduled_time,
+        **slot,
         "status": InspectionStatus.scheduled.value,
         "updated_at": datetime.utcnow()
     }
@@ -1890,21 +2078,25 @@ async def confirm_time_slot(
     
     logging.info(f"Updating inspection {inspection_id} with fields: {update_fields}")
     
-    await db.inspections.update_one(
-        {"id": inspection_id},
-        {"$set": update_fields}
-    )
+    # The status guard makes a second confirmation of the same offer a no-op, and the
+    # (inspector_id, scheduled_start) unique index rejects a slot that was just taken
+    try:
+        result = await db.inspections.update_one(
+            {"id": inspection_id, "status": InspectionStatus.awaiting_customer_selection.value},
+            {"$set": update_fields}
+        )
+    except DuplicateKeyError:
+        raise double_booking_error(inspector_name, scheduled_date, scheduled_time)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Inspection is no longer awaiting customer selection")
+    await dashboard_stats.inspection_transition(InspectionStatus.awaiting_customer_selection, InspectionStatus.scheduled)
+    await conversation_store.sync_inspection(inspection_id)
     
     # Get all owners
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     
-    # Get quote information for inspection fee
-    quote = None
-    inspection_fee = None
-    if inspection.get("quote_id"):
-        quote = await db.quotes.find_one({"id": inspection["quote_id"]})
-        if quote and quote.get("quote_amount"):
-            inspection_fee = str(quote["quote_amount"])
+    # Inspection fee is stored on the inspection
+    inspection_fee = str(inspection["fee_amount"]) if inspection.get("fee_amount") else None
     
     # Prepare calendar invite details
     customer_name = inspection.get("customer_name") or current_user.name
@@ -1986,7 +2178,7 @@ async def confirm_time_slot(
 @api_router.patch("/inspections/{inspection_id}/decline-offered-times")
 async def decline_offered_times(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Customer declines offered time slots - keeps inspection, allows owner to resubmit"""
     from push_notification_service import send_push_notification
@@ -2014,9 +2206,11 @@ async def decline_offered_times(
             }
         }
     )
+    await dashboard_stats.inspection_transition(inspection.get("status"), InspectionStatus.pending_scheduling)
+    await conversation_store.sync_inspection(inspection_id)
     
     # Send push notification to all owners
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if owner.get("push_token"):
             send_push_notification(
@@ -2037,7 +2231,7 @@ async def decline_offered_times(
 async def update_agent_info(
     inspection_id: str,
     agent_data: dict,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Customer adds agent information after signing agreement"""
     if current_user.role != UserRole.customer:
@@ -2064,6 +2258,8 @@ async def update_agent_info(
             }
         }
     )
+    await refresh_search_keys(db.inspections, {"id": inspection_id})
+    await conversation_store.sync_inspection(inspection_id)
     
     logging.info(f"Agent info added to inspection {inspection_id}: {agent_data.get('agent_name')} ({agent_data.get('agent_email')})")
     
@@ -2076,7 +2272,7 @@ async def update_agent_info(
 async def add_client_info_to_inspection(
     inspection_id: str,
     client_data: dict = Body(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Agent adds client (customer) information to an inspection after selecting time slot"""
     from push_notification_service import send_push_notification
@@ -2124,10 +2320,15 @@ async def add_client_info_to_inspection(
                 "customer_email": client_email,
                 "customer_name": client_name,
                 "customer_phone": client_phone if client_phone else None,
+                **customer_contact_fields(client_email, client_phone),
                 "updated_at": datetime.utcnow()
             }
         }
     )
+    await refresh_search_keys(db.inspections, {"id": inspection_id})
+    await conversation_store.sync_inspection(inspection_id)
+    if customer_id is None:
+        await mark_unlinked_inspections()
     
     # Send "Invite to Login/Register" email to client
     try:
@@ -2162,7 +2363,7 @@ async def add_client_info_to_inspection(
         # Don't fail the request if email fails
     
     # Send push notification to owners
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if owner.get("push_token"):
             send_push_notification(
@@ -2182,7 +2383,7 @@ async def add_client_info_to_inspection(
 @api_router.delete("/inspections/{inspection_id}")
 async def decline_inspection(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Customer cancels/declines an inspection completely - deletes it"""
     from push_notification_service import send_push_notification
@@ -2223,7 +2424,7 @@ async def decline_inspection(
         logging.info(f"Calendar cancellation sent to customer: {customer_email}")
     
     # Send calendar cancellation to owner
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if scheduled_date and scheduled_time:
             owner_email = owner["email"]
@@ -2301,6 +2502,8 @@ async def decline_inspection(
     
     # Delete the inspection
     await db.inspections.delete_one({"id": inspection_id})
+    await dashboard_stats.inspection_transition(inspection.get("status"), None)
+    await conversation_store.delete_for_inspection(inspection_id)
     
     # Also update the quote status back to "quoted" so customer can re-schedule if they change their mind
     if inspection.get("quote_id"):
@@ -2323,47 +2526,35 @@ async def decline_inspection(
 
 # ============= ADMIN INSPECTION ENDPOINTS =============
 
-@api_router.get("/admin/inspections/pending-scheduling", response_model=List[InspectionResponse])
+@api_router.get("/admin/inspections/pending-scheduling", response_model=None)
 async def get_pending_inspections(
-    current_user: UserInDB = Depends(get_current_user_from_token)
-):
+    view: ListView = Query(ListView.full, description="summary for list screens, full for every field"),
+    current_user: Principal = Depends(get_current_user_from_token)
+) -> Union[List[InspectionResponse], List[InspectionSummary]]:
     """Get all pending scheduling inspections (Owner only)"""
     if current_user.role != UserRole.owner:
         raise HTTPException(status_code=403, detail="Only owners can view all inspections")
     
-    inspections = await db.inspections.find(
-        {"status": InspectionStatus.pending_scheduling.value}
-    ).to_list(1000)
-    return [InspectionResponse(**inspection) for inspection in inspections]
+    return await find_list_view(
+        db.inspections, {"status": InspectionStatus.pending_scheduling.value}, view,
+        InspectionResponse, InspectionSummary, INSPECTION_SUMMARY_PROJECTION
+    )
 
 
-@api_router.get("/admin/inspections/confirmed", response_model=List[InspectionResponse])
+@api_router.get("/admin/inspections/confirmed", response_model=None)
 async def get_confirmed_inspections(
-    current_user: UserInDB = Depends(get_current_user_from_token)
-):
+    view: ListView = Query(ListView.full, description="summary for list screens, full for every field"),
+    current_user: Principal = Depends(get_current_user_from_token)
+) -> Union[List[InspectionResponse], List[InspectionSummary]]:
     """Get all confirmed/scheduled inspections including finalized (Owner only)"""
     if current_user.role != UserRole.owner:
         raise HTTPException(status_code=403, detail="Only owners can view all inspections")
     
     # Get both scheduled and finalized inspections
-    inspections = await db.inspections.find(
-        {"status": {"$in": [InspectionStatus.scheduled.value, "finalized"]}}
-    ).to_list(1000)
-    
-    logging.info(f"Fetched {len(inspections)} inspections for owner")
-    
-    # Add fee_amount from linked quote for backward compatibility with existing data
-    for inspection in inspections:
-        if not inspection.get("fee_amount") and inspection.get("quote_id"):
-            quote = await db.quotes.find_one({"id": inspection["quote_id"]})
-            if quote and quote.get("quote_amount"):
-                inspection["fee_amount"] = float(quote["quote_amount"])
-        
-        # Log status of each inspection for debugging
-        if inspection.get("finalized") or inspection.get("status") == "finalized":
-            logging.info(f"Inspection {inspection['id']}: status={inspection.get('status')}, finalized={inspection.get('finalized')}, property={inspection.get('property_address')}")
-    
-    return [InspectionResponse(**inspection) for inspection in inspections]
+    return await find_list_view(
+        db.inspections, {"status": {"$in": [InspectionStatus.scheduled.value, "finalized"]}}, view,
+        InspectionResponse, InspectionSummary, INSPECTION_SUMMARY_PROJECTION
+    )
 
 
 @api_router.patch("/admin/inspections/{inspection_id}/set-datetime")
@@ -2371,88 +2562,111 @@ async def set_inspection_datetime(
     inspection_id: str,
     scheduled_date: str = Query(...),
     scheduled_time: str = Query(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Set date and time for an inspection (Owner only)"""
     if current_user.role != UserRole.owner:
         raise HTTPException(status_code=403, detail="Only owners can set inspection datetime")
     
-    inspection = await db.inspections.find_one({"id": inspection_id})
-    if not inspection:
-        raise HTTPException(status_code=404, detail="Inspection not found")
+    slot = schedule_fields(scheduled_date, scheduled_time)
+    # Name-only bookings are invisible to the unique index, so check by name first.
+    # Finalized, completed and cancelled inspections cannot be put back on the schedule.
+    inspection = await inspection_repository.get(inspection_id, {"_id": 0, "inspector_name": 1})
+    if inspection:
+        await check_unindexed_double_booking(inspection_id, inspection.get("inspector_name"), slot)
+    try:
+        updated_inspection = await inspection_repository.transition(
+            inspection_id,
+            to_status=InspectionStatus.scheduled,
+            from_statuses=SCHEDULABLE_STATUSES,
+            set_fields=slot
+        )
+    except DuplicateKeyError:
+        raise double_booking_error(None, scheduled_date, scheduled_time)
+    if not updated_inspection:
+        raise await inspection_transition_error(inspection_id, "Inspection can no longer be scheduled", status_code=400)
+    await dashboard_stats.inspection_transition(updated_inspection.get("previous_status"), InspectionStatus.scheduled)
+    await conversation_store.sync_inspection(inspection_id, updated_inspection)
     
-    # Update inspection
-    await db.inspections.update_one(
-        {"id": inspection_id},
-        {
-            "$set": {
-                "scheduled_date": scheduled_date,
-                "scheduled_time": scheduled_time,
-                "status": InspectionStatus.scheduled.value,
-                "updated_at": datetime.utcnow()
-            }
-        }
-    )
-    
-    updated_inspection = await db.inspections.find_one({"id": inspection_id})
     return InspectionResponse(**updated_inspection)
 
 
-@api_router.patch("/admin/inspections/{inspection_id}/offer-times")
-async def offer_time_slots(
-    inspection_id: str,
-    request_body: dict = Body(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+@api_router.get("/admin/availability")
+async def get_availability(
+    start_date: str = Query(..., description="First day, YYYY-MM-DD (Central Time)"),
+    end_date: str = Query(..., description="Last day, YYYY-MM-DD (Central Time)"),
+    inspector_ids: Optional[str] = Query(None, description="Comma-separated inspector ids (default: every owner and inspector)"),
+    inspection_id: Optional[str] = Query(None, description="Inspection being offered - its own held slots count as free"),
+    include_calendar: bool = Query(False, description="Also block slots with owners' Google Calendar events"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
-    """Offer time slots and assign inspector to customer (Owner only)"""
-    from push_notification_service import send_push_notification
+    """Free, booked and held offer slots per inspector over a date range (Owner only)"""
+    from availability_service import compute_availability, AVAILABILITY_MAX_DAYS
     
     if current_user.role != UserRole.owner:
-        raise HTTPException(status_code=403, detail="Only owners can offer time slots")
-    
-    offered_time_slots = request_body.get("offered_time_slots", [])
-    inspector_name = request_body.get("inspector_name")
-    inspector_license = request_body.get("inspector_license")
-    inspector_phone = request_body.get("inspector_phone")
-    inspection_fee = request_body.get("inspection_fee")  # For direct schedule inspections
-    
-    inspection = await db.inspections.find_one({"id": inspection_id})
-    if not inspection:
-        raise HTTPException(status_code=404, detail="Inspection not found")
-    
-    # Look up inspector email based on license or name
+        raise HTTPException(status_code=403, detail="Only owners can view inspector availability")
+    
+    first_day = parse_date_central(start_date)
+    last_day = parse_date_central(end_date)
+    if not first_day or not last_day:
+        raise HTTPException(status_code=400, detail="start_date and end_date must be YYYY-MM-DD")
+    if last_day < first_day:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (last_day - first_day).days >= AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {AVAILABILITY_MAX_DAYS} days")
+    
+    inspectors = await staff_directory.all_staff()
+    if inspector_ids:
+        wanted = {i.strip() for i in inspector_ids.split(",") if i.strip()}
+        inspectors = [inspector for inspector in inspectors if inspector["id"] in wanted]
+    
+    return await compute_availability(
+        db, inspectors, first_day, last_day,
+        include_calendar=include_calendar,
+        exclude_inspection_id=inspection_id
+    )
+
+
+async def resolve_inspector_email(inspector_name: Optional[str], inspector_license: Optional[str]) -> Optional[str]:
+    """Look up the offered inspector's email based on license or name"""
     # SPECIAL CASE: Brad Baker is the Owner AND an inspector
-    inspector_email = None
     if inspector_name == "Brad Baker" or inspector_license == "TREC #7522":
         # Brad Baker is the owner - use owner's email and ID
-        owner = await db.users.find_one({"role": UserRole.owner.value})
+        owner = await staff_directory.primary_owner()
         if owner:
-            inspector_email = owner["email"]
-            logging.info(f"Inspector is Brad Baker (Owner), using owner email: {inspector_email}")
-    else:
-        # For other inspectors (like Blake Gray), find their inspector profile
-        inspector_user = None
-        if inspector_license:
-            inspector_user = await db.users.find_one({
-                "license_number": inspector_license,
-                "role": "inspector"
-            })
-        
-        if not inspector_user and inspector_name:
-            inspector_user = await db.users.find_one({
-                "name": inspector_name,
-                "role": "inspector"
-            })
-        
-        if inspector_user:
-            inspector_email = inspector_user["email"]
-            logging.info(f"Found inspector email {inspector_email} for {inspector_name}")
+            logging.info(f"Inspector is Brad Baker (Owner), using owner email: {owner['email']}")
+            return owner["email"]
+        return None
     
-    # Update inspection with offered time slots and inspector info
+    # For other inspectors (like Blake Gray), find their inspector profile
+    inspector_user = None
+    if inspector_license:
+        inspector_user = await staff_directory.find_by_license(
+            inspector_license, roles=(UserRole.inspector.value,)
+        )
+    
+    if not inspector_user and inspector_name:
+        inspector_user = await staff_directory.find_by_name(
+            inspector_name, roles=(UserRole.inspector.value,)
+        )
+    
+    if inspector_user:
+        logging.info(f"Found inspector email {inspector_user['email']} for {inspector_name}")
+        return inspector_user["email"]
+    return None
+
+
+def offer_update_fields(
+    offered_time_slots: list,
+    inspector_name: Optional[str],
+    inspector_license: Optional[str],
+    inspector_phone: Optional[str],
+    inspector_email: Optional[str],
+    inspection_fee
+) -> dict:
+    """Inspection fields written when time slots are offered"""
     update_data = {
-        "offered_time_slots": offered_time_slots,
-        "status": "awaiting_customer_selection",  # New status
-        "updated_at": datetime.utcnow()
+        "offered_time_slots": offered_time_slots
     }
     
     if inspector_name:
@@ -2465,12 +2679,44 @@ async def offer_time_slots(
         update_data["inspector_email"] = inspector_email
     if inspection_fee is not None:
         update_data["fee_amount"] = float(inspection_fee)  # Set fee for direct schedule
+    return update_data
+
+
+@api_router.patch("/admin/inspections/{inspection_id}/offer-times")
+async def offer_time_slots(
+    inspection_id: str,
+    request_body: dict = Body(...),
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Offer time slots and assign inspector to customer (Owner only)"""
+    from push_notification_service import send_push_notification
     
-    await db.inspections.update_one(
-        {"id": inspection_id},
-        {"$set": update_data}
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Only owners can offer time slots")
+    
+    offered_time_slots = request_body.get("offered_time_slots", [])
+    inspector_name = request_body.get("inspector_name")
+    inspector_license = request_body.get("inspector_license")
+    inspector_phone = request_body.get("inspector_phone")
+    inspection_fee = request_body.get("inspection_fee")  # For direct schedule inspections
+    
+    inspector_email = await resolve_inspector_email(inspector_name, inspector_license)
+    update_data = offer_update_fields(
+        offered_time_slots, inspector_name, inspector_license, inspector_phone, inspector_email, inspection_fee
     )
     
+    # Times can be offered (or re-offered) until the customer confirms one
+    inspection = await inspection_repository.transition(
+        inspection_id,
+        to_status=InspectionStatus.awaiting_customer_selection,
+        from_statuses=(InspectionStatus.pending_scheduling, InspectionStatus.awaiting_customer_selection),
+        set_fields=update_data
+    )
+    if not inspection:
+        raise await inspection_transition_error(inspection_id, "Inspection is already scheduled or closed")
+    await dashboard_stats.inspection_transition(inspection.get("previous_status"), InspectionStatus.awaiting_customer_selection)
+    await conversation_store.sync_inspection(inspection_id)
+    
     # Send push notification to customer
     customer = await db.users.find_one({"id": inspection["customer_id"]})
     if customer and customer.get("push_token"):
@@ -2482,14 +2728,13 @@ async def offer_time_slots(
             data={"type": "time_slots_offered", "inspection_id": inspection_id}
         )
     
-    updated_inspection = await db.inspections.find_one({"id": inspection_id})
-    return InspectionResponse(**updated_inspection)
+    return InspectionResponse(**inspection)
 
 
 @api_router.post("/admin/manual-inspection", response_model=ManualInspectionResponse)
 async def create_manual_inspection(
     inspection_data: ManualInspectionCreate,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Create manual inspection entry (Owner only)"""
     from email_service import send_inspection_calendar_invite
@@ -2538,12 +2783,12 @@ async def create_manual_inspection(
         customer_email=inspection_data.client_email,
         customer_name=inspection_data.client_name,
         customer_phone=inspection_data.customer_phone,
+        **customer_contact_fields(inspection_data.client_email, inspection_data.customer_phone),
         property_address=full_address,
         preferred_date=inspection_data.inspection_date,
         preferred_time=inspection_data.inspection_time,
         status=InspectionStatus.scheduled,
-        scheduled_date=inspection_data.inspection_date,
-        scheduled_time=inspection_data.inspection_time,
+        **schedule_fields(inspection_data.inspection_date, inspection_data.inspection_time),
         fee_amount=inspection_data.fee_amount,  # Store fee directly on inspection
         agent_name=inspection_data.agent_name,  # Include agent info for agent access
         agent_email=inspection_data.agent_email,
@@ -2551,7 +2796,10 @@ async def create_manual_inspection(
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow()
     )
-    await db.inspections.insert_one(active_inspection.dict())
+    active_inspection_doc = active_inspection.dict()
+    active_inspection_doc["search_keys"] = inspection_search_keys(active_inspection_doc)
+    await db.inspections.insert_one(active_inspection_doc)
+    await dashboard_stats.inspection_transition(None, InspectionStatus.scheduled)
     
     # Send calendar invites to all parties
     owner = await db.users.find_one({"id": current_user.id})
@@ -2594,7 +2842,7 @@ async def create_manual_inspection(
 @api_router.get("/admin/manual-inspection/{inspection_id}", response_model=ManualInspectionResponse)
 async def get_manual_inspection(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get manual inspection by ID (Owner only)"""
     if current_user.role != UserRole.owner:
@@ -2611,7 +2859,7 @@ async def get_manual_inspection(
 async def update_manual_inspection(
     inspection_id: str,
     update_data: dict,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Update manual inspection (Owner only) - supports partial updates"""
     if current_user.role != UserRole.owner:
@@ -2643,8 +2891,8 @@ async def update_manual_inspection(
             "property_address": full_address,
             "customer_name": updated_manual['client_name'],
             "customer_email": updated_manual['client_email'],
-            "scheduled_date": updated_manual['inspection_date'],
-            "scheduled_time": updated_manual['inspection_time'],
+            "customer_email_normalized": normalize_email(updated_manual['client_email']),
+            **schedule_fields(updated_manual['inspection_date'], updated_manual['inspection_time']),
             "preferred_date": updated_manual['inspection_date'],  # Sync to preferred as well
             "preferred_time": updated_manual['inspection_time'],  # Sync to preferred as well
             "agent_name": updated_manual.get('agent_name'),
@@ -2652,12 +2900,18 @@ async def update_manual_inspection(
             "agent_phone": updated_manual.get('agent_phone'),
             "updated_at": datetime.utcnow()
         }
+        if updated_manual.get("fee_amount") is not None:
+            active_update["fee_amount"] = float(updated_manual["fee_amount"])
         
         # Update the corresponding inspection record
-        result = await db.inspections.update_one(
-            {"id": inspection_id},
-            {"$set": active_update}
-        )
+        try:
+            result = await db.inspections.update_one(
+                {"id": inspection_id},
+                {"$set": active_update}
+            )
+        except DuplicateKeyError:
+            raise double_booking_error(None, updated_manual['inspection_date'], updated_manual['inspection_time'])
+        await refresh_search_keys(db.inspections, {"id": inspection_id})
         
         print(f"Synced manual inspection {inspection_id} to inspections collection. Matched: {result.matched_count}, Modified: {result.modified_count}")
     
@@ -2669,7 +2923,7 @@ async def update_manual_inspection(
 async def update_regular_inspection(
     inspection_id: str,
     update_data: dict,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Update regular inspection details (Owner only) - for inspections created through normal flow"""
     from push_notification_service import send_push_notification
@@ -2708,13 +2962,40 @@ async def update_regular_inspection(
         mapped_key = field_mapping.get(key, key)
         mapped_updates[mapped_key] = value
     
+    if "customer_email" in mapped_updates:
+        mapped_updates["customer_email_normalized"] = normalize_email(mapped_updates["customer_email"])
+    if "customer_phone" in mapped_updates:
+        mapped_updates["customer_phone_e164"] = normalize_phone_e164(mapped_updates["customer_phone"])
+    
+    if "scheduled_date" in mapped_updates or "scheduled_time" in mapped_updates:
+        mapped_updates.update(schedule_fields(
+            mapped_updates.get("scheduled_date", inspection.get("scheduled_date")),
+            mapped_updates.get("scheduled_time", inspection.get("scheduled_time"))
+        ))
+    
     mapped_updates['updated_at'] = datetime.utcnow()
     
     if mapped_updates:
-        await db.inspections.update_one(
-            {"id": inspection_id},
-            {"$set": mapped_updates}
-        )
+        try:
+            await db.inspections.update_one(
+                {"id": inspection_id},
+                {"$set": mapped_updates}
+            )
+        except DuplicateKeyError:
+            raise double_booking_error(
+                mapped_updates.get("inspector_name", inspection.get("inspector_name")),
+                mapped_updates.get("scheduled_date", inspection.get("scheduled_date")),
+                mapped_updates.get("scheduled_time", inspection.get("scheduled_time"))
+            )
+        if "status" in mapped_updates:
+            await dashboard_stats.inspection_transition(inspection.get("status"), mapped_updates["status"])
+        await conversation_store.sync_inspection(inspection_id)
+        
+        if ("customer_email" in mapped_updates or "customer_phone" in mapped_updates) and not inspection.get("customer_id"):
+            await mark_unlinked_inspections()
+        
+        if {"property_address", "customer_name", "agent_name"} & mapped_updates.keys():
+            await refresh_search_keys(db.inspections, {"id": inspection_id})
         
         logging.info(f"Regular inspection {inspection_id} updated with fields: {list(mapped_updates.keys())}")
     
@@ -2793,7 +3074,7 @@ async def update_regular_inspection(
 @api_router.delete("/admin/inspections/{inspection_id}/cancel")
 async def cancel_inspection(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Cancel an inspection (Owner only)"""
     from email_service import send_inspection_calendar_cancellation
@@ -2889,10 +3170,13 @@ async def cancel_inspection(
     # Delete associated chat messages/conversations
     # Delete all messages related to this inspection
     messages_result = await db.messages.delete_many({"inspection_id": inspection_id})
+    await db.messages_archive.delete_many({"inspection_id": inspection_id})
     logging.info(f"Deleted {messages_result.deleted_count} messages for inspection {inspection_id}")
     
     # Delete the inspection
     await db.inspections.delete_one({"id": inspection_id})
+    await dashboard_stats.inspection_transition(inspection.get("status"), None)
+    await conversation_store.delete_for_inspection(inspection_id)
     
     return {
         "success": True,
@@ -2906,7 +3190,7 @@ async def reschedule_inspection(
     inspection_id: str,
     scheduled_date: str = Body(...),
     scheduled_time: str = Body(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Reschedule an inspection (Owner only)"""
     from email_service import send_inspection_calendar_invite
@@ -2921,40 +3205,24 @@ async def reschedule_inspection(
     if inspection["status"] != "scheduled":
         raise HTTPException(status_code=400, detail="Only scheduled inspections can be rescheduled")
     
-    # Check for double-booking with same inspector
+    slot = schedule_fields(scheduled_date, scheduled_time)
     inspector_name = inspection.get("inspector_name")
-    if inspector_name:
-        # Get all scheduled inspections for the same date
-        potential_conflicts = await db.inspections.find({
-            "id": {"$ne": inspection_id},  # Exclude current inspection
-            "status": InspectionStatus.scheduled.value,
-            "scheduled_date": scheduled_date,
-            "inspector_name": inspector_name
-        }).to_list(100)
-        
-        # Normalize the requested time
-        normalized_requested_time = normalize_time_format(scheduled_time)
-        
-        # Check if any existing inspection has a conflicting time
-        for existing in potential_conflicts:
-            existing_time = existing.get("scheduled_time", "")
-            normalized_existing_time = normalize_time_format(existing_time)
-            
-            if normalized_requested_time == normalized_existing_time:
-                raise HTTPException(
-                    status_code=409, 
-                    detail=f"Inspector {inspector_name} is already scheduled for another inspection at {scheduled_date} {scheduled_time}. Please select a different time slot or assign a different inspector."
-                )
+    await check_unindexed_double_booking(inspection_id, inspector_name, slot)
     
-    # Update the inspection with new date/time
-    await db.inspections.update_one(
-        {"id": inspection_id},
-        {"$set": {
-            "scheduled_date": scheduled_date,
-            "scheduled_time": scheduled_time,
-            "updated_at": datetime.utcnow().isoformat()
-        }}
-    )
+    # Update the inspection with new date/time - the unique index rejects a taken slot
+    try:
+        result = await db.inspections.update_one(
+            {"id": inspection_id, "status": InspectionStatus.scheduled.value},
+            {"$set": {
+                **slot,
+                "updated_at": datetime.utcnow().isoformat()
+            }}
+        )
+    except DuplicateKeyError:
+        raise double_booking_error(inspector_name, scheduled_date, scheduled_time)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=400, detail="Only scheduled inspections can be rescheduled")
+    await conversation_store.sync_inspection(inspection_id)
     
     # Also update manual_inspections if this is a manual entry
     if inspection.get("customer_id") == "manual-entry":
@@ -3067,7 +3335,7 @@ async def reschedule_inspection(
         logging.info(f"Calendar invite (rescheduled) sent to agent: {agent_email}")
     
     # Send push notifications to all owners
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner_user in owners:
         if owner_user.get("expo_push_token"):
             send_push_notification(
@@ -3088,12 +3356,312 @@ async def reschedule_inspection(
         "calendar_invites_sent": invites_sent
     }
 
+# ============= BULK OWNER OPERATIONS =============
+
+def double_booking_item(inspection_id: str, inspector_name: Optional[str], item) -> dict:
+    """Per-item result for a slot that is already taken"""
+    error = double_booking_error(inspector_name, item.scheduled_date, item.scheduled_time)
+    return item_result(inspection_id, error.status_code, error.detail)
+
+
+@api_router.post("/admin/inspections/bulk/offer-times", response_model=BulkOperationResponse)
+async def bulk_offer_time_slots(
+    request_body: BulkOfferTimesRequest,
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Offer time slots on many inspections in one call (Owner only) - results are per item"""
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Only owners can offer time slots")
+    
+    items = request_body.items
+    results: List[Optional[dict]] = [None] * len(items)
+    offerable = (InspectionStatus.pending_scheduling, InspectionStatus.awaiting_customer_selection)
+    
+    # Validate the whole batch with one query
+    inspections = await load_batch(
+        db.inspections, [item.inspection_id for item in items], {"_id": 0, "id": 1, "status": 1}
+    )
+    seen = set()
+    candidates = []
+    for index, item in enumerate(items):
+        inspection = inspections.get(item.inspection_id)
+        if item.inspection_id in seen:
+            results[index] = item_result(item.inspection_id, 400, "Inspection appears more than once in the batch")
+        elif not inspection:
+            results[index] = item_result(item.inspection_id, 404, "Inspection not found")
+        elif inspection["status"] not in {status.value for status in offerable}:
+            results[index] = item_result(item.inspection_id, 409, "Inspection is already scheduled or closed")
+        elif not item.offered_time_slots:
+            results[index] = item_result(item.inspection_id, 400, "No time slots offered")
+        else:
+            for slot in item.offered_time_slots:
+                slot_start, _ = scheduled_window(slot.get("date"), slot.get("time"))
+                candidates.append({
+                    "index": index,
+                    "inspection_id": item.inspection_id,
+                    "inspector_name": slot.get("inspector") or item.inspector_name,
+                    "scheduled_start": slot_start,
+                    "slot": slot
+                })
+        seen.add(item.inspection_id)
+    
+    # An offered slot must not already be booked for its inspector - offers may overlap each other
+    conflicts = await find_slot_conflicts(db.inspections, candidates, within_batch=False)
+    for index, (candidate, _) in conflicts.items():
+        slot = candidate["slot"]
+        results[index] = item_result(
+            items[index].inspection_id, 409,
+            f"{candidate['inspector_name'] or 'The inspector'} is already booked on {slot.get('date')} at {slot.get('time')}"
+        )
+    
+    # Inspector emails resolved once per distinct inspector
+    inspector_emails = {}
+    now = batch_timestamp()
+    operations = []
+    for index, item in enumerate(items):
+        if results[index] is not None:
+            continue
+        inspector = (item.inspector_name, item.inspector_license)
+        if inspector not in inspector_emails:
+            inspector_emails[inspector] = await resolve_inspector_email(*inspector)
+        operations.append((index, inspection_repository.transition_operation(
+            item.inspection_id,
+            to_status=InspectionStatus.awaiting_customer_selection,
+            from_statuses=offerable,
+            set_fields=offer_update_fields(
+                item.offered_time_slots, item.inspector_name, item.inspector_license,
+                item.inspector_phone, inspector_emails[inspector], item.inspection_fee
+            ),
+            now=now
+        )))
+    
+    failures = await apply_bulk(db.inspections, operations)
+    for index, (status_code, detail) in failures.items():
+        results[index] = item_result(items[index].inspection_id, status_code, detail)
+    
+    # One read confirms which guarded writes applied and supplies the notification fields
+    written = [index for index, _ in operations if index not in failures]
+    updated = await load_batch(
+        db.inspections, [items[index].inspection_id for index in written],
+        {"_id": 0, "id": 1, "status": 1, "previous_status": 1, "updated_at": 1, "customer_id": 1, "property_address": 1}
+    )
+    customers = await db.users.find(
+        {"id": {"$in": list({inspection.get("customer_id") for inspection in updated.values()})}},
+        {"_id": 0, "id": 1, "push_token": 1}
+    ).to_list(None)
+    push_tokens = {customer["id"]: customer.get("push_token") for customer in customers}
+    
+    notifications = NotificationBatch()
+    transitions = []
+    for index in written:
+        item = items[index]
+        inspection = updated.get(item.inspection_id)
+        if not inspection or inspection.get("updated_at") != now:
+            results[index] = item_result(item.inspection_id, 409, "Inspection changed while the batch was applied")
+            continue
+        transitions.append((inspection.get("previous_status"), InspectionStatus.awaiting_customer_selection))
+        results[index] = item_result(item.inspection_id, status=inspection["status"])
+        inspector_info = f" with {item.inspector_name}" if item.inspector_name else ""
+        notifications.push(
+            push_tokens.get(inspection.get("customer_id")),
+            title="Inspection Times Available",
+            body=f"The inspector{inspector_info} has offered {len(item.offered_time_slots)} date(s) for your inspection at {inspection.get('property_address')}",
+            data={"type": "time_slots_offered", "inspection_id": item.inspection_id}
+        )
+    
+    if transitions:
+        await dashboard_stats.inspection_transitions(transitions)
+        for result in results:
+            if result and result["success"]:
+                await conversation_store.sync_inspection(result["inspection_id"])
+    notifications.dispatch()
+    
+    logging.info(f"Bulk offer-times: {len(transitions)}/{len(items)} inspections updated")
+    return summarize(results)
+
+
+@api_router.post("/admin/inspections/bulk/reschedule", response_model=BulkOperationResponse)
+async def bulk_reschedule_inspections(
+    request_body: BulkRescheduleRequest,
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Reschedule many scheduled inspections in one call (Owner only) - results are per item"""
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Only owners can reschedule inspections")
+    
+    items = request_body.items
+    results: List[Optional[dict]] = [None] * len(items)
+    
+    # Validate the whole batch with one query
+    inspections = await load_batch(
+        db.inspections, [item.inspection_id for item in items],
+        {"_id": 0, "id": 1, "status": 1, "inspector_id": 1, "inspector_name": 1, "customer_id": 1}
+    )
+    seen = set()
+    slots = {}
+    candidates = []
+    for index, item in enumerate(items):
+        inspection = inspections.get(item.inspection_id)
+        slot = schedule_fields(item.scheduled_date, item.scheduled_time)
+        if item.inspection_id in seen:
+            results[index] = item_result(item.inspection_id, 400, "Inspection appears more than once in the batch")
+        elif not inspection:
+            results[index] = item_result(item.inspection_id, 404, "Inspection not found")
+        elif inspection["status"] != InspectionStatus.scheduled.value:
+            results[index] = item_result(item.inspection_id, 400, "Only scheduled inspections can be rescheduled")
+        elif slot["scheduled_start"] is None:
+            results[index] = item_result(item.inspection_id, 400, f"Unrecognized date/time: {item.scheduled_date} {item.scheduled_time}")
+        else:
+            slots[index] = slot
+            candidates.append({
+                "index": index,
+                "inspection_id": item.inspection_id,
+                "inspector_id": inspection.get("inspector_id"),
+                "inspector_name": inspection.get("inspector_name"),
+                "scheduled_start": slot["scheduled_start"]
+            })
+        seen.add(item.inspection_id)
+    
+    # Conflicts against booked inspections and within the batch - inspections being moved
+    # by this batch no longer hold their old slots
+    conflicts = await find_slot_conflicts(
+        db.inspections, candidates, moving_ids=[c["inspection_id"] for c in candidates]
+    )
+    for index, (candidate, _) in conflicts.items():
+        results[index] = double_booking_item(candidate["inspection_id"], candidate["inspector_name"], items[index])
+        slots.pop(index)
+    
+    now = batch_timestamp()
+    operations = [
+        (index, UpdateOne(
+            {"id": items[index].inspection_id, "status": InspectionStatus.scheduled.value},
+            {"$set": {**slot, "updated_at": now}}
+        ))
+        for index, slot in slots.items()
+    ]
+    # The unique index still rejects a slot taken concurrently (or a swap within the batch)
+    failures = await apply_bulk(db.inspections, operations)
+    for index, (status_code, detail) in failures.items():
+        results[index] = item_result(items[index].inspection_id, status_code, detail)
+    
+    written = [index for index in slots if index not in failures]
+    updated = await load_batch(
+        db.inspections, [items[index].inspection_id for index in written],
+        {
+            "_id": 0, "id": 1, "status": 1, "updated_at": 1, "customer_id": 1, "customer_name": 1,
+            "customer_email": 1, "agent_name": 1, "agent_email": 1, "inspector_name": 1, "property_address": 1
+        }
+    )
+    
+    # Keep manual entries in step, one bulk write
+    manual_operations = [
+        UpdateOne(
+            {"id": items[index].inspection_id},
+            {"$set": {
+                "inspection_date": items[index].scheduled_date,
+                "inspection_time": items[index].scheduled_time,
+                "updated_at": datetime.utcnow().isoformat()
+            }}
+        )
+        for index in written
+        if updated.get(items[index].inspection_id, {}).get("customer_id") == "manual-entry"
+    ]
+    if manual_operations:
+        await db.manual_inspections.bulk_write(manual_operations, ordered=False)
+    
+    # Recipients for every notification, one query
+    emails = {
+        email.lower()
+        for inspection in updated.values()
+        for email in (inspection.get("customer_email"), inspection.get("agent_email"))
+        if email
+    }
+    recipients = await db.users.find(
+        {"email": {"$in": list(emails)}}, {"_id": 0, "email": 1, "push_token": 1}
+    ).to_list(None)
+    push_tokens = {user["email"].lower(): user.get("push_token") for user in recipients}
+    owner = await staff_directory.get_by_id(current_user.id)
+    
+    notifications = NotificationBatch()
+    rescheduled = 0
+    for index in written:
+        item = items[index]
+        inspection = updated.get(item.inspection_id)
+        if not inspection or inspection.get("updated_at") != now:
+            results[index] = item_result(item.inspection_id, 409, "Inspection changed while the batch was applied")
+            continue
+        rescheduled += 1
+        await conversation_store.sync_inspection(item.inspection_id)
+        results[index] = item_result(
+            item.inspection_id, status=inspection["status"],
+            scheduled_date=item.scheduled_date, scheduled_time=item.scheduled_time
+        )
+        
+        property_address = inspection.get("property_address")
+        when = f"{item.scheduled_date} at {item.scheduled_time}"
+        invite = dict(
+            property_address=property_address,
+            inspection_date=item.scheduled_date,
+            inspection_time=item.scheduled_time
+        )
+        emails_sent = set()
+        
+        customer_email = inspection.get("customer_email")
+        if customer_email:
+            notifications.invite(to_email=customer_email, recipient_name=inspection.get("customer_name"), is_owner=False, **invite)
+            emails_sent.add(customer_email.lower())
+            notifications.push(
+                push_tokens.get(customer_email.lower()),
+                title="Inspection Rescheduled",
+                body=f"Your inspection at {property_address} has been rescheduled to {when}",
+                data={"type": "inspection_rescheduled", "inspection_id": item.inspection_id}
+            )
+        
+        if owner and owner["email"].lower() not in emails_sent:
+            notifications.invite(to_email=owner["email"], recipient_name=owner["name"], is_owner=True, **invite)
+            emails_sent.add(owner["email"].lower())
+        
+        inspector = await staff_directory.find_by_name(inspection.get("inspector_name"))
+        if inspector and inspector["email"].lower() not in emails_sent:
+            notifications.invite(to_email=inspector["email"], recipient_name=inspector["name"], is_owner=False, **invite)
+            emails_sent.add(inspector["email"].lower())
+            notifications.push(
+                inspector.get("push_token"),
+                title="Inspection Rescheduled",
+                body=f"Inspection at {property_address} has been rescheduled to {when}",
+                data={"type": "inspection_rescheduled", "inspection_id": item.inspection_id}
+            )
+        
+        agent_email = inspection.get("agent_email")
+        if agent_email and agent_email.lower() not in emails_sent:
+            notifications.invite(to_email=agent_email, recipient_name=inspection.get("agent_name") or "Agent", is_owner=False, **invite)
+            notifications.push(
+                push_tokens.get(agent_email.lower()),
+                title="Inspection Rescheduled",
+                body=f"Inspection at {property_address} rescheduled to {when}",
+                data={"type": "inspection_rescheduled", "inspection_id": item.inspection_id}
+            )
+    
+    if rescheduled:
+        # Owners get one summary rather than a push per inspection
+        for owner_user in await staff_directory.owners():
+            notifications.push(
+                owner_user.get("push_token"),
+                title="Inspections Rescheduled",
+                body=f"{rescheduled} inspection(s) rescheduled",
+                data={"type": "inspection_rescheduled"}
+            )
+    notifications.dispatch()
+    
+    logging.info(f"Bulk reschedule: {rescheduled}/{len(items)} inspections rescheduled")
+    return summarize(results)
+
 # ============= PRE-INSPECTION AGREEMENT ENDPOINTS =============
 
 @api_router.get("/inspections/{inspection_id}/agreement")
 async def get_agreement(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get pre-inspection agreement for customer"""
     from agreement_service import get_agreement_text
@@ -3109,13 +3677,10 @@ async def get_agreement(
     if inspection["customer_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get quote for fee amount
-    fee_amount = "425.00"  # Default
-    if inspection.get("quote_id"):
-        quote = await db.quotes.find_one({"id": inspection["quote_id"]})
-        if quote and quote.get("quote_amount"):
-            # Format to always have 2 decimal places
-            fee_amount = f"{float(quote['quote_amount']):.2f}"
+    # Fee is written onto the inspection when the quote is priced
+    if not inspection.get("fee_amount"):
+        raise HTTPException(status_code=400, detail="No fee amount set for this inspection")
+    fee_amount = f"{float(inspection['fee_amount']):.2f}"  # Always 2 decimal places
     
     # Generate agreement text with inspector info
     agreement_text = get_agreement_text(
@@ -3141,7 +3706,7 @@ async def get_agreement(
 async def sign_agreement(
     inspection_id: str,
     request_body: dict = Body(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Sign pre-inspection agreement and generate PDF"""
     from agreement_service import generate_agreement_pdf, send_agreement_email
@@ -3161,13 +3726,10 @@ async def sign_agreement(
     if inspection["customer_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get quote for fee amount
-    fee_amount = "425.00"  # Default
-    if inspection.get("quote_id"):
-        quote = await db.quotes.find_one({"id": inspection["quote_id"]})
-        if quote and quote.get("quote_amount"):
-            # Format to always have 2 decimal places
-            fee_amount = f"{float(quote['quote_amount']):.2f}"
+    # Fee is written onto the inspection when the quote is priced
+    if not inspection.get("fee_amount"):
+        raise HTTPException(status_code=400, detail="No fee amount set for this inspection")
+    fee_amount = f"{float(inspection['fee_amount']):.2f}"  # Always 2 decimal places
     
     # Generate PDF with inspector info
     try:
@@ -3242,7 +3804,7 @@ async def sign_agreement(
             emails_sent.add(inspector_email)
     
     # Send PDF to all owners (if different from inspector and customer)
-    owners = await db.users.find({"role": UserRole.owner.value}).to_list(100)
+    owners = await staff_directory.owners()
     for owner in owners:
         if owner["email"] not in emails_sent:
             send_agreement_email(
@@ -3265,7 +3827,7 @@ async def sign_agreement(
 @api_router.get("/inspections/{inspection_id}/agreement/download")
 async def download_agreement(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get a download URL for the signed agreement PDF"""
     from s3_service import get_agreement_download_url
@@ -3304,7 +3866,7 @@ async def download_agreement(
 async def upload_inspection_report(
     inspection_id: str,
     files: List[UploadFile] = File(...),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Upload multiple inspection report PDFs to S3 (Owner only)"""
     from s3_service import upload_report_to_s3
@@ -3314,9 +3876,8 @@ async def upload_inspection_report(
     if current_user.role != UserRole.owner:
         raise HTTPException(status_code=403, detail="Only owners can upload reports")
     
-    # Get inspection
-    inspection = await db.inspections.find_one({"id": inspection_id})
-    if not inspection:
+    # Check the inspection exists before uploading anything to S3
+    if not await inspection_repository.get(inspection_id, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Inspection not found")
     
     # Validate all files are PDFs
@@ -3348,25 +3909,10 @@ async def upload_inspection_report(
                 "uploaded_at": datetime.utcnow().isoformat()
             })
         
-        # Get existing report files
-        existing_files = inspection.get("report_files", [])
-        if existing_files is None:
-            existing_files = []
-        
-        # Append new files to existing
-        all_files = existing_files + uploaded_files
-        
-        # Update inspection with all report files
-        await db.inspections.update_one(
-            {"id": inspection_id},
-            {
-                "$set": {
-                    "report_files": all_files,
-                    "report_uploaded_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
+        # Append to the existing report files in one atomic write
+        inspection = await inspection_repository.push_report_files(inspection_id, uploaded_files)
+        if not inspection:
+            raise HTTPException(status_code=404, detail="Inspection not found")
         
         # Send push notification to customer
         customer = await db.users.find_one({"id": inspection["customer_id"]})
@@ -3417,7 +3963,7 @@ async def upload_inspection_report(
 @api_router.get("/inspections/{inspection_id}/report/download")
 async def download_inspection_report(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get a download URL for the inspection report PDF - with UUID-based authorization"""
     from s3_service import get_report_download_url
@@ -3473,6 +4019,9 @@ async def download_inspection_report(
 
 # ============= PAYMENT ENDPOINTS =============
 
+# A payment_pending claim older than this is treated as abandoned (the request died mid-charge)
+PAYMENT_CLAIM_TIMEOUT = timedelta(minutes=10)
+
 @app.get("/payment", response_class=HTMLResponse)
 async def serve_payment_form(
     id: str,
@@ -3492,26 +4041,41 @@ async def serve_payment_form(
 async def create_square_payment(
     inspection_id: str,
     payment_data: dict,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Create Square payment for inspection"""
     from square.client import Client
     import os
     from push_notification_service import send_push_notification
     
-    # Get inspection
-    inspection = await db.inspections.find_one({"id": inspection_id})
+    # Claim the inspection before charging so two concurrent requests cannot both reach
+    # Square; a claim left behind by a crashed request expires after PAYMENT_CLAIM_TIMEOUT
+    now = datetime.utcnow()
+    inspection = await inspection_repository.transition(
+        inspection_id,
+        set_fields={"payment_pending": True, "payment_pending_at": now},
+        guard={
+            "payment_completed": {"$ne": True},
+            "fee_amount": {"$nin": [None, 0, ""]},
+            "$or": [
+                {"payment_pending": {"$ne": True}},
+                {"payment_pending_at": {"$lt": now - PAYMENT_CLAIM_TIMEOUT}}
+            ]
+        }
+    )
     if not inspection:
-        raise HTTPException(status_code=404, detail="Inspection not found")
-    
-    # Check if already paid
-    if inspection.get("payment_completed"):
-        raise HTTPException(status_code=400, detail="Inspection already paid")
+        current = await inspection_repository.get(
+            inspection_id, {"_id": 0, "payment_completed": 1, "fee_amount": 1}
+        )
+        if not current:
+            raise HTTPException(status_code=404, detail="Inspection not found")
+        if current.get("payment_completed"):
+            raise HTTPException(status_code=400, detail="Inspection already paid")
+        if not current.get("fee_amount"):
+            raise HTTPException(status_code=400, detail="No fee amount set for this inspection")
+        raise HTTPException(status_code=409, detail="A payment for this inspection is already in progress")
     
-    # Get fee amount
     fee_amount = inspection.get("fee_amount")
-    if not fee_amount:
-        raise HTTPException(status_code=400, detail="No fee amount set for this inspection")
     
     try:
         # Initialize Square client
@@ -3537,67 +4101,107 @@ async def create_square_payment(
             }
         )
         
-        if result.is_success():
-            payment_response = result.body
-            transaction_id = payment_response['payment']['id']
-            
-            # Update inspection with payment info
-            await db.inspections.update_one(
-                {"id": inspection_id},
-                {
-                    "$set": {
-                        "payment_completed": True,
-                        "payment_date": datetime.utcnow(),
-                        "payment_transaction_id": transaction_id,
-                        "payment_amount": fee_amount,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
-            
-            # Check if inspection is also finalized - if both, send notifications
-            if inspection.get("finalized"):
-                # Send notifications to customer and agent
-                customer = await db.users.find_one({"id": inspection["customer_id"]})
-                if customer and customer.get("push_token"):
-                    send_push_notification(
-                        push_token=customer["push_token"],
-                        title="Reports Unlocked!",
-                        body=f"Payment received and reports are now available for {inspection.get('property_address')}",
-                        data={"type": "reports_unlocked", "inspection_id": inspection_id}
-                    )
-                
-                if inspection.get("agent_email"):
-                    agent = await db.users.find_one({"email": inspection["agent_email"]})
-                    if agent and agent.get("push_token"):
-                        send_push_notification(
-                            push_token=agent["push_token"],
-                            title="Reports Unlocked!",
-                            body=f"Payment received and reports are now available for {inspection.get('property_address')}",
-                            data={"type": "reports_unlocked", "inspection_id": inspection_id}
-                        )
-            
-            return {
-                "success": True,
-                "message": "Payment successful",
-                "transaction_id": transaction_id,
-                "reports_unlocked": inspection.get("finalized", False)
-            }
-        
-        elif result.is_error():
+        if result.is_error():
             error_message = result.errors[0]['detail'] if result.errors else "Payment failed"
             logging.error(f"Square payment error: {error_message}")
+            await inspection_repository.release_payment_claim(inspection_id)
             raise HTTPException(status_code=400, detail=error_message)
-            
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Payment processing error: {e}")
+        await inspection_repository.release_payment_claim(inspection_id)
         raise HTTPException(status_code=500, detail=f"Payment processing failed: {str(e)}")
+    
+    # The card has been charged - from here on the charge is always recorded
+    payment_response = result.body
+    transaction_id = payment_response['payment']['id']
+    paid_at = datetime.utcnow()
+    
+    # Record the payment unless it was completed meanwhile (e.g. an owner marked it paid)
+    paid_inspection = await inspection_repository.transition(
+        inspection_id,
+        set_fields={
+            "payment_completed": True,
+            "payment_date": paid_at,
+            "payment_transaction_id": transaction_id,
+            "payment_amount": fee_amount,
+            "payment_pending": False
+        },
+        guard={"payment_completed": {"$ne": True}}
+    )
+    if not paid_inspection:
+        # Keep the second charge on the inspection and refund it
+        refund_id = None
+        try:
+            refund = client.refunds.refund_payment(
+                body={
+                    "idempotency_key": f"duplicate-{transaction_id}",
+                    "payment_id": transaction_id,
+                    "amount_money": {"amount": amount_cents, "currency": "USD"},
+                    "reason": "Duplicate payment - inspection already paid"
+                }
+            )
+            if refund.is_success():
+                refund_id = refund.body['refund']['id']
+            else:
+                logging.error(f"Refund of duplicate Square payment {transaction_id} failed: {refund.errors}")
+        except Exception as e:
+            logging.error(f"Refund of duplicate Square payment {transaction_id} failed: {e}")
+        await inspection_repository.record_duplicate_payment(inspection_id, {
+            "transaction_id": transaction_id,
+            "amount": fee_amount,
+            "date": paid_at,
+            "refund_id": refund_id
+        })
+        logging.error(
+            f"Inspection {inspection_id} was already paid; duplicate Square payment {transaction_id} recorded"
+            f" ({'refunded as ' + refund_id if refund_id else 'refund failed - needs manual refund'})"
+        )
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"Inspection was already paid. The duplicate payment {transaction_id} "
+                + ("has been refunded." if refund_id else "has been recorded and will be refunded by the owner.")
+            )
+        )
+    
+    inspection = paid_inspection
+    
+    # Check if inspection is also finalized - if both, send notifications
+    if inspection.get("finalized"):
+        # Send notifications to customer and agent
+        customer = await db.users.find_one({"id": inspection["customer_id"]})
+        if customer and customer.get("push_token"):
+            send_push_notification(
+                push_token=customer["push_token"],
+                title="Reports Unlocked!",
+                body=f"Payment received and reports are now available for {inspection.get('property_address')}",
+                data={"type": "reports_unlocked", "inspection_id": inspection_id}
+            )
+        
+        if inspection.get("agent_email"):
+            agent = await db.users.find_one({"email": inspection["agent_email"]})
+            if agent and agent.get("push_token"):
+                send_push_notification(
+                    push_token=agent["push_token"],
+                    title="Reports Unlocked!",
+                    body=f"Payment received and reports are now available for {inspection.get('property_address')}",
+                    data={"type": "reports_unlocked", "inspection_id": inspection_id}
+                )
+    
+    return {
+        "success": True,
+        "message": "Payment successful",
+        "transaction_id": transaction_id,
+        "reports_unlocked": inspection.get("finalized", False)
+    }
 
 
 @api_router.post("/inspections/{inspection_id}/finalize")
 async def finalize_inspection(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Finalize inspection - send notifications and emails with reports (Owner/Inspector only)"""
     from push_notification_service import send_push_notification
@@ -3613,42 +4217,26 @@ async def finalize_inspection(
     if current_user.role not in [UserRole.owner, UserRole.inspector]:
         raise HTTPException(status_code=403, detail="Only owners or inspectors can finalize inspections")
     
-    # Get inspection
-    inspection = await db.inspections.find_one({"id": inspection_id})
+    # Finalize only once, and only with reports uploaded
+    inspection = await inspection_repository.transition(
+        inspection_id,
+        to_status=InspectionStatus.finalized,
+        set_fields={"finalized": True, "finalized_at": datetime.utcnow()},
+        guard={"finalized": {"$ne": True}, "report_files.0": {"$exists": True}}
+    )
     if not inspection:
-        raise HTTPException(status_code=404, detail="Inspection not found")
-    
-    # Check if already finalized
-    if inspection.get("finalized"):
-        raise HTTPException(status_code=400, detail="Inspection already finalized")
-    
-    # Check if reports exist
-    report_files = inspection.get("report_files", [])
-    if not report_files:
+        current = await inspection_repository.get(inspection_id, {"_id": 0, "finalized": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Inspection not found")
+        if current.get("finalized"):
+            raise HTTPException(status_code=400, detail="Inspection already finalized")
         raise HTTPException(status_code=400, detail="No reports uploaded yet")
+    report_files = inspection["report_files"]
     
     try:
-        # Update inspection as finalized
-        update_result = await db.inspections.update_one(
-            {"id": inspection_id},
-            {
-                "$set": {
-                    "finalized": True,
-                    "finalized_at": datetime.utcnow(),
-                    "status": "finalized",
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
-        
-        logging.info(f"Finalized inspection {inspection_id}, matched: {update_result.matched_count}, modified: {update_result.modified_count}")
-        
-        if update_result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="Inspection not found during update")
-        
-        # Fetch updated inspection to verify
-        inspection = await db.inspections.find_one({"id": inspection_id})
-        logging.info(f"Updated inspection status: {inspection.get('status')}, finalized: {inspection.get('finalized')}")
+        await dashboard_stats.inspection_transition(inspection.get("previous_status"), InspectionStatus.finalized)
+        await conversation_store.sync_inspection(inspection_id, inspection)
+        logging.info(f"Finalized inspection {inspection_id}, previous status: {inspection.get('previous_status')}")
         
         property_address = inspection.get("property_address", "the property")
         inspector_name = inspection.get("inspector_name", "Brad Baker")
@@ -3890,7 +4478,7 @@ www.beneficialinspects.com"""
 @api_router.get("/reports/{inspection_id}")
 async def get_inspection_reports(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """
     Get all report files for an inspection.
@@ -3970,7 +4558,7 @@ async def get_inspection_reports(
 async def mark_inspection_paid(
     inspection_id: str,
     payment_method: str = Query(..., description="Payment method: Cash, Check, Card/Mobile Tap"),
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Mark inspection as paid (Owner only)"""
     from push_notification_service import send_push_notification
@@ -3979,36 +4567,27 @@ async def mark_inspection_paid(
     if current_user.role != UserRole.owner:
         raise HTTPException(status_code=403, detail="Only owners can mark inspections as paid")
     
-    # Get inspection
-    inspection = await db.inspections.find_one({"id": inspection_id})
-    if not inspection:
-        raise HTTPException(status_code=404, detail="Inspection not found")
-    
-    # Check if already paid
-    if inspection.get("is_paid"):
-        raise HTTPException(status_code=400, detail="Inspection already marked as paid")
-    
     # Validate payment method
     valid_methods = ["Cash", "Check", "Card/Mobile Tap"]
     if payment_method not in valid_methods:
         raise HTTPException(status_code=400, detail=f"Invalid payment method. Must be one of: {', '.join(valid_methods)}")
     
+    # Mark as paid only once; the amount is copied from the stored fee in the same write
+    inspection = await inspection_repository.transition(
+        inspection_id,
+        set_fields={
+            "is_paid": True,
+            "payment_completed": True,
+            "payment_method": payment_method,
+            "payment_date": datetime.utcnow()
+        },
+        set_expressions={"payment_amount": {"$ifNull": ["$fee_amount", None]}},
+        guard={"is_paid": {"$ne": True}}
+    )
+    if not inspection:
+        raise await inspection_transition_error(inspection_id, "Inspection already marked as paid", status_code=400)
+    
     try:
-        # Update inspection as paid
-        await db.inspections.update_one(
-            {"id": inspection_id},
-            {
-                "$set": {
-                    "is_paid": True,
-                    "payment_completed": True,
-                    "payment_method": payment_method,
-                    "payment_date": datetime.utcnow(),
-                    "payment_amount": inspection.get("fee_amount"),
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
-        
         logging.info(f"Inspection {inspection_id} marked as paid via {payment_method}")
         
         # Send push notification to customer
@@ -4171,22 +4750,37 @@ www.beneficialinspects.com"""
 
 # ============= CHAT/MESSAGE ENDPOINTS =============
 
+CONVERSATIONS_PAGE_SIZE = int(os.getenv("CONVERSATIONS_PAGE_SIZE", "100"))
+# The app does not page chats yet, so a page holds every message it used to load at once
+MESSAGES_PAGE_SIZE = int(os.getenv("MESSAGES_PAGE_SIZE", "1000"))
+
+
+def set_message_cursors(response: Response, messages: List[dict], next_cursor: Optional[str]):
+    """X-Next-Cursor continues in the direction paged; X-Latest-Cursor fetches anything newer later"""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if messages:
+        response.headers["X-Latest-Cursor"] = encode_cursor(messages[-1]["created_at"], messages[-1]["id"])
+
+
 @api_router.post("/messages", response_model=MessageResponse)
 async def send_message(
     message_data: MessageCreate,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Send a message - either to owner (general) or to inspector (inspection-specific)"""
-    from push_notification_service import send_push_notification
     from datetime import timedelta
     
     recipient_id = message_data.recipient_id
     recipient_role = None
+    recipient_name = None
     expires_at = None
+    inspection = None
+    customer = None  # The customer/agent side of the conversation
     
     # If inspection_id is provided, this is an inspector chat
     if message_data.inspection_id:
-        inspection = await db.inspections.find_one({"id": message_data.inspection_id})
+        inspection = await participant_resolver.inspection(message_data.inspection_id)
         if not inspection:
             raise HTTPException(status_code=404, detail="Inspection not found")
         
@@ -4206,35 +4800,47 @@ async def send_message(
         
         # Determine recipient (inspector from inspection or owner)
         if not recipient_id:
-            # Try to get inspector email directly from inspection
-            inspector_email = inspection.get("inspector_email")
-            if inspector_email:
-                inspector_user = await db.users.find_one({"email": inspector_email})
-                if inspector_user:
-                    recipient_id = inspector_user["id"]
-                    recipient_role = UserRole.inspector
+            # Inspector account resolved from the inspection's inspector_email
+            inspector_user = inspection.get("inspector")
+            if inspector_user:
+                recipient_id = inspector_user["id"]
+                recipient_role = UserRole.inspector
+                recipient_name = inspector_user["name"]
         
         if not recipient_id:
             # Default to owner if no inspector
-            owner = await db.users.find_one({"role": UserRole.owner.value})
+            owner = await staff_directory.primary_owner()
             if owner:
                 recipient_id = owner["id"]
                 recipient_role = UserRole.owner
+                recipient_name = owner["name"]
+        
+        customer = {
+            "id": inspection.get("customer_id"),
+            "name": inspection.get("customer_name"),
+            "phone": inspection.get("customer_phone")
+        }
     else:
         # General owner chat (no inspection)
         # If recipient_id is already provided (owner sending to customer/agent), preserve it
         if message_data.recipient_id:
             recipient_id = message_data.recipient_id
             # Determine recipient role by looking up the user
-            recipient_user = await db.users.find_one({"id": recipient_id})
+            recipient_user = await participant_resolver.user(recipient_id)
             if recipient_user:
                 recipient_role = UserRole(recipient_user["role"])
+                recipient_name = recipient_user["name"]
+                if current_user.role == UserRole.owner and recipient_role != UserRole.owner:
+                    customer = {"id": recipient_user["id"], "name": recipient_user["name"], "phone": recipient_user.get("phone")}
         else:
             # If no recipient_id provided (customer/agent sending to owner), default to owner
-            owner = await db.users.find_one({"role": UserRole.owner.value})
+            owner = await staff_directory.primary_owner()
             if owner:
                 recipient_id = owner["id"]
                 recipient_role = UserRole.owner
+                recipient_name = owner["name"]
+        if current_user.role != UserRole.owner:
+            customer = {"id": current_user.id, "name": current_user.name, "phone": current_user.phone}
         expires_at = datetime.utcnow() + timedelta(days=30)  # General chats last longer
     
     message_id = str(uuid.uuid4())
@@ -4254,12 +4860,13 @@ async def send_message(
     
     await db.messages.insert_one(message.dict())
     
-    # Send push notification to recipient
+    # Send push notification to recipient (Expo call off the event loop, after the response)
     if recipient_id:
-        recipient_user = await db.users.find_one({"id": recipient_id})
-        if recipient_user and recipient_user.get("expo_push_token"):
-            send_push_notification(
-                expo_token=recipient_user["expo_push_token"],
+        recipient_user = await participant_resolver.user(recipient_id)
+        if recipient_user and recipient_user.get("push_token"):
+            notifications = NotificationBatch()
+            notifications.push(
+                recipient_user["push_token"],
                 title=f"New message from {current_user.name}",
                 body=message_data.message_text[:100],
                 data={
@@ -4268,6 +4875,7 @@ async def send_message(
                     "conversation_type": "inspector_chat" if message_data.inspection_id else "owner_chat"
                 }
             )
+            notifications.dispatch()
     
     # Emit Socket.IO event for real-time message delivery
     recipient_ids = []
@@ -4275,7 +4883,13 @@ async def send_message(
         recipient_ids.append(recipient_id)
     # Also notify sender for immediate feedback
     recipient_ids.append(current_user.id)
-    await emit_new_message(message.dict(), recipient_ids)
+    fan_out = [emit_new_message(message.dict(), recipient_ids)]
+    
+    # Owner-to-owner general chats have no customer side and no conversation
+    if inspection or customer:
+        staff_name = current_user.name if current_user.role in (UserRole.owner, UserRole.inspector) else recipient_name
+        fan_out.append(conversation_store.record_message(message.dict(), customer, inspection, staff_name))
+    await asyncio.gather(*fan_out)
     
     return MessageResponse(**message.dict())
 
@@ -4283,9 +4897,16 @@ async def send_message(
 @api_router.get("/messages/{inspection_id}", response_model=List[MessageResponse])
 async def get_messages(
     inspection_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    response: Response,
+    limit: int = Query(MESSAGES_PAGE_SIZE, ge=1, le=1000, description="Messages per page"),
+    before: Optional[str] = Query(None, description="X-Next-Cursor of a page - loads older messages"),
+    after: Optional[str] = Query(None, description="X-Latest-Cursor of a page - loads newer messages"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
-    """Get all messages for an inspection"""
+    """
+    Get an inspection's messages, newest page first (each page oldest first)
+    X-Next-Cursor is set when more messages exist in the direction paged
+    """
     # Verify user has access to this inspection
     inspection = await db.inspections.find_one({"id": inspection_id})
     if not inspection:
@@ -4295,414 +4916,112 @@ async def get_messages(
     if current_user.role == UserRole.customer and inspection["customer_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Mark messages as read for current user
-    await db.messages.update_many(
-        {
-            "inspection_id": inspection_id,
-            "sender_id": {"$ne": current_user.id},
-            "is_read": False
-        },
-        {"$set": {"is_read": True}}
-    )
+    # Mark the chat as read for current user
+    await read_states.mark_read(current_user, conversation_id(inspection_id, None))
+    await conversation_store.mark_read([conversation_id(inspection_id, None)], current_user)
     
-    messages = await db.messages.find({"inspection_id": inspection_id}).sort("created_at", 1).to_list(1000)
+    messages, next_cursor = await find_page(
+        db.messages, {"inspection_id": inspection_id}, "created_at", "id", limit, before, after
+    )
+    await read_states.apply_receipts(messages)
+    set_message_cursors(response, messages, next_cursor)
     return [MessageResponse(**msg) for msg in messages]
 
 
 @api_router.get("/messages/owner/chat", response_model=List[MessageResponse])
 async def get_owner_chat_messages(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    response: Response,
+    limit: int = Query(MESSAGES_PAGE_SIZE, ge=1, le=1000, description="Messages per page"),
+    before: Optional[str] = Query(None, description="X-Next-Cursor of a page - loads older messages"),
+    after: Optional[str] = Query(None, description="X-Latest-Cursor of a page - loads newer messages"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
-    """Get all messages for owner chat (no inspection_id)"""
+    """Get owner chat messages (no inspection_id), paged like get_messages"""
     
     if current_user.role == UserRole.owner:
         # Owners see ALL owner chat messages (regardless of which specific owner ID)
-        # Mark all unread owner chat messages as read
-        await db.messages.update_many(
-            {
-                "inspection_id": None,
-                "recipient_role": UserRole.owner.value,
-                "is_read": False
-            },
-            {"$set": {"is_read": True}}
-        )
+        # Mark every owner chat as read (for all owners)
+        await read_states.mark_read(current_user, OWNERS_CHAT_VIEW)
+        await conversation_store.mark_owner_chats_read()
         
-        # Get all owner chat messages (no inspection_id, sent to or from any owner)
-        messages = await db.messages.find({
+        # Owner chat messages (no inspection_id, sent to or from any owner)
+        query = {
             "inspection_id": None,
             "$or": [
                 {"recipient_role": UserRole.owner.value},
                 {"sender_role": UserRole.owner.value}
             ]
-        }).sort("created_at", 1).to_list(1000)
+        }
     else:
         # Customers/others see messages between them and ANY owner
-        # Mark messages as read for current user
-        await db.messages.update_many(
-            {
-                "inspection_id": None,
-                "sender_role": UserRole.owner.value,
-                "recipient_id": current_user.id,
-                "is_read": False
-            },
-            {"$set": {"is_read": True}}
-        )
+        # Mark the chat as read for current user
+        await read_states.mark_read(current_user, conversation_id(None, current_user.id))
+        await conversation_store.mark_read([conversation_id(None, current_user.id)], current_user)
         
-        # Get messages between current user and any owner (no inspection_id)
-        messages = await db.messages.find({
+        # Messages between current user and any owner (no inspection_id)
+        query = {
             "inspection_id": None,
             "$or": [
                 {"sender_id": current_user.id, "recipient_role": UserRole.owner.value},
                 {"sender_role": UserRole.owner.value, "recipient_id": current_user.id}
             ]
-        }).sort("created_at", 1).to_list(1000)
+        }
     
+    messages, next_cursor = await find_page(db.messages, query, "created_at", "id", limit, before, after)
+    await read_states.apply_receipts(messages)
+    set_message_cursors(response, messages, next_cursor)
     return [MessageResponse(**msg) for msg in messages]
 
 
 @api_router.get("/conversations", response_model=List[ConversationSummary])
 async def get_conversations(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    request: Request,
+    response: Response,
+    limit: int = Query(CONVERSATIONS_PAGE_SIZE, ge=1, le=500, description="Conversations per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
-    """Get all conversations for current user - both owner chats and inspector chats"""
-    from datetime import datetime as dt
-    
-    conversations = []
-    now = dt.utcnow()
-    
-    # Owner sees messages where they are the recipient
-    # Inspector sees messages where they are the recipient
-    # Customer sees their own sent messages (grouped by recipient)
-    
-    if current_user.role in [UserRole.owner, UserRole.inspector, UserRole.agent]:
-        # Get all messages where current user is the recipient OR any owner is the recipient (for owner role)
-        if current_user.role == UserRole.owner:
-            # Owners see ALL messages sent to ANY owner OR sent to them as inspector
-            messages = await db.messages.find({
-                "$and": [
-                    {
-                        "$or": [
-                            {"recipient_role": UserRole.owner.value},  # Messages to any owner
-                            {"recipient_id": current_user.id},  # Messages to them as inspector
-                        ]
-                    },
-                    {
-                        "$or": [
-                            {"expires_at": {"$gt": now}},
-                            {"expires_at": None}
-                        ]
-                    }
-                ]
-            }).to_list(1000)
-        elif current_user.role == UserRole.agent:
-            # Agents see messages for inspections they are assigned to
-            # First, get all inspection IDs where this agent is assigned
-            assigned_inspections = await db.inspections.find({
-                "agent_email": current_user.email
-            }).to_list(1000)
-            assigned_inspection_ids = [insp["id"] for insp in assigned_inspections]
-            
-            # Get messages for their assigned inspections
-            messages = await db.messages.find({
-                "$and": [
-                    {
-                        "inspection_id": {"$in": assigned_inspection_ids}  # Messages for their assigned inspections
-                    },
-                    {
-                        "$or": [
-                            {"expires_at": {"$gt": now}},
-                            {"expires_at": None}
-                        ]
-                    }
-                ]
-            }).to_list(1000)
-        else:
-            # Inspectors see messages where they are the recipient OR inspections they are assigned to
-            # First, get all inspection IDs where this inspector is assigned
-            assigned_inspections = await db.inspections.find({
-                "inspector_id": current_user.id
-            }).to_list(1000)
-            assigned_inspection_ids = [insp["id"] for insp in assigned_inspections]
-            
-            # Get messages where they are the recipient OR messages for their assigned inspections
-            messages = await db.messages.find({
-                "$and": [
-                    {
-                        "$or": [
-                            {"recipient_id": current_user.id},  # Direct messages to them
-                            {"inspection_id": {"$in": assigned_inspection_ids}}  # Messages for their assigned inspections
-                        ]
-                    },
-                    {
-                        "$or": [
-                            {"expires_at": {"$gt": now}},
-                            {"expires_at": None}
-                        ]
-                    }
-                ]
-            }).to_list(1000)
-        
-        # Group by sender (customer) and inspection_id
-        conversation_map = {}
-        for msg in messages:
-            # Create unique conversation key
-            if msg.get("inspection_id"):
-                conv_key = f"inspector_{msg['inspection_id']}"
-            else:
-                # For owner chats, group by the CUSTOMER (non-owner participant)
-                # If sender is not owner, use sender_id; if sender is owner, use recipient_id
-                if msg.get("sender_role") != UserRole.owner.value:
-                    customer_id = msg["sender_id"]
-                else:
-                    customer_id = msg.get("recipient_id")
-                
-                conv_key = f"owner_{customer_id}"
-            
-            if conv_key not in conversation_map:
-                # For owner chat, set the customer as the "sender" for the conversation
-                # For inspector chat, we'll get customer from inspection later
-                sender_id = customer_id if not msg.get("inspection_id") else None
-                
-                conversation_map[conv_key] = {
-                    "messages": [],
-                    "inspection_id": msg.get("inspection_id"),
-                    "sender_id": sender_id,
-                    "conversation_type": "inspector_chat" if msg.get("inspection_id") else "owner_chat"
-                }
-            conversation_map[conv_key]["messages"].append(msg)
-        
-        # Build conversation summaries
-        for conv_key, conv_data in conversation_map.items():
-            messages_list = conv_data["messages"]
-            messages_list.sort(key=lambda x: x["created_at"], reverse=True)
-            last_msg = messages_list[0]
-            
-            # Get sender (customer) info
-            # For inspector chats, get customer from inspection; for owner chats, use sender_id
-            if conv_data["conversation_type"] == "inspector_chat" and conv_data["inspection_id"]:
-                # Get customer from inspection
-                inspection = await db.inspections.find_one({"id": conv_data["inspection_id"]})
-                if not inspection:
-                    continue
-                customer_id = inspection.get("customer_id")
-                sender = await db.users.find_one({"id": customer_id})
-                if not sender:
-                    continue
-            else:
-                # For owner chats, use the sender_id
-                sender = await db.users.find_one({"id": conv_data["sender_id"]})
-                if not sender:
-                    continue
-                
-                # Skip if the "customer" is actually an owner (orphaned conversation)
-                if sender.get("role") == UserRole.owner.value:
-                    continue
-            
-            # Get inspection details if applicable
-            inspection_details = {}
-            if conv_data["inspection_id"]:
-                inspection = await db.inspections.find_one({"id": conv_data["inspection_id"]})
-                if not inspection:
-                    # Skip conversations for deleted/canceled inspections
-                    logging.info(f"Skipping conversation {conv_key} - inspection {conv_data['inspection_id']} no longer exists")
-                    continue
-                
-                # Skip conversations for finalized or cancelled inspections
-                if inspection.get("status") in [InspectionStatus.finalized.value, InspectionStatus.cancelled.value]:
-                    logging.info(f"Skipping conversation {conv_key} - inspection {conv_data['inspection_id']} is {inspection.get('status')}")
-                    continue
-                    
-                if inspection:
-                    inspection_details = {
-                        "property_address": inspection.get("property_address"),
-                        "inspection_date": inspection.get("scheduled_date"),
-                        "inspection_time": inspection.get("scheduled_time"),
-                        "inspector_name": inspection.get("inspector_name")
-                    }
-            
-            # Count unread
-            unread = sum(1 for m in messages_list if not m.get("is_read", False))
-            
-            conversation = ConversationSummary(
-                id=conv_key,
-                conversation_type=conv_data["conversation_type"],
-                inspection_id=conv_data["inspection_id"],
-                property_address=inspection_details.get("property_address"),
-                customer_name=sender["name"],
-                customer_id=sender["id"],
-                customer_phone=sender.get("phone"),
-                inspector_name=inspection_details.get("inspector_name"),
-                last_message=last_msg["message_text"],
-                last_message_time=last_msg["created_at"],
-                unread_count=unread,
-                expires_at=last_msg.get("expires_at"),
-                inspection_date=inspection_details.get("inspection_date"),
-                inspection_time=inspection_details.get("inspection_time")
-            )
-            conversations.append(conversation)
-    
-    elif current_user.role == UserRole.customer:
-        # Customers see:
-        # 1. Messages they sent
-        # 2. Messages for inspections where they are the customer
-        
-        # Get all inspections where customer is involved
-        customer_inspections = await db.inspections.find({
-            "customer_id": current_user.id
-        }).to_list(1000)
-        customer_inspection_ids = [insp["id"] for insp in customer_inspections]
-        
-        # Get messages where customer sent them OR messages for their inspections
-        messages = await db.messages.find({
-            "$and": [
-                {
-                    "$or": [
-                        {"sender_id": current_user.id},  # Messages they sent
-                        {"inspection_id": {"$in": customer_inspection_ids}}  # Messages for their inspections
-                    ]
-                },
-                {
-                    "$or": [
-                        {"expires_at": {"$gt": now}},
-                        {"expires_at": None}
-                    ]
-                }
-            ]
-        }).to_list(1000)
-        
-        # Group by inspection_id or recipient
-        conversation_map = {}
-        for msg in messages:
-            if msg.get("inspection_id"):
-                conv_key = f"inspector_{msg['inspection_id']}"
-            else:
-                conv_key = f"owner_{msg.get('recipient_id', 'general')}"
-            
-            if conv_key not in conversation_map:
-                conversation_map[conv_key] = {
-                    "messages": [],
-                    "inspection_id": msg.get("inspection_id"),
-                    "recipient_id": msg.get("recipient_id"),
-                    "conversation_type": "inspector_chat" if msg.get("inspection_id") else "owner_chat"
-                }
-            conversation_map[conv_key]["messages"].append(msg)
-        
-        # Build summaries
-        for conv_key, conv_data in conversation_map.items():
-            messages_list = conv_data["messages"]
-            messages_list.sort(key=lambda x: x["created_at"], reverse=True)
-            last_msg = messages_list[0]
-            
-            # Get recipient info - for owner chat, always show the current active owner
-            recipient_name = "Owner"
-            if conv_data["conversation_type"] == "owner_chat":
-                # For owner chats, always get the current active owner (not the deleted one)
-                current_owner = await db.users.find_one({"role": UserRole.owner.value})
-                if current_owner:
-                    recipient_name = current_owner["name"]
-            elif conv_data["recipient_id"]:
-                # For inspector chats, use the specific recipient
-                recipient = await db.users.find_one({"id": conv_data["recipient_id"]})
-                if recipient:
-                    recipient_name = recipient["name"]
-            
-            # Get inspection details
-            inspection_details = {}
-            if conv_data["inspection_id"]:
-                inspection = await db.inspections.find_one({"id": conv_data["inspection_id"]})
-                if not inspection:
-                    # Skip conversations for deleted/canceled inspections
-                    logging.info(f"Skipping customer conversation {conv_key} - inspection {conv_data['inspection_id']} no longer exists")
-                    continue
-                
-                # Skip conversations for finalized or cancelled inspections
-                if inspection.get("status") in [InspectionStatus.finalized.value, InspectionStatus.cancelled.value]:
-                    logging.info(f"Skipping customer conversation {conv_key} - inspection {conv_data['inspection_id']} is {inspection.get('status')}")
-                    continue
-                    
-                if inspection:
-                    inspection_details = {
-                        "property_address": inspection.get("property_address"),
-                        "inspection_date": inspection.get("scheduled_date"),
-                        "inspection_time": inspection.get("scheduled_time"),
-                        "inspector_name": inspection.get("inspector_name")
-                    }
-            
-            conversation = ConversationSummary(
-                id=conv_key,
-                conversation_type=conv_data["conversation_type"],
-                inspection_id=conv_data["inspection_id"],
-                property_address=inspection_details.get("property_address"),
-                customer_name=recipient_name,  # For customer view, show recipient name
-                customer_id=current_user.id,
-                customer_phone=getattr(current_user, 'phone', None),
-                inspector_name=inspection_details.get("inspector_name"),
-                last_message=last_msg["message_text"],
-                last_message_time=last_msg["created_at"],
-                unread_count=0,  # Customer sees their own messages
-                expires_at=last_msg.get("expires_at"),
-                inspection_date=inspection_details.get("inspection_date"),
-                inspection_time=inspection_details.get("inspection_time")
-            )
-            conversations.append(conversation)
+    """
+    Get conversations for current user - both owner chats and inspector chats, most recent first
+    Reads the materialized conversations collection; X-Next-Cursor is set when more pages exist
+    """
+    # Customers see their general chat as a chat with the current owner
+    owner_name = None
+    if current_user.role in [UserRole.customer, UserRole.agent]:
+        owner = await staff_directory.primary_owner()
+        owner_name = owner["name"] if owner else None
+    
+    # Every message, read, inspection change and name change updates the caller's
+    # conversation documents (updated_at), so they alone version the list
+    etag = await list_etag(
+        db.conversations, conversation_store.list_query(current_user),
+        current_user.id, current_user.email, current_user.role.value, owner_name, limit, cursor
+    )
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
     
-    # Sort by last message time
-    conversations.sort(key=lambda x: x.last_message_time or datetime.min, reverse=True)
+    conversations, next_cursor = await conversation_store.list_for(current_user, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    return conversations
+    return [ConversationSummary(**conversation_summary(c, current_user, owner_name)) for c in conversations]
 
 
 @api_router.get("/conversations/unread-count")
-async def get_unread_count(
-    current_user: UserInDB = Depends(get_current_user_from_token)
-):
-    """Get total unread message count - only for valid inspections"""
-    from datetime import datetime as dt
-    
-    # Get all unread messages not sent by current user
-    unread_messages = await db.messages.find({
-        "sender_id": {"$ne": current_user.id},
-        "is_read": False,
-        "$or": [
-            {"expires_at": {"$gt": dt.utcnow()}},
-            {"expires_at": None}
-        ]
-    }).to_list(1000)
-    
-    logging.info(f"User {current_user.email} ({current_user.role}): Found {len(unread_messages)} total unread messages")
-    
-    # Filter out messages from deleted, finalized, or cancelled inspections
-    valid_count = 0
-    filtered_out = 0
-    for msg in unread_messages:
-        msg_id = msg.get("id", "unknown")
-        inspection_id = msg.get("inspection_id")
-        
-        if inspection_id:
-            # Check if inspection still exists AND is not finalized/cancelled
-            inspection = await db.inspections.find_one({"id": inspection_id})
-            if not inspection:
-                logging.info(f"  Message {msg_id}: FILTERED - inspection {inspection_id} not found")
-                filtered_out += 1
-            elif inspection.get("status") in [InspectionStatus.finalized.value, InspectionStatus.cancelled.value]:
-                logging.info(f"  Message {msg_id}: FILTERED - inspection {inspection_id} status is {inspection.get('status')}")
-                filtered_out += 1
-            else:
-                logging.info(f"  Message {msg_id}: COUNTED - inspection {inspection_id} status is {inspection.get('status')}")
-                valid_count += 1
-        else:
-            # Non-inspection messages (owner chats) are always valid
-            logging.info(f"  Message {msg_id}: COUNTED - owner chat (no inspection_id)")
-            valid_count += 1
-    
-    logging.info(f"User {current_user.email}: Returning {valid_count} valid unread messages (filtered {filtered_out})")
-    return {"unread_count": valid_count}
+async def get_unread_count(current_user: Principal = Depends(get_current_user_from_token)):
+    """
+    Get total unread message count - only for open inspections
+    Clients get every change as an `unread_count` Socket.IO event; this is for the
+    initial value and for reconciling after a reconnect.
+    """
+    return {"unread_count": await unread_counters.get(current_user)}
 
 
 @api_router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Delete a conversation and all its messages (Owner only, owner_chat type only)"""
     # Only owners can delete conversations
@@ -4718,7 +5037,7 @@ async def delete_conversation(
             # Delete all messages where:
             # - sender is the customer and recipient is owner, OR
             # - sender is owner and recipient is the customer
-            delete_result = await db.messages.delete_many({
+            owner_chat_query = {
                 "$or": [
                     {
                         "sender_id": customer_id,
@@ -4731,7 +5050,10 @@ async def delete_conversation(
                         "inspection_id": None  # Only delete owner chats, not inspection chats
                     }
                 ]
-            })
+            }
+            delete_result = await db.messages.delete_many(owner_chat_query)
+            await db.messages_archive.delete_many(owner_chat_query)
+            await conversation_store.delete(conversation_id)
             
             logging.info(f"Deleted {delete_result.deleted_count} messages for owner chat with customer {customer_id}")
             
@@ -4759,7 +5081,7 @@ from fastapi.responses import RedirectResponse
 
 @api_router.get("/auth/google/login")
 async def google_login(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Initiate Google OAuth flow"""
     if current_user.role != UserRole.owner:
@@ -4799,7 +5121,7 @@ async def google_callback(code: str, state: str):
 async def get_calendar(
     start_date: str = None,
     end_date: str = None,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get Google Calendar events for owner"""
     if current_user.role != UserRole.owner:
@@ -4838,7 +5160,7 @@ async def get_calendar(
 
 @api_router.get("/calendar/status")
 async def calendar_status(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Check if user has connected Google Calendar"""
     user_dict = await db.users.find_one({"id": current_user.id})
@@ -4854,24 +5176,34 @@ async def calendar_status(
 
 @api_router.get("/admin/dashboard/stats")
 async def get_dashboard_stats(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """Get dashboard statistics (Owner only)"""
     if current_user.role != UserRole.owner:
         raise HTTPException(status_code=403, detail="Only owners can view dashboard stats")
     
-    pending_quotes_count = await db.quotes.count_documents({"status": QuoteStatus.pending.value})
-    pending_scheduling_count = await db.inspections.count_documents(
-        {"status": InspectionStatus.pending_scheduling.value}
-    )
-    active_inspections_count = await db.inspections.count_documents(
-        {"status": InspectionStatus.scheduled.value}
-    )
+    # Maintained incrementally and reconciled periodically - see dashboard_stats.py
+    return await dashboard_stats.get()
+
+
+@api_router.get("/admin/runtime/stats")
+async def get_runtime_stats(
+    current_user: Principal = Depends(get_current_user_from_token)
+):
+    """Get in-process cache and worker pool counters (Owner only)"""
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Only owners can view runtime stats")
+    
+    from s3_service import presigned_url_cache
     
     return {
-        "pending_quotes": pending_quotes_count,
-        "pending_scheduling": pending_scheduling_count,
-        "active_inspections": active_inspections_count
+        "principal": principal_cache.stats(),
+        "staff_directory": staff_directory.stats(),
+        "dashboard_stats": dashboard_stats.stats(),
+        "message_archive": message_archiver.stats(),
+        "participants": participant_resolver.stats(),
+        "presigned_urls": presigned_url_cache.stats(),
+        "password_hash_pool": get_hash_pool_stats()
     }
 
 
@@ -4880,7 +5212,7 @@ async def get_dashboard_stats(
 
 @api_router.get("/users/export-data")
 async def export_user_data(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """
     Export all user data in JSON format (GDPR Article 20 - Right to Data Portability)
@@ -4944,7 +5276,14 @@ async def export_user_data(
             ]
         })
         messages = await messages_cursor.to_list(length=10000)
-        messages = [{k: v for k, v in msg.items() if k != '_id'} for msg in messages]
+        # Expired messages moved out of the hot collection are still the user's data
+        messages += await db.messages_archive.find({
+            "$or": [
+                {"sender_id": user_id},
+                {"recipient_id": user_id}
+            ]
+        }).to_list(length=10000)
+        messages = [{k: v for k, v in msg.items() if k not in ('_id', 'archived_at')} for msg in messages]
         
         # Compile complete data export
         export_data = {
@@ -4969,7 +5308,7 @@ async def export_user_data(
 @api_router.delete("/users/delete-account")
 async def delete_user_account(
     password: str,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """
     Permanently delete user account and all associated data (GDPR Article 17 - Right to Erasure)
@@ -4987,21 +5326,20 @@ async def delete_user_account(
     
     # Verify password for security
     user_doc = await db.users.find_one({"id": user_id})
-    if not user_doc or not verify_password(password, user_doc["hashed_password"]):
+    if not user_doc or not await verify_password_async(password, user_doc["hashed_password"]):
         raise HTTPException(status_code=401, detail="Invalid password")
     
     try:
         logging.info(f"Account deletion initiated for user {user_id}")
         
         # 1. Anonymize messages (preserve chat history for other users)
-        await db.messages.update_many(
-            {"sender_id": user_id},
-            {"$set": {
-                "sender_id": "deleted_user",
-                "sender_name": "Deleted User",
-                "message": "[Message deleted - User account removed]"
-            }}
-        )
+        anonymized = {"$set": {
+            "sender_id": "deleted_user",
+            "sender_name": "Deleted User",
+            "message": "[Message deleted - User account removed]"
+        }}
+        await db.messages.update_many({"sender_id": user_id}, anonymized)
+        await db.messages_archive.update_many({"sender_id": user_id}, anonymized)
         
         # 2. Delete or anonymize quotes
         if current_user.role in [UserRole.customer, UserRole.agent]:
@@ -5012,7 +5350,7 @@ async def delete_user_account(
             # Cancel active inspections
             await db.inspections.update_many(
                 {"customer_id": user_id, "status": {"$in": ["pending_scheduling", "awaiting_customer_selection", "scheduled"]}},
-                {"$set": {"status": InspectionStatus.cancelled.value}}
+                {"$set": {"status": InspectionStatus.cancelled.value, "updated_at": datetime.utcnow()}}
             )
             # Anonymize completed inspections
             await db.inspections.update_many(
@@ -5021,24 +5359,45 @@ async def delete_user_account(
                     "customer_id": "deleted_user",
                     "customer_name": "Deleted User",
                     "customer_email": f"deleted_{user_id}@deleted.com",
-                    "customer_phone": "Deleted"
+                    "customer_phone": "Deleted",
+                    "updated_at": datetime.utcnow()
                 }}
             )
+            # Drop the old name from the search index
+            await refresh_search_keys(
+                db.inspections,
+                {"customer_id": "deleted_user", "customer_email": f"deleted_{user_id}@deleted.com"}
+            )
+        
+        # Bulk quote deletes and cancellations - recount rather than track each document
+        if current_user.role in [UserRole.customer, UserRole.agent]:
+            await dashboard_stats.reconcile()
+        
+        # Their chats leave everyone's conversation list
+        await conversation_store.delete_for_customer(user_id)
+        await read_states.delete_for_user(user_id)
         
         # 4. Delete profile picture from S3 (if exists)
         if user_doc.get("profile_picture"):
             try:
-                # Extract S3 key from URL
-                s3_url = user_doc["profile_picture"]
-                if "amazonaws.com/" in s3_url:
-                    s3_key = s3_url.split("amazonaws.com/")[1]
-                    s3_client.delete_object(Bucket=S3_BUCKET, Key=s3_key)
+                from s3_service import delete_file_from_s3
+                # New records store the S3 key; old records store the full URL
+                s3_key = user_doc["profile_picture"]
+                if "amazonaws.com/" in s3_key:
+                    s3_key = s3_key.split("amazonaws.com/")[1]
+                if not s3_key.startswith("http"):
+                    from image_service import all_profile_picture_keys
+                    for picture_key in all_profile_picture_keys(s3_key):
+                        delete_file_from_s3(picture_key)
                     logging.info(f"Deleted profile picture from S3: {s3_key}")
             except Exception as e:
                 logging.error(f"Error deleting profile picture from S3: {e}")
         
         # 5. Delete user profile
         result = await db.users.delete_one({"id": user_id})
+        principal_cache.invalidate(user_id)
+        staff_directory.invalidate_user(user_id)
+        participant_resolver.invalidate_user(user_id)
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
@@ -5065,7 +5424,7 @@ async def delete_user_account(
 
 @api_router.post("/users/accept-terms")
 async def accept_terms_on_login(
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """
     Accept Terms of Service and Privacy Policy after login
@@ -5084,6 +5443,7 @@ async def accept_terms_on_login(
             "data_processing_consent": True
         }}
     )
+    principal_cache.invalidate(current_user.id)
     
     logging.info(f"User {current_user.id} accepted terms and privacy policy on login")
     
@@ -5096,7 +5456,7 @@ async def accept_terms_on_login(
 @api_router.patch("/users/consent")
 async def update_consent(
     marketing_consent: Optional[bool] = None,
-    current_user: UserInDB = Depends(get_current_user_from_token)
+    current_user: Principal = Depends(get_current_user_from_token)
 ):
     """
     Update user consent preferences (e.g., marketing communications)
@@ -5138,12 +5498,26 @@ async def root():
 # Include the router in the main app
 app.include_router(api_router)
 
+# Multipart framing allowed on top of the picture itself
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_profile_pictures(request: Request, call_next):
+    """Refuse an oversized profile picture from its Content-Length, before the body is read"""
+    if request.method == "POST" and request.url.path == "/api/users/profile-picture":
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > PROFILE_PICTURE_MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES:
+            return JSONResponse(status_code=413, content={"detail": "Profile picture is too large"})
+    return await call_next(request)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Latest-Cursor"],
 )
 
 # Configure logging
@@ -5153,11 +5527,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+index_registry_task: Optional[asyncio.Task] = None
+
+async def build_index_registry():
+    # Idempotent - only missing indexes are built (see db_indexes.py)
+    try:
+        result = await apply_indexes(db)
+        if result["failed"]:
+            logger.warning(f"Index registry: could not build {', '.join(result['failed'])}")
+    except Exception as e:
+        logger.error(f"Index registry failed: {e}")
+
+@app.on_event("startup")
+async def apply_index_registry():
+    # Builds can take minutes on large collections, so startup does not wait for them
+    global index_registry_task
+    index_registry_task = asyncio.create_task(build_index_registry())
+
+@app.on_event("shutdown")
+async def stop_index_registry():
+    if index_registry_task is not None and not index_registry_task.done():
+        index_registry_task.cancel()
+
+@app.on_event("startup")
+async def start_staff_directory_refresh():
+    staff_directory.start_periodic_refresh()
+
+@app.on_event("shutdown")
+async def stop_staff_directory_refresh():
+    await staff_directory.stop_periodic_refresh()
+
+@app.on_event("startup")
+async def start_dashboard_stats_reconcile():
+    dashboard_stats.start_periodic_reconcile()
+
+@app.on_event("shutdown")
+async def stop_dashboard_stats_reconcile():
+    await dashboard_stats.stop_periodic_reconcile()
+
+@app.on_event("startup")
+async def start_message_archive():
+    message_archiver.start_periodic_archive()
+
+@app.on_event("shutdown")
+async def stop_message_archive():
+    await message_archiver.stop_periodic_archive()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
     logger.info("Database connection closed")
 
+@app.on_event("shutdown")
+async def shutdown_password_hash_pool():
+    shutdown_hash_pool()
+    logger.info("Password hash pool stopped")
+
+@app.on_event("shutdown")
+async def shutdown_image_processing_pool():
+    from image_service import shutdown_image_pool
+    shutdown_image_pool()
+
 # Create Socket.IO ASGI app and mount it to FastAPI
 # This combines both FastAPI routes and Socket.IO WebSocket handling
 # The socket_app handles both HTTP/REST (via other_asgi_app) and WebSocket/Socket.IO
@@ -2,7 +2,9 @@
 Socket.IO Server for Real-time Updates
 Provides instant notifications for quotes, inspections, messages, and scheduling events
 """
+import asyncio
 import socketio
+from datetime import datetime
 from fastapi import HTTPException
 from auth import decode_token
 import logging
@@ -231,9 +233,8 @@ async def emit_new_message(message_data: dict, recipient_ids: list):
         'timestamp': message_data.get('created_at')
     }
     
-    # Emit to each recipient
-    for recipient_id in recipient_ids:
-        await emit_to_user(recipient_id, 'new_message', message_event)
+    # Emit to every recipient concurrently
+    await asyncio.gather(*(emit_to_user(recipient_id, 'new_message', message_event) for recipient_id in recipient_ids))
 
 
 async def emit_calendar_updated(user_ids: list, calendar_data: dict):
@@ -252,4 +253,23 @@ async def emit_reschedule_request(inspection_id: str, inspection_data: dict):
     })
 
 
+
+async def emit_dashboard_stats(stats: dict):
+    """Emit the owner dashboard counters after they change"""
+    await emit_to_all_owners('dashboard_stats', {
+        'pending_quotes': stats.get('pending_quotes', 0),
+        'pending_scheduling': stats.get('pending_scheduling', 0),
+        'active_inspections': stats.get('active_inspections', 0),
+        'timestamp': stats.get('updated_at')
+    })
+
+
+async def emit_unread_count(user_id: str, unread_count: int):
+    """Emit a user's new total unread message count"""
+    await emit_to_user(user_id, 'unread_count', {
+        'unread_count': unread_count,
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+
 logger.info("✅ Socket.IO server initialized with real-time event handlers")
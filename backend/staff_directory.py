@@ -0,0 +1,178 @@
+"""
+Staff directory - in-process roster of owners and inspectors
+The roster is a handful of documents that almost never changes, so it is loaded
+once and served from memory, indexed by id, email, name and license number.
+Writes to staff user documents invalidate it; an optional periodic refresh picks
+up changes made by other processes.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from models import UserRole
+
+logger = logging.getLogger(__name__)
+
+STAFF_DIRECTORY_REFRESH_SECONDS = int(os.getenv("STAFF_DIRECTORY_REFRESH_SECONDS", "0"))  # 0 = no periodic refresh
+STAFF_ROLES = (UserRole.owner.value, UserRole.inspector.value)
+
+STAFF_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "email": 1,
+    "name": 1,
+    "role": 1,
+    "phone": 1,
+    "license_number": 1,
+    "push_token": 1,
+    "profile_picture": 1
+}
+
+
+class StaffDirectory:
+    """
+    Owners and inspectors loaded from the users collection
+    Returned member dicts are shared - callers must treat them as read-only
+    """
+
+    def __init__(self, users_collection):
+        self._users = users_collection
+        self._members: List[dict] = []
+        self._by_id: Dict[str, dict] = {}
+        self._by_email: Dict[str, dict] = {}
+        self._by_name: Dict[str, List[dict]] = {}
+        self._by_license: Dict[str, List[dict]] = {}
+        self._stale = True
+        self._generation = 0
+        self._loaded_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.loads = 0
+
+    async def _ensure_loaded(self):
+        if not self._stale:
+            return
+        async with self._lock:
+            if self._stale:
+                await self._load()
+
+    async def _load(self):
+        generation = self._generation
+        members = await self._users.find(
+            {"role": {"$in": list(STAFF_ROLES)}},
+            STAFF_PROJECTION
+        ).sort("_id", 1).to_list(None)
+
+        by_id, by_email, by_name, by_license = {}, {}, {}, {}
+        for member in members:
+            by_id[member["id"]] = member
+            if member.get("email"):
+                by_email[member["email"].lower()] = member
+            if member.get("name"):
+                by_name.setdefault(member["name"], []).append(member)
+            if member.get("license_number"):
+                by_license.setdefault(member["license_number"], []).append(member)
+
+        self._members = members
+        self._by_id, self._by_email = by_id, by_email
+        self._by_name, self._by_license = by_name, by_license
+        self._loaded_at = datetime.utcnow()
+        self.loads += 1
+        # An invalidation that raced with this load means the roster may already be stale
+        self._stale = generation != self._generation
+        logger.info(f"Staff directory loaded: {len(members)} owners/inspectors")
+
+    @staticmethod
+    def _first_with_role(members: List[dict], roles) -> Optional[dict]:
+        for member in members:
+            if roles is None or member["role"] in roles:
+                return member
+        return None
+
+    async def all_staff(self) -> List[dict]:
+        """Every owner and inspector"""
+        await self._ensure_loaded()
+        return self._members
+
+    async def owners(self) -> List[dict]:
+        """Every owner account"""
+        await self._ensure_loaded()
+        return [m for m in self._members if m["role"] == UserRole.owner.value]
+
+    async def primary_owner(self) -> Optional[dict]:
+        """The first owner account (what find_one({"role": "owner"}) returned)"""
+        await self._ensure_loaded()
+        return self._first_with_role(self._members, (UserRole.owner.value,))
+
+    async def get_by_id(self, user_id: str) -> Optional[dict]:
+        await self._ensure_loaded()
+        return self._by_id.get(user_id)
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        if not email:
+            return None
+        await self._ensure_loaded()
+        return self._by_email.get(email.strip().lower())
+
+    async def find_by_name(self, name: str, roles=STAFF_ROLES) -> Optional[dict]:
+        """First staff member with this exact name, optionally limited to some roles"""
+        if not name:
+            return None
+        await self._ensure_loaded()
+        return self._first_with_role(self._by_name.get(name, []), roles)
+
+    async def find_by_license(self, license_number: str, roles=STAFF_ROLES) -> Optional[dict]:
+        """First staff member with this license number, optionally limited to some roles"""
+        if not license_number:
+            return None
+        await self._ensure_loaded()
+        return self._first_with_role(self._by_license.get(license_number, []), roles)
+
+    def invalidate(self):
+        """Force a reload on next access"""
+        self._generation += 1
+        self._stale = True
+
+    def invalidate_user(self, user_id: str, role: Optional[str] = None):
+        """Invalidate after a write to a user document, if that user is (or becomes) staff"""
+        role_value = role.value if isinstance(role, UserRole) else role
+        if user_id in self._by_id or role_value in STAFF_ROLES:
+            self.invalidate()
+
+    async def refresh(self):
+        """Reload the roster now"""
+        async with self._lock:
+            await self._load()
+
+    async def _refresh_periodically(self, interval: int):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Staff directory refresh failed: {e}")
+
+    def start_periodic_refresh(self, interval: int = STAFF_DIRECTORY_REFRESH_SECONDS):
+        """Reload every `interval` seconds to pick up writes from other processes (no-op if 0)"""
+        if interval > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_periodically(interval))
+
+    async def stop_periodic_refresh(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> dict:
+        """Roster size and load counters for monitoring"""
+        return {
+            "size": len(self._members),
+            "stale": self._stale,
+            "loads": self.loads,
+            "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+            "refresh_interval_seconds": STAFF_DIRECTORY_REFRESH_SECONDS
+        }
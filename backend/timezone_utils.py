@@ -1,12 +1,20 @@
 """
 Timezone utilities to ensure all dates/times are handled in Central Time (US/Central)
 """
-from datetime import datetime, date
+import os
+import re
+from datetime import datetime, date, time, timedelta
+from typing import Optional, Tuple
 from zoneinfo import ZoneInfo
 
 # Central Time Zone
 CENTRAL_TZ = ZoneInfo("America/Chicago")
 
+# Length of an inspection slot - scheduled_end = scheduled_start + this
+INSPECTION_DURATION = timedelta(minutes=int(os.getenv("INSPECTION_DURATION_MINUTES", "180")))
+
+_TIME_PATTERN = re.compile(r"^(\d{1,2})(?::(\d{2}))?(am|pm)?$")
+
 def get_central_now() -> datetime:
     """Get current datetime in Central Time"""
     return datetime.now(CENTRAL_TZ)
@@ -45,3 +53,34 @@ def datetime_to_central(dt: datetime) -> datetime:
         # Assume UTC if no timezone
         dt = dt.replace(tzinfo=ZoneInfo("UTC"))
     return dt.astimezone(CENTRAL_TZ)
+
+def parse_time_of_day(time_string: str) -> Optional[time]:
+    """
+    Parse a slot time as entered in the app: '8am', '8:00 AM', '08:00', '14:30'
+    Returns None if the string is not a recognizable time
+    """
+    if not time_string:
+        return None
+    match = _TIME_PATTERN.match(time_string.strip().lower().replace(" ", "").replace(".", ""))
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem == "pm" and hour != 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+def scheduled_window(date_string: str, time_string: str, duration: timedelta = INSPECTION_DURATION) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Canonical Central Time start/end for a scheduled date (YYYY-MM-DD) and slot time
+    Returns (None, None) if either part cannot be parsed
+    """
+    slot_date = parse_date_central(date_string)
+    slot_time = parse_time_of_day(time_string)
+    if slot_date is None or slot_time is None:
+        return None, None
+    start = datetime.combine(slot_date, slot_time, tzinfo=CENTRAL_TZ)
+    return start, start + duration
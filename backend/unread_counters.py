@@ -0,0 +1,88 @@
+"""
+Unread counters - every user's total unread message count, one document each
+The conversation store applies an $inc whenever a conversation's unread
+counters change (a message is sent, a chat is opened, an inspection is closed or
+reassigned), so GET /conversations/unread-count is one _id lookup.
+
+Owners share the `owners` pool document (messages addressed to "the owner"); an
+owner's total is the pool plus their own document (chats where they are the
+inspector). Every change is pushed to the affected users as an `unread_count`
+Socket.IO event; rebuild_conversations.py recounts everything from scratch.
+"""
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from models import UserRole
+
+logger = logging.getLogger(__name__)
+
+OWNERS_POOL = "owners"
+
+
+class UnreadCounters:
+    """Per-user unread totals stored in the unread_counters collection"""
+
+    def __init__(
+        self,
+        collection,
+        owner_ids: Optional[Callable[[], Awaitable[List[str]]]] = None,
+        on_change: Optional[Callable[[str, int], Awaitable[None]]] = None
+    ):
+        self._collection = collection
+        self._owner_ids = owner_ids
+        self._on_change = on_change
+
+    async def apply(self, deltas: Dict[str, int]):
+        """$inc each counter by its delta and push the new totals to the users affected"""
+        deltas = {key: delta for key, delta in deltas.items() if key and delta}
+        if not deltas:
+            return
+        try:
+            now = datetime.utcnow()
+            for key, delta in deltas.items():
+                await self._collection.update_one(
+                    {"_id": key}, {"$inc": {"count": delta}, "$set": {"updated_at": now}}, upsert=True
+                )
+        except Exception as e:
+            # A lost increment is corrected by the next rebuild
+            logger.error(f"Failed to update unread counters {deltas}: {e}")
+            return
+        await self._notify(deltas.keys())
+
+    async def totals(self, user_ids: Iterable[str], owner_ids: Iterable[str] = ()) -> Dict[str, int]:
+        """Current total per user; owners in `owner_ids` also get the owners pool"""
+        user_ids, owner_ids = set(user_ids), set(owner_ids)
+        keys = list(user_ids | ({OWNERS_POOL} if user_ids & owner_ids else set()))
+        documents = await self._collection.find({"_id": {"$in": keys}}).to_list(len(keys))
+        counts = {document["_id"]: document.get("count", 0) for document in documents}
+        pool = counts.get(OWNERS_POOL, 0)
+        return {
+            user_id: max(0, counts.get(user_id, 0) + (pool if user_id in owner_ids else 0))
+            for user_id in user_ids
+        }
+
+    async def get(self, principal) -> int:
+        """One user's total (a single $in lookup)"""
+        owner_ids = [principal.id] if principal.role == UserRole.owner else []
+        return (await self.totals([principal.id], owner_ids))[principal.id]
+
+    async def replace(self, counts: Dict[str, int]):
+        """Overwrite every counter with a full recount (rebuild_conversations.py)"""
+        now = datetime.utcnow()
+        await self._collection.delete_many({"_id": {"$nin": list(counts)}})
+        for key, count in counts.items():
+            await self._collection.update_one({"_id": key}, {"$set": {"count": count, "updated_at": now}}, upsert=True)
+
+    async def _notify(self, keys: Iterable[str]):
+        if self._on_change is None or self._owner_ids is None:
+            return
+        try:
+            keys = set(keys)
+            owner_ids = await self._owner_ids()
+            user_ids = keys - {OWNERS_POOL}
+            if OWNERS_POOL in keys:
+                user_ids |= set(owner_ids)
+            for user_id, count in (await self.totals(user_ids, owner_ids)).items():
+                await self._on_change(user_id, count)
+        except Exception as e:
+            logger.error(f"Failed to push unread counts: {e}")
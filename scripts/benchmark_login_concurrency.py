@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Login Concurrency Benchmark
+Fires a burst of concurrent logins while polling an unrelated endpoint, and reports
+login throughput plus p50/p99 latency of the unrelated endpoint. With bcrypt on the
+event loop the unrelated p99 tracks the login backlog; with the worker pool it stays flat.
+
+Usage:
+    BENCH_BASE_URL=http://localhost:8001/api \
+    BENCH_EMAIL=user@example.com BENCH_PASSWORD=secret \
+    python scripts/benchmark_login_concurrency.py --logins 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import httpx
+
+BASE_URL = os.getenv('BENCH_BASE_URL', 'http://localhost:8001/api')
+EMAIL = os.getenv('BENCH_EMAIL', 'test@example.com')
+PASSWORD = os.getenv('BENCH_PASSWORD', 'password123')
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_logins(client, total, concurrency, results):
+    """Run `total` logins with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(f"{BASE_URL}/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            results["latencies"].append(time.perf_counter() - started)
+            results["status"][response.status_code] = results["status"].get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(one_login() for _ in range(total)))
+
+
+async def poll_unrelated(client, stop_event, latencies, interval):
+    """Poll the API root (no bcrypt, no database) until stop_event is set"""
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        await client.get(f"{BASE_URL}/")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput and event-loop responsiveness")
+    parser.add_argument('--logins', type=int, default=200, help='Total logins to run')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent logins in flight')
+    parser.add_argument('--poll-interval', type=float, default=0.01, help='Seconds between unrelated requests')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LOGIN CONCURRENCY BENCHMARK")
+    print("=" * 60)
+    print(f"Target: {BASE_URL}")
+    print(f"Logins: {args.logins} (concurrency {args.concurrency})")
+
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        # Baseline latency of the unrelated endpoint with no login load
+        baseline = []
+        for _ in range(50):
+            started = time.perf_counter()
+            await client.get(f"{BASE_URL}/")
+            baseline.append(time.perf_counter() - started)
+
+        login_results = {"latencies": [], "status": {}}
+        unrelated = []
+        stop_event = asyncio.Event()
+        poller = asyncio.create_task(poll_unrelated(client, stop_event, unrelated, args.poll_interval))
+
+        started = time.perf_counter()
+        await run_logins(client, args.logins, args.concurrency, login_results)
+        elapsed = time.perf_counter() - started
+
+        stop_event.set()
+        await poller
+
+    print("\n📈 Logins")
+    print(f"  Wall time:   {elapsed:.2f}s")
+    print(f"  Throughput:  {args.logins / elapsed:.1f} logins/s")
+    print(f"  p50 latency: {percentile(login_results['latencies'], 50) * 1000:.1f} ms")
+    print(f"  p99 latency: {percentile(login_results['latencies'], 99) * 1000:.1f} ms")
+    print(f"  Status codes: {login_results['status']}")
+
+    print("\n📈 Unrelated endpoint (GET /api/)")
+    print(f"  Baseline p50/p99: {percentile(baseline, 50) * 1000:.1f} / {percentile(baseline, 99) * 1000:.1f} ms")
+    print(f"  Under load p50/p99: {percentile(unrelated, 50) * 1000:.1f} / {percentile(unrelated, 99) * 1000:.1f} ms")
+    print(f"  Under load mean: {statistics.mean(unrelated) * 1000:.1f} ms over {len(unrelated)} requests" if unrelated else "  No samples")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
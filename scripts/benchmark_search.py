@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Search Benchmark
+Seeds a scratch database with synthetic users, inspections and quotes, builds the
+search_keys indexes, then times search_service queries against the old unanchored
+$regex scan. Run against a disposable database - the target collections are dropped.
+
+Usage:
+    BENCH_MONGO_URL=mongodb://localhost:27017 BENCH_DB_NAME=search_benchmark \
+    python scripts/benchmark_search.py --documents 100000 --queries 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from search_service import (  # noqa: E402
+    user_search_keys, inspection_search_keys, quote_search_keys,
+    search_users, search_inspections, search_quotes
+)
+from db_indexes import apply_indexes  # noqa: E402
+
+MONGO_URL = os.getenv('BENCH_MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.getenv('BENCH_DB_NAME', 'search_benchmark')
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Maria"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin"]
+STREETS = ["Main", "Oak", "Pecan", "Cedar", "Elm", "Lamar", "Congress", "Guadalupe", "Burnet", "Riverside",
+           "Barton Springs", "Slaughter", "Parmer", "Braker", "Anderson Mill", "Bee Cave", "Manchaca", "Koenig"]
+SUFFIXES = ["St", "Ave", "Blvd", "Ln", "Dr", "Rd", "Way", "Ct"]
+CITIES = ["Austin", "Round Rock", "Cedar Park", "Pflugerville", "Georgetown", "Leander", "Buda", "Kyle"]
+ROLES = ["customer"] * 8 + ["agent"] * 2
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def fake_person():
+    first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+    suffix = random.randint(1, 9999)
+    return {
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{suffix}@example.com",
+        "phone": f"({random.randint(200, 999)}) {random.randint(200, 999)}-{random.randint(1000, 9999)}"
+    }
+
+
+def fake_address():
+    return f"{random.randint(100, 19999)} {random.choice(STREETS)} {random.choice(SUFFIXES)}, {random.choice(CITIES)}, TX"
+
+
+async def seed(db, count):
+    """Insert `count` documents into each of users, inspections and quotes"""
+    for name in ("users", "inspections", "quotes"):
+        await db[name].drop()
+
+    batch = 5000
+    for start in range(0, count, batch):
+        size = min(batch, count - start)
+        users, inspections, quotes = [], [], []
+        for _ in range(size):
+            user = {"id": str(uuid.uuid4()), "role": random.choice(ROLES), **fake_person()}
+            user["search_keys"] = user_search_keys(user)
+            users.append(user)
+
+            agent = fake_person()
+            inspection = {
+                "id": str(uuid.uuid4()),
+                "property_address": fake_address(),
+                "customer_name": fake_person()["name"],
+                "agent_name": agent["name"] if random.random() < 0.6 else None,
+                "status": "scheduled"
+            }
+            inspection["search_keys"] = inspection_search_keys(inspection)
+            inspections.append(inspection)
+
+            quote = {
+                "id": str(uuid.uuid4()),
+                "property_address": fake_address(),
+                "customer_name": fake_person()["name"],
+                "agent_name": agent["name"] if random.random() < 0.4 else None,
+                "status": "pending"
+            }
+            quote["search_keys"] = quote_search_keys(quote)
+            quotes.append(quote)
+
+        await db.users.insert_many(users, ordered=False)
+        await db.inspections.insert_many(inspections, ordered=False)
+        await db.quotes.insert_many(quotes, ordered=False)
+        print(f"  Seeded {start + size}/{count}")
+
+    await apply_indexes(db, collections=["users", "inspections", "quotes"])
+
+
+def sample_queries(count):
+    """Autocomplete-style queries: partial names, street prefixes, name + street"""
+    queries = []
+    for _ in range(count):
+        kind = random.random()
+        if kind < 0.4:
+            name = random.choice(FIRST_NAMES + LAST_NAMES)
+            queries.append(name[:random.randint(2, len(name))])
+        elif kind < 0.7:
+            queries.append(f"{random.choice(STREETS)[:random.randint(3, 5)]}")
+        else:
+            queries.append(f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)[:3]}")
+    return queries
+
+
+async def time_calls(label, queries, call):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        await call(query)
+        latencies.append(time.perf_counter() - started)
+    print(f"  {label:<28} p50 {percentile(latencies, 50) * 1000:7.2f} ms   p99 {percentile(latencies, 99) * 1000:7.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexed prefix search")
+    parser.add_argument('--documents', type=int, default=100000, help='Documents per collection')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per scenario')
+    parser.add_argument('--skip-seed', action='store_true', help='Reuse the previously seeded data')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SEARCH BENCHMARK")
+    print("=" * 60)
+    print(f"Target: {MONGO_URL}/{DB_NAME}")
+
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+
+    if not args.skip_seed:
+        print(f"\n🌱 Seeding {args.documents} documents per collection...")
+        await seed(db, args.documents)
+
+    queries = sample_queries(args.queries)
+
+    # Warm the indexes and connection pool
+    for query in queries[:20]:
+        await search_users(db, query)
+
+    print(f"\n📈 {args.queries} queries each")
+    await time_calls("users (search_keys)", queries, lambda q: search_users(db, q))
+    await time_calls("agents (search_keys)", queries, lambda q: search_users(db, q, roles=["agent"]))
+    await time_calls("inspections (search_keys)", queries, lambda q: search_inspections(db, q))
+    await time_calls("quotes (search_keys)", queries, lambda q: search_quotes(db, q))
+
+    async def legacy_regex(query):
+        await db.users.find(
+            {"role": "agent", "name": {"$regex": re.escape(query), "$options": "i"}}
+        ).to_list(length=50)
+
+    await time_calls("agents (legacy $regex)", queries[:50], legacy_regex)
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Send Message Benchmark
+Sends a burst of chat messages through POST /api/messages and reports messages per
+second, per worker, with p50/p99 latency. The first messages warm the participant
+cache; the rest measure the steady-state send path (one insert, the conversation
+upsert and the fan-out).
+
+Messages go to an inspection chat when BENCH_INSPECTION_ID is set, otherwise to the
+sender's general chat with the owners. Run it against a test database - every
+message is stored.
+
+Usage:
+    BENCH_BASE_URL=http://localhost:8001/api \
+    BENCH_EMAIL=customer@example.com BENCH_PASSWORD=secret \
+    BENCH_INSPECTION_ID=<inspection id> \
+    python scripts/benchmark_send_message.py --messages 1000 --concurrency 20 --workers 1
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import httpx
+
+BASE_URL = os.getenv('BENCH_BASE_URL', 'http://localhost:8001/api')
+EMAIL = os.getenv('BENCH_EMAIL', 'test@example.com')
+PASSWORD = os.getenv('BENCH_PASSWORD', 'password123')
+INSPECTION_ID = os.getenv('BENCH_INSPECTION_ID')
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def send_messages(client, headers, total, concurrency, results, label):
+    """Send `total` messages with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_message(number):
+        async with semaphore:
+            payload = {"message_text": f"Benchmark {label} message {number}", "inspection_id": INSPECTION_ID}
+            started = time.perf_counter()
+            response = await client.post(f"{BASE_URL}/messages", json=payload, headers=headers)
+            results["latencies"].append(time.perf_counter() - started)
+            results["status"][response.status_code] = results["status"].get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(one_message(number) for number in range(total)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat message sends per second per worker")
+    parser.add_argument('--messages', type=int, default=1000, help='Total messages to send')
+    parser.add_argument('--concurrency', type=int, default=20, help='Concurrent sends in flight')
+    parser.add_argument('--warmup', type=int, default=20, help='Messages sent before measuring')
+    parser.add_argument('--workers', type=int, default=1, help='Server worker processes, for the per-worker rate')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SEND MESSAGE BENCHMARK")
+    print("=" * 60)
+    print(f"Target: {BASE_URL}")
+    print(f"Chat: {'inspection ' + INSPECTION_ID if INSPECTION_ID else 'general owner chat'}")
+    print(f"Messages: {args.messages} (concurrency {args.concurrency}, {args.workers} worker(s))")
+
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        login = await client.post(f"{BASE_URL}/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        if login.status_code != 200:
+            print(f"\n❌ Login failed: {login.status_code} {login.text}")
+            return
+        headers = {"Authorization": f"Bearer {login.json()['session_token']}"}
+
+        warmup = {"latencies": [], "status": {}}
+        await send_messages(client, headers, args.warmup, args.concurrency, warmup, "warmup")
+
+        results = {"latencies": [], "status": {}}
+        started = time.perf_counter()
+        await send_messages(client, headers, args.messages, args.concurrency, results, "measured")
+        elapsed = time.perf_counter() - started
+
+    rate = args.messages / elapsed
+    print("\n📈 Sends")
+    print(f"  Wall time:   {elapsed:.2f}s")
+    print(f"  Throughput:  {rate:.1f} messages/s ({rate / args.workers:.1f} per worker)")
+    print(f"  p50 latency: {percentile(results['latencies'], 50) * 1000:.1f} ms")
+    print(f"  p99 latency: {percentile(results['latencies'], 99) * 1000:.1f} ms")
+    print(f"  Status codes: {results['status']}")
+    if set(results["status"]) - {200}:
+        print("\n⚠️  Some sends failed - check the status codes above")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Query counts of the inspection list endpoints
+Listing N inspections must cost one inspections query (plus the ETag aggregation),
+not one query per row. The endpoints run against a stub database that counts
+every call, so no MongoDB is needed.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+server = pytest.importorskip("server")
+
+from fastapi import Response  # noqa: E402
+from models import InspectionStatus, ListView, UserRole  # noqa: E402
+from principal_cache import Principal  # noqa: E402
+
+ROWS = 25
+
+
+class StubCursor:
+    def __init__(self, documents):
+        self._documents = documents
+
+    async def to_list(self, length):
+        return list(self._documents if length is None else self._documents[:length])
+
+
+class StubCollection:
+    """Serves fixed documents and counts find / find_one / aggregate calls"""
+
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.calls = {"find": 0, "find_one": 0, "aggregate": 0}
+
+    def find(self, query=None, projection=None):
+        self.calls["find"] += 1
+        return StubCursor(self.documents)
+
+    async def find_one(self, query=None, projection=None):
+        self.calls["find_one"] += 1
+        return self.documents[0] if self.documents else None
+
+    def aggregate(self, pipeline):
+        self.calls["aggregate"] += 1
+        return StubCursor([{"_id": None, "count": len(self.documents), "latest": None}])
+
+
+class StubDatabase:
+    """Every collection is a counting stub; inspections holds the rows"""
+
+    def __init__(self, inspections):
+        self._collections = {"inspections": StubCollection(inspections)}
+
+    def __getattr__(self, name):
+        return self[name]
+
+    def __getitem__(self, name):
+        return self._collections.setdefault(name, StubCollection())
+
+    def total_calls(self, *names):
+        return {name: dict(collection.calls) for name, collection in self._collections.items() if not names or name in names}
+
+
+class StubRequest:
+    headers = {}
+
+
+def inspection(number: int, customer: Principal) -> dict:
+    return {
+        "id": f"inspection-{number}",
+        "quote_id": f"quote-{number}",
+        "customer_id": customer.id,
+        "customer_email": customer.email,
+        "customer_name": customer.name,
+        "property_address": f"{number} Main St",
+        "status": InspectionStatus.scheduled.value,
+        "inspector_id": f"inspector-{number}",
+        "inspector_name": f"Inspector {number}",
+        "agent_email": f"agent{number}@example.com"
+    }
+
+
+@pytest.fixture
+def customer():
+    return Principal(id="customer-1", email="customer@example.com", name="Casey Customer", role=UserRole.customer)
+
+
+@pytest.fixture
+def owner():
+    return Principal(id="owner-1", email="owner@example.com", name="Olive Owner", role=UserRole.owner)
+
+
+@pytest.fixture
+def stub_db(monkeypatch, customer):
+    database = StubDatabase([inspection(number, customer) for number in range(ROWS)])
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+
+def assert_single_inspections_query(database: StubDatabase):
+    inspections = database.total_calls("inspections")["inspections"]
+    assert inspections["find"] == 1
+    assert inspections["find_one"] == 0
+    others = {name: calls for name, calls in database.total_calls().items() if name != "inspections"}
+    assert all(not (calls["find"] or calls["find_one"]) for calls in others.values()), others
+
+
+@pytest.mark.parametrize("view", [ListView.full, ListView.summary])
+def test_my_inspections_is_one_query(stub_db, customer, view):
+    results = asyncio.run(server.get_my_inspections(
+        request=StubRequest(), response=Response(), view=view, current_user=customer
+    ))
+
+    assert len(results) == ROWS
+    assert_single_inspections_query(stub_db)
+    # The ETag is one aggregation over the same query
+    assert stub_db.total_calls("inspections")["inspections"]["aggregate"] == 1
+
+
+@pytest.mark.parametrize("view", [ListView.full, ListView.summary])
+def test_confirmed_inspections_is_one_query(stub_db, owner, view):
+    results = asyncio.run(server.get_confirmed_inspections(view=view, current_user=owner))
+
+    assert len(results) == ROWS
+    assert_single_inspections_query(stub_db)